@@ -0,0 +1,13 @@
+"""
+Benchmarks of the openant hot paths
+
+Micro benchmarks time single calls: message framing and parsing, the ANT+
+page decoders, InfluxDB conversion and ANT-FS parsing. Macro benchmarks time
+a batch of broadcasts through the threads of a live `Ant` or `Node` fed by
+`StreamDriver`, so include the queue hops. Results are per operation, the
+median of several repeats, and can be written as JSON to compare releases::
+
+    python -m benchmarks --output before.json
+    # after a change
+    python -m benchmarks --compare before.json
+"""
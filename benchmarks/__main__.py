@@ -0,0 +1,70 @@
+import argparse
+import sys
+
+from . import bench_base, bench_devices, bench_easy, bench_fs  # noqa: F401
+from .harness import compare, load, run, save, select
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark openant hot paths, optionally against a previous run",
+    )
+    parser.add_argument(
+        "patterns",
+        nargs="*",
+        help="Only run benchmarks with names matching these globs, e.g. 'devices.*'",
+    )
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    parser.add_argument("--output", "-o", type=str, help="Save results to .json file")
+    parser.add_argument(
+        "--compare", "-c", type=str, help="Compare with results saved to .json file"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Slowdown relative to --compare results counted as a regression",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Repeats of each")
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Least seconds each repeat runs for",
+    )
+    args = parser.parse_args(argv)
+
+    benchmarks = select(args.patterns)
+    if args.list:
+        for bench in benchmarks:
+            print(bench.name)
+        return 0
+
+    baseline = load(args.compare) if args.compare else None
+
+    results = []
+    regressions = []
+    for bench in benchmarks:
+        result = run(bench, args.repeat, args.min_time)
+        results.append(result)
+        line = f"{result.name:<45} {result.median * 1e6:>10.3f} us/op {result.ops_per_sec:>12.0f} op/s"
+        if baseline is not None:
+            change = compare(baseline, [result]).get(result.name)
+            if change is not None:
+                line += f" {change:>+8.1%}"
+                if change > args.threshold:
+                    regressions.append(result.name)
+        print(line, flush=True)
+
+    if args.output:
+        save(args.output, results)
+
+    if regressions:
+        print(f"Regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Benchmarks of openant.base: messages, framing and the `Ant` worker
+"""
+
+import array
+import functools
+import os
+import tempfile
+
+from openant.base.ant import Ant
+from openant.base.capture import RecordingDriver
+from openant.base.message import Message
+
+from .harness import StreamDriver, benchmark, broadcasts
+
+BATCH = 1000
+
+
+@benchmark("base.message.parse")
+def message_parse():
+    data = Message(Message.ID.BROADCAST_DATA, list(range(9))).get()
+    yield lambda: Message.parse(data)
+
+
+@benchmark("base.message.parse_extended")
+def message_parse_extended():
+    data = array.array("B", broadcasts(1, extended=True))
+    yield lambda: Message.parse(data)
+
+
+@benchmark("base.message.get")
+def message_get():
+    message = Message(Message.ID.BROADCAST_DATA, list(range(9)))
+    yield message.get
+
+
+@benchmark("base.message.build_and_get")
+def message_build_and_get():
+    data = list(range(9))
+    yield lambda: Message(Message.ID.BROADCAST_DATA, data).get()
+
+
+class _ChunkReader:
+    """Driver reading `chunks` of a stream round and round"""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._index = 0
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def read(self):
+        chunk = self._chunks[self._index]
+        self._index = (self._index + 1) % len(self._chunks)
+        return chunk
+
+
+@benchmark("base.ant.read_message", ops=BATCH)
+def ant_read_message():
+    # framing only: an Ant without its worker thread, reading USB sized chunks
+    stream = broadcasts(BATCH)
+    chunks = [
+        array.array("B", stream[i : i + StreamDriver.READ_SIZE])
+        for i in range(0, len(stream), StreamDriver.READ_SIZE)
+    ]
+    ant = Ant(_ChunkReader(chunks), worker=False)
+
+    def read_batch():
+        for _ in range(BATCH):
+            ant.read_message()
+
+    yield read_batch
+
+
+def capture_record_read(index: bool):
+    # recording overhead on the thread reading the driver, USB sized chunks
+    stream = broadcasts(BATCH)
+    chunks = [
+        array.array("B", stream[i : i + StreamDriver.READ_SIZE])
+        for i in range(0, len(stream), StreamDriver.READ_SIZE)
+    ]
+    directory = tempfile.TemporaryDirectory()
+    driver = RecordingDriver(
+        _ChunkReader(chunks), os.path.join(directory.name, "bench.antcap"), index
+    )
+    driver.open()
+
+    def read_batch():
+        for _ in range(len(chunks)):
+            driver.read()
+
+    try:
+        yield read_batch
+    finally:
+        driver.close()
+        directory.cleanup()
+
+
+benchmark("base.capture.record_read", ops=BATCH)(
+    functools.partial(capture_record_read, False)
+)
+benchmark("base.capture.record_read_indexed", ops=BATCH)(
+    functools.partial(capture_record_read, True)
+)
+
+
+@benchmark("base.ant.worker_dispatch", ops=BATCH)
+def ant_worker_dispatch():
+    # driver read to `Ant._events`, framing and dispatch by the worker thread
+    driver = StreamDriver()
+    ant = Ant(driver)
+    stream = broadcasts(BATCH)
+    # drain reset response
+    ant._events.get(timeout=1)
+
+    def dispatch_batch():
+        driver.feed(stream)
+        for _ in range(BATCH):
+            ant._events.get()
+
+    try:
+        yield dispatch_batch
+    finally:
+        ant.stop()
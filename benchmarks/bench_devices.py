@@ -0,0 +1,150 @@
+"""
+Benchmarks of openant.devices: the ANT+ page decoders and serialization of their data
+"""
+import functools
+import threading
+
+from openant.base.emulator import EmulatorDriver, SimulatedDevice
+from openant.devices import ANTPLUS_NETWORK_KEY, device_profiles
+from openant.devices.common import AntPlusDevice, DeviceData
+from openant.devices.loadgen import page_generators
+from openant.devices.pairing import PairingCache
+from openant.devices.scanner import Scanner
+from openant.easy.node import Node
+
+from .harness import StreamDriver, benchmark, pages
+
+# enough for the common pages to be included
+PAGES = 260
+# extended pages of as many devices seen by the scanner
+SCANNED = 2000
+# emulated radio time runs this much faster, a channel period is 2.5 ms
+SPEED = 100
+
+
+def _device(device_type):
+    node = Node(StreamDriver())
+    return node, device_profiles[device_type](node)
+
+
+def on_data(device_type):
+    # decoder only, not the common pages handled by `_on_data`
+    node, device = _device(device_type)
+    data = pages(page_generators[device_type](seed=0), PAGES)
+
+    def decode():
+        for page in data:
+            device.on_data(page)
+
+    try:
+        yield decode
+    finally:
+        node.stop()
+
+
+def _serialize(device_type, convert):
+    # each call converts every DeviceData of the device, after decoding pages
+    node, device = _device(device_type)
+    for page in pages(page_generators[device_type](seed=0), PAGES):
+        device._on_data(page)
+    datas = [d for d in device.data.values() if isinstance(d, DeviceData)]
+    tags = {"device_id": device.device_id, "name": device.name}
+
+    def serialize():
+        for d in datas:
+            convert(d, tags)
+
+    try:
+        yield serialize
+    finally:
+        node.stop()
+
+
+def to_influx_json(device_type):
+    return _serialize(device_type, lambda d, tags: d.to_influx_json(tags))
+
+
+def to_line_protocol(device_type):
+    return _serialize(device_type, lambda d, tags: d.to_line_protocol(tags))
+
+
+def to_tuple(device_type):
+    return _serialize(device_type, lambda d, tags: d.to_tuple())
+
+
+for _device_type in page_generators:
+    benchmark(f"devices.{_device_type.name}.on_data", ops=PAGES)(
+        functools.partial(on_data, _device_type)
+    )
+    for _serializer in (to_influx_json, to_line_protocol, to_tuple):
+        benchmark(f"devices.{_device_type.name}.{_serializer.__name__}")(
+            functools.partial(_serializer, _device_type)
+        )
+
+
+@benchmark("devices.scanner.on_data", ops=SCANNED)
+def scanner_on_data():
+    # 200 devices, each sending the same manufacturer and product pages among data pages
+    node = Node(StreamDriver())
+    scanner = Scanner(node)
+    data = []
+    for n in range(SCANNED):
+        number = n % 200
+        page = [(0x50, 0x51, 0x10, 0x10)[(n // 200) % 4], 0xFF, 0xFF, 1, 2, 0, 3, 0]
+        data.append(bytes(page + [0x80, number, 0, 11, 5]))
+    for page in data:
+        scanner._on_data(page)
+
+    def scan():
+        for page in data:
+            scanner._on_data(page)
+
+    try:
+        yield scan
+    finally:
+        node.stop()
+
+
+class _FirstData(AntPlusDevice):
+    """Sets `done` on the first data received on a channel set to its device ID"""
+
+    def __init__(self, node, device_id, trans_type):
+        self.done = threading.Event()
+        # a wildcard channel is set to the ID of the first device it receives
+        self._pinned = device_id != 0
+        super().__init__(node, 120, device_id=device_id, trans_type=trans_type)
+
+    def on_update(self, data):
+        if self._pinned:
+            self.done.set()
+        self._pinned = True
+
+
+def first_data(paired):
+    # from opening a channel to its first data from the device, on the EmulatorDriver
+    sensor = SimulatedDevice(
+        1234, 120, trans_type=1, pages=lambda n: [4, 0xFF, 0, 0, 0, 0, n & 0xFF, 60]
+    )
+    node = Node(EmulatorDriver([sensor], speed=SPEED))
+    node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+    pairing = PairingCache()
+    if paired:
+        pairing.pair(120, "chest", 1234, 1)
+    thread = threading.Thread(target=node.start, name="benchmark.node")
+    thread.start()
+
+    def open_device():
+        device_id, _, trans_type = pairing.get(120, "chest") or (0, 120, 0)
+        device = _FirstData(node, device_id, trans_type)
+        device.done.wait()
+        device.close_channel()
+
+    try:
+        yield open_device
+    finally:
+        node.stop()
+        thread.join()
+
+
+benchmark("devices.first_data.wildcard")(functools.partial(first_data, False))
+benchmark("devices.first_data.paired")(functools.partial(first_data, True))
@@ -0,0 +1,91 @@
+"""
+Benchmarks of openant.easy: data from the driver through `Node` to a channel
+"""
+
+import functools
+import threading
+
+from openant.base.message import Message
+from openant.easy.channel import Channel
+from openant.easy.node import Node
+
+from .harness import StreamDriver, benchmark, broadcasts
+
+BATCH = 1000
+
+
+def node_broadcast_to_callback(tracing):
+    # driver read, Ant worker, Ant._events, Node._datas then channel callback
+    driver = StreamDriver()
+    node = Node(driver)
+    if tracing:
+        node.enable_tracing()
+    channel = node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+    stream = broadcasts(BATCH, channel.id)
+    done = threading.Event()
+    received = 0
+
+    def on_broadcast_data(_):
+        nonlocal received
+        received += 1
+        if received == BATCH:
+            done.set()
+
+    channel.on_broadcast_data = on_broadcast_data
+    thread = threading.Thread(target=node.start, name="benchmark.node")
+    thread.start()
+
+    def dispatch_batch():
+        nonlocal received
+        received = 0
+        done.clear()
+        driver.feed(stream)
+        done.wait()
+
+    try:
+        yield dispatch_batch
+    finally:
+        node.stop()
+        thread.join()
+
+
+benchmark("easy.node.broadcast_to_callback", ops=BATCH)(
+    functools.partial(node_broadcast_to_callback, False)
+)
+benchmark("easy.node.broadcast_to_callback_traced", ops=BATCH)(
+    functools.partial(node_broadcast_to_callback, True)
+)
+
+
+@benchmark("easy.node.queue_hop", ops=BATCH)
+def node_queue_hop():
+    # Node._worker_event to channel callback only, through Node._datas
+    node = Node(StreamDriver())
+    channel = node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+    done = threading.Event()
+    received = 0
+    data = bytes(8)
+
+    def on_broadcast_data(_):
+        nonlocal received
+        received += 1
+        if received == BATCH:
+            done.set()
+
+    channel.on_broadcast_data = on_broadcast_data
+    thread = threading.Thread(target=node.start, name="benchmark.node")
+    thread.start()
+
+    def hop_batch():
+        nonlocal received
+        received = 0
+        done.clear()
+        for _ in range(BATCH):
+            node._worker_event(channel.id, Message.Code.EVENT_RX_BROADCAST, data)
+        done.wait()
+
+    try:
+        yield hop_batch
+    finally:
+        node.stop()
+        thread.join()
@@ -0,0 +1,69 @@
+"""
+Benchmarks of openant.fs: CRC, directory and command parsing
+"""
+import array
+import random
+import struct
+
+from openant.fs import command
+from openant.fs.commons import crc
+from openant.fs.file import Directory
+
+from .harness import benchmark
+
+# files in benchmark directory
+FILES = 64
+
+
+def _random_data(size):
+    rand = random.Random(0)
+    return array.array("B", (rand.getrandbits(8) for _ in range(size)))
+
+
+@benchmark("fs.commons.crc_512")
+def crc_512():
+    data = _random_data(512)
+    yield lambda: crc(data)
+
+
+@benchmark("fs.commons.crc_8k")
+def crc_8k():
+    data = _random_data(8192)
+    yield lambda: crc(data)
+
+
+@benchmark("fs.file.directory_parse")
+def directory_parse():
+    data = array.array("B", struct.pack("<BBB5xII", 0x01, 16, 0, 0, 0))
+    for index in range(1, FILES + 1):
+        data.extend(
+            struct.pack(
+                "<HBBHBBII", index, 0x80, 4, index, 0, 0xB0, 8192, 0x29D5FA80 + index
+            )
+        )
+    yield lambda: Directory.parse(data)
+
+
+@benchmark("fs.command.parse", ops=3)
+def command_parse():
+    commands = [
+        # download request
+        array.array(
+            "B", b"\x44\x09\x5f\x00\x00\xba\x00\x00\x00\x00\x9e\xc2\x00\x00\x00\x00"
+        ),
+        # download response
+        array.array(
+            "B",
+            b"\x44\x89\x00\x00\x08\x00\x00\x00\x00\x00\x00\x00\x08\x00\x00\x00\x02"
+            b"\x00\x00\x01\x03\x00\x03\x00\x00\x00\x00\x00\x00\x00\xbc\xad",
+        ),
+        command.AuthenticateCommand(
+            command.AuthenticateCommand.Request.SERIAL, 123456789
+        ).get(),
+    ]
+
+    def parse():
+        for data in commands:
+            command.parse(data)
+
+    yield parse
@@ -0,0 +1,214 @@
+"""
+Registry, timing and results of benchmarks
+"""
+import array
+import contextlib
+import datetime
+import fnmatch
+import json
+import platform
+import queue
+import statistics
+import subprocess
+import timeit
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import openant
+from openant.base.driver import Driver, DriverTimeoutException
+from openant.base.message import Message
+
+# results format, bumped on incompatible changes
+SCHEMA = 1
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # context manager yielding the function to time
+    setup: Callable[[], contextlib.AbstractContextManager]
+    # operations done by each call of the function
+    ops: int = 1
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    loops: int
+    # seconds per operation of each repeat
+    times: List[float] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1 / self.median
+
+    def to_json(self) -> dict:
+        return {
+            **asdict(self),
+            "min": min(self.times),
+            "median": self.median,
+            "mean": statistics.mean(self.times),
+            "stdev": statistics.stdev(self.times) if len(self.times) > 1 else 0.0,
+            "ops_per_sec": self.ops_per_sec,
+        }
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, ops: int = 1):
+    """
+    Register generator function `setup` as benchmark `name`
+
+    `setup` yields the function to time, which does `ops` operations, and
+    cleans up after the yield.
+    """
+
+    def decorator(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name} already registered")
+        BENCHMARKS[name] = Benchmark(name, contextlib.contextmanager(setup), ops)
+        return setup
+
+    return decorator
+
+
+def select(patterns: Optional[List[str]] = None) -> List[Benchmark]:
+    """Benchmarks with names matching any of glob `patterns`, all if None"""
+    return [
+        b
+        for name, b in BENCHMARKS.items()
+        if not patterns or any(fnmatch.fnmatch(name, p) for p in patterns)
+    ]
+
+
+def run(bench: Benchmark, repeat: int = 5, min_time: float = 0.2) -> Result:
+    """Time `bench` `repeat` times, each repeat looping for at least `min_time` seconds"""
+    with bench.setup() as func:
+        timer = timeit.Timer(func)
+        # warm up and find loops needed to run for min_time
+        loops = 1
+        while True:
+            if timer.timeit(loops) >= min_time:
+                break
+            loops *= 2
+        times = timer.repeat(repeat, loops)
+    return Result(
+        bench.name, bench.ops, loops, [t / (loops * bench.ops) for t in times]
+    )
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def report(results: List[Result]) -> dict:
+    """Results with the environment they were measured in, for saving as JSON"""
+    return {
+        "schema": SCHEMA,
+        "openant": openant.__version__,
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "benchmarks": [r.to_json() for r in results],
+    }
+
+
+def compare(baseline: dict, results: List[Result]) -> Dict[str, float]:
+    """Relative change in median time per operation from `baseline` report, by name"""
+    before = {b["name"]: b["median"] for b in baseline["benchmarks"]}
+    return {r.name: r.median / before[r.name] - 1 for r in results if r.name in before}
+
+
+def save(path: str, results: List[Result]):
+    with open(path, "w") as f:
+        json.dump(report(results), f, indent=2)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("schema") != SCHEMA:
+        raise ValueError(f"{path} is not a benchmark results file of schema {SCHEMA}")
+    return baseline
+
+
+class StreamDriver(Driver):
+    """
+    Answers configuration like a stick and reads back data fed to it
+
+    Data is read in chunks of at most `READ_SIZE` as from a USB stick.
+    """
+
+    READ_SIZE = 64
+    READ_TIMEOUT = 0.1
+
+    def __init__(self, max_channels: int = 8):
+        self.max_channels = max_channels
+        self._pending = queue.Queue()
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def feed(self, data: bytes):
+        for i in range(0, len(data), self.READ_SIZE):
+            self._pending.put(data[i : i + self.READ_SIZE])
+
+    def read(self):
+        try:
+            return self._pending.get(timeout=self.READ_TIMEOUT)
+        except queue.Empty:
+            raise DriverTimeoutException("No data fed")
+
+    def write(self, data):
+        message = Message.parse(array.array("B", data))
+        if message._id == Message.ID.RESET_SYSTEM:
+            reply = Message(Message.ID.STARTUP_MESSAGE, [0x00])
+        elif (
+            message._id == Message.ID.REQUEST_MESSAGE
+            and message._data[1] == Message.ID.RESPONSE_CAPABILITIES
+        ):
+            reply = Message(
+                Message.ID.RESPONSE_CAPABILITIES, [self.max_channels, 8, 0, 0, 0, 0]
+            )
+        else:
+            reply = Message(
+                Message.ID.RESPONSE_CHANNEL, [message._data[0], message._id, 0x00]
+            )
+        self._pending.put(reply.get())
+
+
+def broadcasts(count: int, channel: int = 0, extended: bool = False) -> bytes:
+    """`count` framed broadcasts on `channel`, each with different data"""
+    stream = bytearray()
+    for i in range(count):
+        data = [channel, 0x10, i & 0xFF, (i >> 8) & 0xFF, 0, 0, 0, 0, i & 0xFF]
+        if extended:
+            data += [0x80, 0x39, 0x30, 120, 0x01]
+        stream += bytes(Message(Message.ID.BROADCAST_DATA, data).get())
+    return bytes(stream)
+
+
+def pages(generator, count: int) -> List[array.array]:
+    """`count` pages from loadgen page `generator` as received"""
+    return [array.array("B", generator(n)) for n in range(count)]
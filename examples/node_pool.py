@@ -0,0 +1,41 @@
+"""
+Example of tracking more devices than one stick has channels by using every ANT stick attached with a NodePool.
+
+Each device is placed on the stick with the most free channels.
+"""
+from openant.easy.pool import NodePool
+from openant.devices import ANTPLUS_NETWORK_KEY
+from openant.devices.power_meter import PowerMeter
+
+
+def main(no_devices=16):
+    pool = NodePool()
+    pool.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+    # wildcard channels opened later ignore power meters already attached
+    pool.search_policy.exclude_tracked = True
+
+    print(f"Using {len(pool.nodes)} sticks with {pool.max_channels} channels")
+
+    devices = [PowerMeter(pool) for _ in range(no_devices)]
+
+    def on_device_data(device, page_name, data):
+        print(f"{device} {page_name} update: {data}")
+
+    for d in devices:
+        d.on_device_data = lambda _, page_name, data, d=d: on_device_data(
+            d, page_name, data
+        )
+
+    try:
+        print(f"Starting {devices}, press Ctrl-C to finish")
+        pool.start()
+    except KeyboardInterrupt:
+        print("Closing ANT+ devices...")
+    finally:
+        for d in devices:
+            d.close_channel()
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
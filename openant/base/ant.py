@@ -25,11 +25,13 @@ Base ANT interfacing
 
 import array
 import collections
+import errno
 import struct
 import threading
 import time
 import queue
 import logging
+from typing import List, Optional
 
 import usb.core
 import usb.util
@@ -37,18 +39,62 @@ from usb import USBError
 
 from .message import Message
 from .commons import format_list
-from .driver import find_driver
+from .driver import Driver, DriverException, DriverTimeoutException, find_driver
+from .metrics import COUNTER, GAUGE, Sample
+from .trace import Stage, Tracer, stamp, traced
 
 _logger = logging.getLogger("openant.base.ant")
 
 
+# channel configuration recorded to replay after the device is reconnected
+_CHANNEL_CONFIGURATION = {
+    Message.ID.ASSIGN_CHANNEL,
+    Message.ID.SET_CHANNEL_ID,
+    Message.ID.SET_CHANNEL_PERIOD,
+    Message.ID.SET_CHANNEL_SEARCH_TIMEOUT,
+    Message.ID.SET_CHANNEL_RF_FREQ,
+    Message.ID.SET_SEARCH_WAVEFORM,
+    Message.ID.SET_CHANNEL_TX_POWER,
+    Message.ID.ADD_CHANNEL_ID,
+    Message.ID.CONFIG_LIST,
+    Message.ID.LOW_PRIORITY_CHANNEL_SEARCH_TIMEOUT,
+    Message.ID.ENABLE_EXT_RX_MESGS,
+    Message.ID.FREQUENCY_AGILITY,
+    Message.ID.CHANNEL_SEARCH_PRIORITY,
+    Message.ID.CHANNEL_SEARCH_SHARING,
+}
+
+
 class Ant:
     """Provides ANT data interface and manages data from a `Driver` via a worker thread"""
 
     _RESET_WAIT = 1
-
-    def __init__(self):
-        self._driver = find_driver()
+    # seconds between attempts to find the device again when lost
+    _RECOVER_INTERVAL = 1
+    # seconds to wait for each response when replaying configuration
+    _REPLAY_TIMEOUT = 1
+    # consecutive driver errors before device is treated as disconnected
+    _MAX_DRIVER_ERRORS = 3
+
+    def __init__(self, driver: Optional[Driver] = None, worker: bool = True):
+        """
+        :param driver Driver: driver to use, found with `find_driver` if None
+        :param worker bool: start the worker thread and reset the stick; without,
+            nothing reads the driver but calls of `read_message`, to time framing alone
+        """
+        self._driver = driver if driver is not None else find_driver()
+        # a lost device is found again with `find_driver` unless a driver was given
+        self._driver_factory = find_driver if driver is None else None
+        self.auto_recover = True
+        self.recoveries = 0
+        self._driver_errors = 0
+
+        self._config_lock = threading.Lock()
+        self._config_networks = {}
+        self._config_channels = {}
+        self._config_open = set()
+        self._config_scan = None
+        self._reset_pending = True
 
         self._message_queue_cond = threading.Condition()
         self._message_queue = collections.deque()
@@ -56,17 +102,33 @@ class Ant:
         self._events = queue.Queue()
 
         self._buffer = array.array("B", [])
+        # traffic counters, see `collect_metrics`
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.messages_read = collections.Counter()
+        self.messages_written = collections.Counter()
+        self.duplicates = 0
+
+        # latency tracing, set with `Node.enable_tracing`
+        self.tracer: Optional[Tracer] = None
+        self._read_ns = 0
         self._burst_data = array.array("B", [])
         self._last_data = array.array("B", [])
 
         self._running = True
+        self._stopped = threading.Event()
+        self._startup = threading.Event()
 
         self._driver.open()
 
-        self._worker_thread = threading.Thread(target=self._worker, name="openant.base")
-        self._worker_thread.start()
+        self._worker_thread: Optional[threading.Thread] = None
+        if worker:
+            self._worker_thread = threading.Thread(
+                target=self._worker, name="openant.base"
+            )
+            self._worker_thread.start()
 
-        self.reset_system()
+            self.reset_system()
 
     def start(self):
         self._main()
@@ -75,27 +137,27 @@ class Ant:
         if self._running:
             _logger.debug("Stoping openant.base")
             self._running = False
-            self._worker_thread.join()
+            self._stopped.set()
+            # wake up _main
+            self._events.put(None)
+            if self._worker_thread is not None:
+                self._worker_thread.join()
             self._driver.close()
 
     def _on_broadcast(self, message):
+        data = message._data[1:]
+        if message.trace is not None:
+            data = traced(data, message.trace)
         self._events.put(
-            (
-                "event",
-                (message._data[0], Message.Code.EVENT_RX_BROADCAST, message._data[1:]),
-            )
+            ("event", (message._data[0], Message.Code.EVENT_RX_BROADCAST, data))
         )
 
     def _on_acknowledge(self, message):
+        data = message._data[1:]
+        if message.trace is not None:
+            data = traced(data, message.trace)
         self._events.put(
-            (
-                "event",
-                (
-                    message._data[0],
-                    Message.Code.EVENT_RX_ACKNOWLEDGED,
-                    message._data[1:],
-                ),
-            )
+            ("event", (message._data[0], Message.Code.EVENT_RX_ACKNOWLEDGED, data))
         )
 
     def _on_burst_data(self, message):
@@ -112,6 +174,8 @@ class Ant:
 
         # Last sequence (indicated by bit 3)
         if sequence & 0b100 != 0:
+            if message.trace is not None:
+                self._burst_data = traced(self._burst_data, message.trace)
             self._events.put(
                 (
                     "event",
@@ -129,6 +193,8 @@ class Ant:
                 if message is None:
                     break
 
+                self._driver_errors = 0
+
                 # TODO: flag and extended for broadcast, acknowledge, and burst
 
                 # Only do callbacks for new data. Resent data only indicates
@@ -143,6 +209,8 @@ class Ant:
                         Message.ID.SERIAL_ERROR_MESSAGE,
                     ]:
                         _logger.debug("Got response start-up, %r", message)
+                        if message._id == Message.ID.STARTUP_MESSAGE:
+                            self._on_startup()
                         self._events.put(
                             ("response", (None, message._id, message._data))
                         )
@@ -205,6 +273,7 @@ class Ant:
                     else:
                         _logger.warning("Got unknown message, %r", message)
                 else:
+                    self.duplicates += 1
                     _logger.debug("No new data this period")
 
                 # Send messages in queue, on indicated time slot
@@ -232,26 +301,175 @@ class Ant:
             except USBError as e:
                 if not isinstance(e, usb.core.USBTimeoutError):
                     _logger.warning("%s, %r", type(e), e.args)
+                    self._driver_errors += 1
+                    if (
+                        e.errno in (errno.ENODEV, errno.EIO)
+                        or self._driver_errors >= self._MAX_DRIVER_ERRORS
+                    ):
+                        self._recover()
                 else:
                     _logger.debug(f"Timeout waiting for message: {e.args}")
+            except DriverTimeoutException as e:
+                _logger.debug(f"Timeout waiting for message: {e.args}")
+            except DriverException as e:
+                _logger.warning("%s, %r", type(e), e.args)
+                self._recover()
 
         _logger.debug("Ant runner stopped")
 
-    def _main(self):
+    def _on_startup(self):
+        """Device has restarted; if not requested it has lost all configuration"""
+        if self._reset_pending:
+            self._reset_pending = False
+            self._startup.set()
+        elif self.auto_recover:
+            _logger.warning("Unexpected device restart, replaying configuration")
+            self._replay_configuration()
+
+    def _recover(self):
+        """Re-open lost device and restore network keys and channels"""
+        if not self.auto_recover:
+            return
+
+        _logger.warning("Device lost, attempting to recover")
+
+        try:
+            self._driver.close()
+        except Exception as e:
+            _logger.debug(f"Failed to close lost device: {e}")
+
         while self._running:
             try:
-                (event_type, event) = self._events.get(True, 1.0)
-                self._events.task_done()
-                (channel, event, data) = event
-
-                if event_type == "response":
-                    self.response_function(channel, event, data)
-                elif event_type == "event":
-                    self.channel_event_function(channel, event, data)
-                else:
-                    _logger.warning("Unknown message typ '%s': %r", event_type, event)
-            except queue.Empty as _:
-                pass
+                driver = (
+                    self._driver_factory()
+                    if self._driver_factory is not None
+                    else self._driver
+                )
+                driver.open()
+                self._driver = driver
+                break
+            except Exception as e:
+                _logger.debug(f"Device not available yet: {e}")
+                self._stopped.wait(self._RECOVER_INTERVAL)
+        else:
+            return
+
+        self._buffer = array.array("B", [])
+        self._last_data = array.array("B", [])
+        self._driver_errors = 0
+        self._replay_configuration()
+        self.recoveries += 1
+        _logger.warning("Device recovered")
+
+    def _record_configuration(self, message: Message):
+        """Keep the latest configuration messages sent to replay on recovery"""
+        mid = message._id
+        with self._config_lock:
+            if mid == Message.ID.SET_NETWORK_KEY:
+                self._config_networks[message._data[0]] = message
+            elif mid == Message.ID.RESET_SYSTEM:
+                self._config_networks.clear()
+                self._config_channels.clear()
+                self._config_open.clear()
+                self._config_scan = None
+            elif mid == Message.ID.ASSIGN_CHANNEL:
+                self._config_channels[message._data[0]] = {mid: message}
+                self._config_open.discard(message._data[0])
+            elif mid == Message.ID.UNASSIGN_CHANNEL:
+                self._config_channels.pop(message._data[0], None)
+                self._config_open.discard(message._data[0])
+                self._clear_scan(message._data[0])
+            elif mid in _CHANNEL_CONFIGURATION:
+                # one entry for each list index
+                key = (
+                    (mid, message._data[-1])
+                    if mid == Message.ID.ADD_CHANNEL_ID
+                    else mid
+                )
+                self._config_channels.setdefault(message._data[0], {})[key] = message
+            elif mid == Message.ID.OPEN_CHANNEL:
+                self._config_open.add(message._data[0])
+            elif mid == Message.ID.OPEN_RX_SCAN_MODE:
+                self._config_scan = message
+            elif mid == Message.ID.CLOSE_CHANNEL:
+                self._config_open.discard(message._data[0])
+                self._clear_scan(message._data[0])
+
+    def _clear_scan(self, channel: int):
+        """Forget scan mode if enabled on `channel`, other channels don't end it"""
+        if self._config_scan is not None and self._config_scan._data[0] == channel:
+            self._config_scan = None
+
+    def _recorded_configuration(self):
+        """Messages to restore the recorded configuration, channels opened last"""
+        with self._config_lock:
+            messages = list(self._config_networks.values())
+            for config in self._config_channels.values():
+                messages.extend(config.values())
+            messages.extend(
+                Message(Message.ID.OPEN_CHANNEL, [channel])
+                for channel in sorted(self._config_open)
+            )
+            if self._config_scan is not None:
+                messages.append(self._config_scan)
+        return messages
+
+    def _replay_configuration(self):
+        """Reset the device and write recorded configuration, called from worker thread"""
+        messages = self._recorded_configuration()
+        if not messages:
+            return
+
+        self._write_replay(
+            Message(Message.ID.RESET_SYSTEM, [0x00]),
+            lambda m: m._id == Message.ID.STARTUP_MESSAGE,
+        )
+        for message in messages:
+            self._write_replay(
+                message,
+                lambda m, mid=message._id: m._id == Message.ID.RESPONSE_CHANNEL
+                and m._data[1] == mid,
+            )
+
+    def _write_replay(self, message: Message, match):
+        """Write message and read until response matching `match` or timeout"""
+        self._driver.write(message.get())
+        _logger.debug("Replay %r", message)
+
+        deadline = time.monotonic() + self._REPLAY_TIMEOUT
+        while self._running and time.monotonic() < deadline:
+            try:
+                response = self.read_message()
+            except (usb.core.USBTimeoutError, DriverTimeoutException):
+                continue
+            if response is not None and match(response):
+                if response._id == Message.ID.RESPONSE_CHANNEL and response._data[2]:
+                    _logger.warning(
+                        "Replay of %r failed: %s",
+                        message,
+                        Message.Code.lookup(response._data[2]),
+                    )
+                return
+        _logger.warning("No response to replay of %r", message)
+
+    def _main(self):
+        while self._running:
+            item = self._events.get()
+            self._events.task_done()
+            # None is put by stop
+            if item is None:
+                break
+            event_type, event = item
+            channel, event, data = event
+            if self.tracer is not None:
+                stamp(data, Stage.EVENTS_GET)
+
+            if event_type == "response":
+                self.response_function(channel, event, data)
+            elif event_type == "event":
+                self.channel_event_function(channel, event, data)
+            else:
+                _logger.warning("Unknown message typ '%s': %r", event_type, event)
 
     def write_message_timeslot(self, message: Message):
         with self._message_queue_cond:
@@ -259,7 +477,10 @@ class Ant:
 
     def write_message(self, message: Message):
         data = message.get()
+        self._record_configuration(message)
         self._driver.write(data)
+        self.bytes_written += len(data)
+        self.messages_written[message._id] += 1
         _logger.debug("Write data: %s", format_list(data))
 
     def read_message(self):
@@ -268,10 +489,17 @@ class Ant:
             if len(self._buffer) >= 5 and len(self._buffer) >= self._buffer[1] + 4:
                 packet = self._buffer[: self._buffer[1] + 4]
                 self._buffer = self._buffer[self._buffer[1] + 4 :]
-                return Message.parse(packet)
+                message = Message.parse(packet)
+                self.messages_read[message._id] += 1
+                if self.tracer is not None:
+                    message.trace = self.tracer.start(self._read_ns)
+                return message
             # Otherwise, read some data and call the function again
             else:
                 data = self._driver.read()
+                self.bytes_read += len(data)
+                if self.tracer is not None:
+                    self._read_ns = time.monotonic_ns()
                 self._buffer.extend(data)
                 _logger.debug(
                     "Read data: %s (now have %s in buffer)",
@@ -279,6 +507,55 @@ class Ant:
                     format_list(self._buffer),
                 )
 
+    def collect_metrics(self) -> List[Sample]:
+        """Driver traffic, duplicates, recoveries and `_events` depth as metrics `Sample`"""
+        driver = {"driver": type(self._driver).__name__}
+        samples = [
+            Sample(
+                "openant_driver_read_bytes_total",
+                self.bytes_read,
+                driver,
+                help="Bytes read from the driver",
+            ),
+            Sample(
+                "openant_driver_written_bytes_total",
+                self.bytes_written,
+                driver,
+                help="Bytes written to the driver",
+            ),
+            Sample(
+                "openant_duplicates_dropped_total",
+                self.duplicates,
+                help="Broadcasts dropped as a repeat of the previous message",
+            ),
+            Sample(
+                "openant_recoveries_total",
+                self.recoveries,
+                help="Recoveries from the device being lost",
+            ),
+            Sample(
+                "openant_ant_events_queue_depth",
+                self._events.qsize(),
+                kind=GAUGE,
+                help="Messages waiting for Ant dispatch",
+            ),
+        ]
+        for name, counts, direction in (
+            ("openant_messages_read_total", self.messages_read, "read"),
+            ("openant_messages_written_total", self.messages_written, "written"),
+        ):
+            samples.extend(
+                Sample(
+                    name,
+                    count,
+                    {"id": f"0x{mid:02x}"},
+                    COUNTER,
+                    f"Messages {direction} by message ID",
+                )
+                for mid, count in sorted(dict(counts).items())
+            )
+        return samples
+
     def unassign_channel(self, channel):
         message = Message(Message.ID.UNASSIGN_CHANNEL, [channel])
         self.write_message(message)
@@ -331,6 +608,29 @@ class Ant:
         message = Message(Message.ID.SET_CHANNEL_ID, data)
         self.write_message(message)
 
+    def add_channel_id(
+        self, channel, deviceNum, deviceType, transmissionType, listIndex
+    ):
+        data = array.array(
+            "B",
+            struct.pack(
+                "<BHBBB", channel, deviceNum, deviceType, transmissionType, listIndex
+            ),
+        )
+        message = Message(Message.ID.ADD_CHANNEL_ID, data)
+        self.write_message(message)
+
+    def config_list(self, channel, listSize, exclude):
+        """
+        Configure the inclusion/exclusion list of a slave channel
+
+        :param channel int: channel number
+        :param listSize int: number of entries added with `add_channel_id` to use (0 disables)
+        :param exclude bool: list is an exclusion list rather than inclusion list
+        """
+        message = Message(Message.ID.CONFIG_LIST, [channel, listSize, int(exclude)])
+        self.write_message(message)
+
     def set_channel_period(self, channel, messagePeriod):
         data = array.array("B", struct.pack("<BH", channel, messagePeriod))
         message = Message(Message.ID.SET_CHANNEL_PERIOD, data)
@@ -344,6 +644,52 @@ class Ant:
         message = Message(Message.ID.SET_CHANNEL_RF_FREQ, [channel, rfFreq])
         self.write_message(message)
 
+    def set_frequency_agility(self, channel, freq1, freq2, freq3):
+        """
+        Set the three operating frequencies of a frequency agile channel
+
+        The channel must have been assigned with the frequency agility extended
+        assignment. The master moves to the next frequency when it sees
+        interference on the current one, slaves follow.
+
+        :param channel int: channel number
+        :param freq1 int: first frequency, x - 2400 (in MHz)
+        :param freq2 int: second frequency, x - 2400 (in MHz)
+        :param freq3 int: third frequency, x - 2400 (in MHz)
+        """
+        message = Message(Message.ID.FREQUENCY_AGILITY, [channel, freq1, freq2, freq3])
+        self.write_message(message)
+
+    def set_low_priority_channel_search_timeout(self, channel, timeout):
+        message = Message(
+            Message.ID.LOW_PRIORITY_CHANNEL_SEARCH_TIMEOUT, [channel, timeout]
+        )
+        self.write_message(message)
+
+    def set_channel_search_priority(self, channel, priority):
+        """
+        Set the search priority of a channel
+
+        When several channels are searching at the same time, the channel with
+        the highest priority (0-255) will be serviced first.
+
+        :param channel int: channel number
+        :param priority int: search priority 0 (default, lowest) to 255
+        """
+        message = Message(Message.ID.CHANNEL_SEARCH_PRIORITY, [channel, priority])
+        self.write_message(message)
+
+    def set_channel_search_sharing(self, channel, cycles):
+        """
+        Set the number of search cycles a channel gets before yielding to other
+        searching channels
+
+        :param channel int: channel number
+        :param cycles int: search cycles 0 (disabled) to 255
+        """
+        message = Message(Message.ID.CHANNEL_SEARCH_SHARING, [channel, cycles])
+        self.write_message(message)
+
     def enable_extended_messages(self, channel, enable):
         message = Message(Message.ID.ENABLE_EXT_RX_MESGS, [channel, enable])
         self.write_message(message)
@@ -365,8 +711,12 @@ class Ant:
 
     def reset_system(self):
         message = Message(Message.ID.RESET_SYSTEM, [0x00])
+        self._reset_pending = True
+        self._startup.clear()
         self.write_message(message)
-        time.sleep(self._RESET_WAIT)
+        # device sends start-up message when ready, wait at most _RESET_WAIT
+        if not self._startup.wait(self._RESET_WAIT):
+            _logger.debug("No start-up message after reset")
 
     def request_message(self, channel, messageId):
         message = Message(Message.ID.REQUEST_MESSAGE, [channel, messageId])
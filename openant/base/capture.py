@@ -0,0 +1,796 @@
+"""
+Capture raw ANT traffic to file
+
+A capture is a header followed by records, each record a `RECORD` header of
+monotonic nanosecond timestamp, `Kind` and payload length followed by the
+payload: the chunk exactly as returned by `Driver.read` or passed to
+`Driver.write`. Records are only ever appended so a capture can be left
+running and a file can hold multiple sessions, each started with an OPEN
+record.
+
+A capture can be fed back through the whole stack with `ReplayDriver`, at the
+recorded rate, faster or as fast as possible:
+
+.. code-block:: python
+
+    node = Node(RecordingDriver(find_driver(), "session.antcap"))
+    # later, without a stick
+    node = Node(ReplayDriver("session.antcap", speed=None))
+
+While recording, a sidecar index ("session.antcap.idx") of `Block` records
+is appended: the span of the capture each covers, its time range and the
+channel IDs data was received from. `CaptureReader` memory-maps a capture and
+uses the index to read only the blocks of one device or time range:
+
+.. code-block:: python
+
+    with CaptureReader("session.antcap") as capture:
+        for timestamp, message in capture.messages(device_number=12345):
+            print(timestamp, message)
+"""
+
+# Ant
+#
+# Copyright (c) 2012, Gustav Tiger <gustav@tiger.name>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import array
+import logging
+import mmap
+import operator
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import reduce
+from typing import Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .driver import Driver, DriverException, DriverTimeoutException
+from .message import Message
+
+_logger = logging.getLogger("openant.base.capture")
+
+MAGIC = b"ANTCAP\x00\x01"
+# timestamp ns, kind, payload length
+RECORD = struct.Struct("<QBH")
+
+INDEX_MAGIC = b"ANTIDX\x00\x01"
+# capture offset and end, first and last timestamp ns, assigned and received entries
+BLOCK = struct.Struct("<QQQQHH")
+# channel, device number, device type, transmission type
+ENTRY = struct.Struct("<BHBB")
+
+# device number, device type, transmission type
+ChannelID = Tuple[int, int, int]
+
+
+class Kind(IntEnum):
+    READ = 0
+    WRITE = 1
+    OPEN = 2
+
+
+class CaptureException(DriverException):
+    pass
+
+
+def _check_header(f, path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise CaptureException(f"{path} is not a capture file")
+
+
+def read_capture(path: str) -> Iterator[Tuple[int, Kind, bytes]]:
+    """
+    Iterate (timestamp_ns, kind, payload) of records in capture at `path`
+
+    A record truncated by a crash while recording ends the iteration.
+    """
+    with open(path, "rb") as f:
+        _check_header(f, path)
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            timestamp, kind, length = RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                _logger.warning(f"Truncated record at end of {path}")
+                break
+            yield timestamp, Kind(kind), payload
+
+
+def index_path(path: str) -> str:
+    """Path of the sidecar index of capture `path`"""
+    return path + ".idx"
+
+
+_DATA_IDS = frozenset(
+    (
+        Message.ID.BROADCAST_DATA,
+        Message.ID.ACKNOWLEDGED_DATA,
+        Message.ID.BURST_TRANSFER_DATA,
+    )
+)
+_LEGACY_DATA_IDS = frozenset(
+    (
+        Message.ID.LEGACY_EXTENDED_BROADCAST_DATA,
+        Message.ID.LEGACY_EXTENDED_ACKNOWLEDGED_DATA,
+        Message.ID.LEGACY_EXTENDED_BURST_DATA,
+    )
+)
+
+
+def _frame(buffer: bytearray) -> List[Tuple[int, bytes]]:
+    """
+    Take complete messages as (id, data) off the front of `buffer`
+
+    Bytes out of sync are skipped, checking the checksum of the message
+    synced to.
+
+    >>> buffer = bytearray(b"\\x00" + Message(0x4E, [1] * 9).get().tobytes() + b"\\xa4")
+    >>> [(hex(i), len(d)) for i, d in _frame(buffer)], buffer
+    ([('0x4e', 9)], bytearray(b'\\xa4'))
+    """
+    messages = []
+    start = 0
+    size = len(buffer)
+    resynced = False
+    while start < size:
+        if buffer[start] != 0xA4:
+            sync = buffer.find(0xA4, start)
+            start = size if sync < 0 else sync
+            resynced = True
+            continue
+        if size - start < 4:
+            break
+        end = start + buffer[start + 1] + 4
+        if end > size:
+            break
+        if resynced:
+            if reduce(operator.xor, buffer[start : end - 1]) != buffer[end - 1]:
+                start += 1
+                continue
+            resynced = False
+        messages.append((buffer[start + 2], bytes(buffer[start + 3 : end - 1])))
+        start = end
+    del buffer[:start]
+    return messages
+
+
+def _frame_read(buffer: bytearray, payload: bytes) -> List[Tuple[int, bytes]]:
+    """Messages completed by read `payload`, `buffer` holding any partial message"""
+    # usually a read is exactly one message
+    if not buffer and len(payload) >= 4 and payload[1] + 4 == len(payload):
+        if payload[0] == 0xA4:
+            return [(payload[2], payload[3:-1])]
+    buffer.extend(payload)
+    return _frame(buffer)
+
+
+def _data_channel(
+    message_id: int, data: bytes
+) -> Optional[Tuple[int, Optional[ChannelID]]]:
+    """(channel, channel ID if in the message) of a data message, None if not data"""
+    if message_id in _DATA_IDS and data:
+        # burst sequence number in upper bits
+        channel = data[0] & 0x1F
+        if len(data) >= 14 and data[9] & 0x80:
+            return channel, (data[10] | data[11] << 8, data[12], data[13])
+        return channel, None
+    if message_id in _LEGACY_DATA_IDS and len(data) >= 5:
+        return data[0] & 0x1F, (data[1] | data[2] << 8, data[3], data[4])
+    return None
+
+
+def _assign(channels: Dict[int, ChannelID], kind: int, message_id: int, data: bytes):
+    """Track channel IDs set on or reported by the stick in `channels`"""
+    if kind == Kind.WRITE:
+        if message_id == Message.ID.SET_CHANNEL_ID and len(data) >= 5:
+            channels[data[0]] = (data[1] | data[2] << 8, data[3], data[4])
+        elif message_id == Message.ID.UNASSIGN_CHANNEL and data:
+            channels.pop(data[0], None)
+    elif message_id == Message.ID.RESPONSE_CHANNEL_ID and len(data) >= 5:
+        channels[data[0]] = (data[1] | data[2] << 8, data[3], data[4])
+
+
+def _matches(channel_id: ChannelID, query: Tuple[Optional[int], ...]) -> bool:
+    return all(q is None or q == v for q, v in zip(query, channel_id))
+
+
+@dataclass(frozen=True)
+class Block:
+    """
+    Index record of a span of capture records
+
+    `assigned` are the channel IDs assigned when the block starts, needed to
+    tell which device data without an extended channel ID is from, and
+    `received` the (channel, channel ID) data was received from in the block.
+    """
+
+    offset: int
+    end: int
+    first: int
+    last: int
+    assigned: Tuple[Tuple[int, ChannelID], ...]
+    received: FrozenSet[Tuple[int, ChannelID]]
+
+    def pack(self) -> bytes:
+        entries = list(self.assigned) + sorted(self.received)
+        return BLOCK.pack(
+            self.offset,
+            self.end,
+            self.first,
+            self.last,
+            len(self.assigned),
+            len(self.received),
+        ) + b"".join(
+            ENTRY.pack(channel, *channel_id) for channel, channel_id in entries
+        )
+
+    def matches(
+        self,
+        query: Tuple[Optional[int], ...] = (None, None, None),
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> bool:
+        """Has data of channel ID `query`, None matching any, between `start` and `end` ns"""
+        if start is not None and self.last < start:
+            return False
+        if end is not None and self.first > end:
+            return False
+        if query == (None, None, None):
+            return True
+        return any(_matches(channel_id, query) for _, channel_id in self.received)
+
+
+class IndexBuilder:
+    """
+    Builds `Block` records from capture records as they are added
+
+    A block is closed every `BLOCK_NS` or `BLOCK_BYTES`, once no message is
+    split across records, and at every OPEN so each block is of one session.
+    Closed blocks are passed to `on_block`.
+    """
+
+    BLOCK_NS = 1_000_000_000
+    BLOCK_BYTES = 256 * 1024
+
+    def __init__(self, on_block: Callable[[Block], None]):
+        self.on_block = on_block
+        self._buffer = bytearray()
+        self._channels: Dict[int, ChannelID] = {}
+        self._offset: Optional[int] = None
+        self._end = 0
+        self._first = 0
+        self._last = 0
+        self._assigned: Tuple[Tuple[int, ChannelID], ...] = ()
+        self._received = set()
+
+    def add(self, offset: int, timestamp: int, kind: int, payload: bytes):
+        """Add record at `offset` in the capture"""
+        if self._offset is not None:
+            # don't split a message across blocks unless way overdue
+            overdue = 1 if not self._buffer else 2
+            if (
+                kind == Kind.OPEN
+                or timestamp - self._first >= overdue * self.BLOCK_NS
+                or offset - self._offset >= overdue * self.BLOCK_BYTES
+            ):
+                self.close()
+        if self._offset is None:
+            self._offset = offset
+            self._first = timestamp
+            self._assigned = tuple(sorted(self._channels.items()))
+        self._end = offset + RECORD.size + len(payload)
+        self._last = timestamp
+
+        if kind == Kind.OPEN:
+            self._buffer.clear()
+            self._channels.clear()
+        elif kind == Kind.WRITE:
+            for message_id, data in _frame(bytearray(payload)):
+                _assign(self._channels, kind, message_id, data)
+        elif kind == Kind.READ:
+            for message_id, data in _frame_read(self._buffer, payload):
+                channel = _data_channel(message_id, data)
+                if channel is None:
+                    _assign(self._channels, kind, message_id, data)
+                    continue
+                channel, channel_id = channel
+                channel_id = channel_id or self._channels.get(channel)
+                if channel_id is not None:
+                    self._received.add((channel, channel_id))
+
+    def close(self):
+        """Close the current block, if any"""
+        if self._offset is None:
+            return
+        block = Block(
+            self._offset,
+            self._end,
+            self._first,
+            self._last,
+            self._assigned,
+            frozenset(self._received),
+        )
+        self._offset = None
+        self._received = set()
+        self.on_block(block)
+
+
+def load_index(path: str) -> Optional[List[Block]]:
+    """Blocks in the sidecar index of capture `path`, None if it has none"""
+    try:
+        with open(index_path(path), "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if not data.startswith(INDEX_MAGIC):
+        raise CaptureException(f"{index_path(path)} is not a capture index")
+
+    blocks = []
+    offset = len(INDEX_MAGIC)
+    while offset + BLOCK.size <= len(data):
+        header = BLOCK.unpack_from(data, offset)
+        entries_end = offset + BLOCK.size + (header[4] + header[5]) * ENTRY.size
+        # truncated by a crash while recording
+        if entries_end > len(data):
+            break
+        entries = [
+            (channel, (number, device_type, trans_type))
+            for channel, number, device_type, trans_type in ENTRY.iter_unpack(
+                data[offset + BLOCK.size : entries_end]
+            )
+        ]
+        blocks.append(
+            Block(
+                *header[:4],
+                tuple(entries[: header[4]]),
+                frozenset(entries[header[4] :]),
+            )
+        )
+        offset = entries_end
+    return blocks
+
+
+def _covered(blocks: List[Block]) -> int:
+    """Capture offset up to which `blocks` index"""
+    return blocks[-1].end if blocks else len(MAGIC)
+
+
+def build_index(path: str) -> List[Block]:
+    """
+    (Re)build the sidecar index of capture `path`
+
+    For captures recorded without an index, or whose index is incomplete
+    after a crash while recording.
+    """
+    blocks = []
+    builder = IndexBuilder(blocks.append)
+    with CaptureReader(path, index=False) as capture:
+        for offset, timestamp, kind, payload in capture._records(len(MAGIC)):
+            builder.add(offset, timestamp, kind, payload)
+    builder.close()
+
+    temporary = index_path(path) + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(INDEX_MAGIC)
+        for block in blocks:
+            f.write(block.pack())
+    os.replace(temporary, index_path(path))
+    return blocks
+
+
+class CaptureReader:
+    """
+    Memory-maps capture `path` for reading only the blocks needed
+
+    The sidecar index is built if missing. Records appended since the index
+    was last written, while still recording, are indexed in memory.
+    """
+
+    def __init__(self, path: str, index: bool = True):
+        self.path = path
+        with open(path, "rb") as f:
+            _check_header(f, path)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.blocks: List[Block] = []
+        if index:
+            self._load_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._mmap.close()
+
+    def _load_index(self):
+        blocks = load_index(self.path)
+        if blocks is None or _covered(blocks) > len(self._mmap):
+            blocks = build_index(self.path)
+        covered = _covered(blocks)
+        if covered < len(self._mmap):
+            _logger.debug(f"Indexing {self.path} from {covered} in memory")
+            builder = IndexBuilder(blocks.append)
+            for record in self._records(covered):
+                builder.add(*record)
+            builder.close()
+        self.blocks = blocks
+
+    def _records(
+        self, offset: int, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int, bytes]]:
+        """(offset, timestamp_ns, kind, payload) of records from `offset` to `end`"""
+        view = self._mmap
+        end = len(view) if end is None else end
+        while offset + RECORD.size <= end:
+            timestamp, kind, length = RECORD.unpack_from(view, offset)
+            start = offset + RECORD.size
+            if start + length > end:
+                _logger.warning(f"Truncated record at {offset} of {self.path}")
+                break
+            yield offset, timestamp, kind, view[start : start + length]
+            offset = start + length
+
+    def devices(self) -> List[ChannelID]:
+        """Channel IDs data was received from"""
+        return sorted(
+            {channel_id for block in self.blocks for _, channel_id in block.received}
+        )
+
+    def find(
+        self,
+        device_number: Optional[int] = None,
+        device_type: Optional[int] = None,
+        transmission_type: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[Block]:
+        """Blocks with data from the channel ID, None matching any, between `start` and `end` ns"""
+        query = (device_number, device_type, transmission_type)
+        return [block for block in self.blocks if block.matches(query, start, end)]
+
+    def records(
+        self, start: Optional[int] = None, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, Kind, bytes]]:
+        """(timestamp_ns, kind, payload) of records between `start` and `end` ns"""
+        for block in self.find(start=start, end=end):
+            for _, timestamp, kind, payload in self._records(block.offset, block.end):
+                if (start is None or timestamp >= start) and (
+                    end is None or timestamp <= end
+                ):
+                    yield timestamp, Kind(kind), payload
+
+    def messages(
+        self,
+        device_number: Optional[int] = None,
+        device_type: Optional[int] = None,
+        transmission_type: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Iterator[Tuple[int, Message]]:
+        """
+        (timestamp_ns, message) of data received from the channel ID, None
+        matching any, between `start` and `end` ns
+        """
+        query = (device_number, device_type, transmission_type)
+        buffer = bytearray()
+        channels: Dict[int, ChannelID] = {}
+        previous = None
+        for block in self.find(*query, start=start, end=end):
+            # carry a message split across contiguous blocks
+            if previous is None or previous.end != block.offset:
+                buffer.clear()
+            channels = dict(block.assigned)
+            previous = block
+
+            for _, timestamp, kind, payload in self._records(block.offset, block.end):
+                if kind == Kind.OPEN:
+                    buffer.clear()
+                    channels.clear()
+                    continue
+                if kind == Kind.WRITE:
+                    for message_id, data in _frame(bytearray(payload)):
+                        _assign(channels, kind, message_id, data)
+                    continue
+                for message_id, data in _frame_read(buffer, payload):
+                    channel = _data_channel(message_id, data)
+                    if channel is None:
+                        _assign(channels, kind, message_id, data)
+                        continue
+                    channel, channel_id = channel
+                    channel_id = channel_id or channels.get(channel)
+                    if (
+                        channel_id is not None
+                        and _matches(channel_id, query)
+                        and (start is None or timestamp >= start)
+                        and (end is None or timestamp <= end)
+                    ):
+                        yield timestamp, Message(message_id, array.array("B", data))
+
+
+class RecordingDriver(Driver):
+    """
+    Wraps `driver`, appending everything read and written to capture `path`
+
+    With `index` the sidecar index is appended to as blocks are recorded,
+    after being rebuilt if it doesn't cover the capture being appended to.
+    Records are indexed by a thread of their own, keeping framing off the
+    thread reading the driver.
+    """
+
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, driver: Driver, path: str, index: bool = True):
+        self.driver = driver
+        self.path = path
+        self.index = index
+        self._file = None
+        self._index_file = None
+        self._builder: Optional[IndexBuilder] = None
+        # records to index, None to stop or an Event set once indexed up to it
+        self._unindexed: Optional[queue.SimpleQueue] = None
+        self._indexer: Optional[threading.Thread] = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"RecordingDriver({self.driver}, {self.path})"
+
+    def open(self):
+        with self._lock:
+            if self._file is None:
+                f = open(self.path, "ab+", buffering=self.BUFFER_SIZE)
+                try:
+                    new = f.tell() == 0
+                    if new:
+                        f.write(MAGIC)
+                    else:
+                        f.seek(0)
+                        _check_header(f, self.path)
+                        f.seek(0, os.SEEK_END)
+                    self._offset = f.tell()
+                    if self.index:
+                        self._open_index(new)
+                except Exception:
+                    f.close()
+                    raise
+                self._file = f
+
+        self.driver.open()
+        self._record(Kind.OPEN, b"")
+
+    def _open_index(self, new: bool):
+        if new:
+            with open(index_path(self.path), "wb") as f:
+                f.write(INDEX_MAGIC)
+        else:
+            blocks = load_index(self.path)
+            if blocks is None or _covered(blocks) != self._offset:
+                _logger.info(f"Rebuilding index of {self.path}")
+                build_index(self.path)
+        self._index_file = open(index_path(self.path), "ab")
+        self._builder = IndexBuilder(lambda block: self._index_file.write(block.pack()))
+        self._unindexed = queue.SimpleQueue()
+        self._indexer = threading.Thread(
+            target=self._index, name="openant.capture", daemon=True
+        )
+        self._indexer.start()
+
+    def _index(self):
+        while True:
+            item = self._unindexed.get()
+            if item is None:
+                self._builder.close()
+                return
+            if isinstance(item, threading.Event):
+                self._index_file.flush()
+                item.set()
+                continue
+            self._builder.add(*item)
+
+    def close(self):
+        try:
+            self.driver.close()
+        finally:
+            with self._lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                if self._indexer is not None:
+                    self._unindexed.put(None)
+                    self._indexer.join()
+                    self._index_file.close()
+                    self._index_file = None
+                    self._builder = None
+                    self._unindexed = None
+                    self._indexer = None
+
+    def read(self):
+        data = self.driver.read()
+        if data:
+            self._record(Kind.READ, data)
+        return data
+
+    def write(self, data):
+        ret = self.driver.write(data)
+        self._record(Kind.WRITE, data)
+        return ret
+
+    def flush(self):
+        """Write buffered records to the file, and the index of them"""
+        indexed = threading.Event()
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            if self._indexer is None:
+                return
+            self._unindexed.put(indexed)
+        indexed.wait()
+
+    def _record(self, kind: Kind, data):
+        timestamp = time.monotonic_ns()
+        header = RECORD.pack(timestamp, kind, len(data))
+        with self._lock:
+            # closed during shutdown whilst reader still running
+            if self._file is not None:
+                self._file.write(header)
+                self._file.write(data)
+                if self._unindexed is not None:
+                    self._unindexed.put((self._offset, timestamp, kind, bytes(data)))
+                self._offset += RECORD.size + len(data)
+
+
+class ReplayDriver(Driver):
+    """
+    Plays back data read in capture `path` as if read from a device
+
+    Capture time is kept by a virtual clock, `now`, which advances at `speed`
+    times real time; with `speed` None data is returned as fast as it is
+    read. Gaps between recorded sessions are skipped. With `sync_writes`, data
+    recorded after a write is held until the same number of writes have been
+    made so responses follow the requests that caused them. Once all data
+    has been returned `finished` is set and reads time out.
+    """
+
+    # most seconds a read waits before timing out, so stopping isn't held up
+    READ_TIMEOUT = 0.1
+    # seconds to hold data for the write it followed before replaying anyway
+    SYNC_TIMEOUT = 1.0
+
+    def __init__(
+        self, path: str, speed: Optional[float] = 1.0, sync_writes: bool = True
+    ):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive or None")
+        self.path = path
+        self.speed = speed
+        self.sync_writes = sync_writes
+        self.finished = threading.Event()
+        self._closed = threading.Event()
+        self._records = iter(())
+        self._writes_cond = threading.Condition()
+        self._writes = 0
+        self._expected_writes = 0
+        # next (timestamp, payload) to return and real time ns since waiting
+        self._pending = None
+        self._sync_since = None
+        # (capture time ns, real time ns) that the clock runs from
+        self._origin = None
+        self._now = 0
+
+    def __str__(self):
+        return f"ReplayDriver({self.path}, speed={self.speed})"
+
+    @property
+    def now(self) -> int:
+        """Capture timestamp (ns) of the data last returned"""
+        return self._now
+
+    def open(self):
+        self._records = read_capture(self.path)
+        self._writes = 0
+        self._expected_writes = 0
+        self._pending = None
+        self._sync_since = None
+        self._origin = None
+        self.finished.clear()
+        self._closed.clear()
+
+    def close(self):
+        self._closed.set()
+        with self._writes_cond:
+            self._writes_cond.notify_all()
+
+    def read(self):
+        if self._pending is None:
+            self._pending = self._next_read()
+            if self._pending is None:
+                self.finished.set()
+                self._closed.wait(self.READ_TIMEOUT)
+                raise DriverTimeoutException("End of capture")
+
+        timestamp, payload = self._pending
+        if self.sync_writes and not self._wait_for_writes():
+            raise DriverTimeoutException("Waiting for write")
+        if not self._wait_until(timestamp):
+            raise DriverTimeoutException("Waiting for capture time")
+
+        self._pending = None
+        self._now = timestamp
+        return payload
+
+    def write(self, data):
+        with self._writes_cond:
+            self._writes += 1
+            self._writes_cond.notify_all()
+
+    def _next_read(self):
+        for timestamp, kind, payload in self._records:
+            if kind == Kind.OPEN:
+                self._origin = None
+            elif kind == Kind.WRITE:
+                self._expected_writes += 1
+            elif kind == Kind.READ:
+                return timestamp, payload
+        return None
+
+    def _wait_for_writes(self) -> bool:
+        """True once writes made up to pending data, or given up waiting"""
+        with self._writes_cond:
+            if self._writes >= self._expected_writes:
+                self._sync_since = None
+                return True
+            if self._sync_since is None:
+                self._sync_since = time.monotonic()
+            self._writes_cond.wait(self.READ_TIMEOUT)
+            if self._writes < self._expected_writes:
+                if time.monotonic() - self._sync_since < self.SYNC_TIMEOUT:
+                    return False
+                _logger.debug(
+                    f"Replaying without write {self._expected_writes}, only {self._writes} made"
+                )
+        self._sync_since = None
+        # don't rush to catch up time spent waiting on the application
+        self._origin = None
+        return True
+
+    def _wait_until(self, timestamp: int) -> bool:
+        """True once virtual clock has reached `timestamp`"""
+        if self.speed is None:
+            return True
+        if self._origin is None:
+            self._origin = (timestamp, time.monotonic_ns())
+            return True
+        capture_origin, real_origin = self._origin
+        due = real_origin + (timestamp - capture_origin) / self.speed
+        delay = (due - time.monotonic_ns()) / 1e9
+        if delay > self.READ_TIMEOUT:
+            self._closed.wait(self.READ_TIMEOUT)
+            return False
+        if delay > 0:
+            self._closed.wait(delay)
+        return True
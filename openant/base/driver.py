@@ -142,6 +142,11 @@ class Driver:
     def find(cls):
         pass
 
+    @classmethod
+    def find_all(cls):
+        """Return a driver instance for each device found, override for drivers supporting multiple devices"""
+        return [cls()] if cls.find() else []
+
     def open(self):
         pass
 
@@ -169,6 +174,8 @@ try:
 
         ID_VENDOR = 0x0FCF
         ID_PRODUCT = 0x1004
+        # seconds a read waits for data
+        READ_TIMEOUT = 0.1
 
         @classmethod
         def find(cls):
@@ -222,10 +229,14 @@ try:
             _logger.debug("dsrdtr:          ", self._serial.dsrdtr)
             _logger.debug("interCharTimeout:", self._serial.interCharTimeout)
 
-            self._serial.timeout = 0
+            self._serial.timeout = self.READ_TIMEOUT
 
         def read(self):
-            data = self._serial.read(4096)
+            try:
+                # block for first byte, then take whatever else is waiting
+                data = self._serial.read(self._serial.in_waiting or 1)
+            except serial.SerialException as e:
+                raise DriverException(e) from e
             # print "serial read", len(data), type(data), data
             return array.array("B", data)
 
@@ -258,11 +269,17 @@ try:
         # default USB2
         ID_VENDOR = 0x0FCF
         ID_PRODUCT = 0x1008
+        # milliseconds a read waits for data, bounds how long stopping takes
+        READ_TIMEOUT = 100
 
-        def __init__(self):
+        def __init__(self, dev: Optional[Device] = None):
             self.dev: Optional[Generator[Device, None, None]] = None
             self._in = None
             self._out = None
+            # bus and port path of a specific device, stays the same if re-plugged in same port
+            self._port = (
+                (dev.bus, tuple(dev.port_numbers or ())) if dev is not None else None
+            )
 
         @classmethod
         def find(cls):
@@ -271,6 +288,18 @@ try:
                 is not None
             )
 
+        @classmethod
+        def find_all(cls):
+            return [
+                cls(dev)
+                for dev in usb.core.find(
+                    find_all=True, idVendor=cls.ID_VENDOR, idProduct=cls.ID_PRODUCT
+                )
+            ]
+
+        def _match_port(self, dev):
+            return (dev.bus, tuple(dev.port_numbers or ())) == self._port
+
         def open(self):
             # Find USB device
             _logger.debug(
@@ -278,7 +307,17 @@ try:
                 self.ID_VENDOR,
                 self.ID_PRODUCT,
             )
-            self.dev = usb.core.find(idVendor=self.ID_VENDOR, idProduct=self.ID_PRODUCT)
+            if self._port is None:
+                self.dev = usb.core.find(
+                    idVendor=self.ID_VENDOR, idProduct=self.ID_PRODUCT
+                )
+            else:
+                _logger.debug("USB device on bus %s, port %s", *self._port)
+                self.dev = usb.core.find(
+                    idVendor=self.ID_VENDOR,
+                    idProduct=self.ID_PRODUCT,
+                    custom_match=self._match_port,
+                )
 
             # was it found?
             if self.dev is None:
@@ -361,7 +400,7 @@ try:
             pass
 
         def read(self):
-            return self._in.read(4096)
+            return self._in.read(4096, timeout=self.READ_TIMEOUT)
 
         def write(self, data):
             self._out.write(data)
@@ -398,3 +437,18 @@ def find_driver():
             _logger.info(f"Using driver: {driver}")
             return driver()
     raise DriverNotFound
+
+
+def find_drivers():
+    """
+    Find a driver for every available ANT device
+
+    :raises DriverNotFound: unable to find any compatiable drivers
+    """
+    found = []
+    for driver in reversed(drivers):
+        found.extend(driver.find_all())
+    if not found:
+        raise DriverNotFound
+    _logger.info(f"Using drivers: {found}")
+    return found
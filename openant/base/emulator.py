@@ -0,0 +1,595 @@
+"""
+Software ANT stick for running the stack without hardware
+
+`EmulatorDriver` answers the serial messages `Ant` writes as a stick would:
+configuration responses, capabilities, serial number and version, channel
+events, and radio traffic from `SimulatedDevice` masters in range. Receive
+channels search for and track a matching device, background scanning
+channels and RX scan mode receive from every matching device, and transmit
+channels report EVENT_TX each period; a channel assigned with frequency
+agility receives on any of its agility frequencies. Acknowledged and burst
+transfers complete in the following timeslot.
+
+.. code-block:: python
+
+    hrm = SimulatedDevice(12345, 120, pages=lambda n: [4, 0, 0, 0, 0, 0, n, 70])
+    node = Node(EmulatorDriver([hrm], speed=10))
+"""
+# Ant
+#
+# Copyright (c) 2012, Gustav Tiger <gustav@tiger.name>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import array
+import collections
+import heapq
+import itertools
+import logging
+import queue
+import struct
+import threading
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from .driver import Driver, DriverTimeoutException
+from .message import Message
+
+_logger = logging.getLogger("openant.base.emulator")
+
+# channel type bits, see `Channel.Type`
+_TRANSMIT = 0x10
+_BACKGROUND_SCANNING = 0x01
+_FREQUENCY_AGILITY = 0x04
+# RX fails before a tracking channel goes back to search
+_RX_FAILS_TO_SEARCH = 8
+# flag byte of extended data with channel ID
+_EXT_FLAG_CHANNEL_ID = 0x80
+# configuration messages with the channel number first
+_CHANNEL_MESSAGES = {
+    Message.ID.ASSIGN_CHANNEL,
+    Message.ID.UNASSIGN_CHANNEL,
+    Message.ID.OPEN_CHANNEL,
+    Message.ID.CLOSE_CHANNEL,
+    Message.ID.SET_CHANNEL_ID,
+    Message.ID.SET_CHANNEL_PERIOD,
+    Message.ID.SET_CHANNEL_RF_FREQ,
+    Message.ID.SET_CHANNEL_SEARCH_TIMEOUT,
+    Message.ID.LOW_PRIORITY_CHANNEL_SEARCH_TIMEOUT,
+    Message.ID.SET_SEARCH_WAVEFORM,
+    Message.ID.ADD_CHANNEL_ID,
+    Message.ID.CONFIG_LIST,
+    Message.ID.SET_CHANNEL_TX_POWER,
+    Message.ID.FREQUENCY_AGILITY,
+    Message.ID.PROXIMITY_SEARCH,
+    Message.ID.CHANNEL_SEARCH_PRIORITY,
+    Message.ID.CHANNEL_SEARCH_SHARING,
+}
+
+
+class ChannelState:
+    UNASSIGNED = 0
+    ASSIGNED = 1
+    SEARCHING = 2
+    TRACKING = 3
+
+
+class SimulatedDevice:
+    """
+    ANT master transmitting in range of the `EmulatorDriver`
+
+    `pages` is called with the number of messages sent so far and returns the
+    8 byte page to broadcast. Data sent to the device is appended to
+    `received` as (message type, data); clear `in_range` to have tracking
+    channels lose it.
+    """
+
+    def __init__(
+        self,
+        device_number: int,
+        device_type: int,
+        trans_type: int = 1,
+        period: int = 8070,
+        rf_freq: int = 57,
+        pages: Optional[Callable[[int], Sequence[int]]] = None,
+    ):
+        self.device_number = device_number
+        self.device_type = device_type
+        self.trans_type = trans_type
+        self.period = period
+        self.rf_freq = rf_freq
+        self.pages = pages if pages is not None else lambda _: [0] * 8
+        self.in_range = True
+        self.count = 0
+        self.received: List[Tuple[str, List[int]]] = []
+        self._acknowledged = collections.deque()
+
+    def __repr__(self):
+        return f"SimulatedDevice({self.device_number}, {self.device_type}, {self.trans_type})"
+
+    @property
+    def channel_id(self) -> Tuple[int, int, int]:
+        return (self.device_number, self.device_type, self.trans_type)
+
+    def send_acknowledged(self, page: Sequence[int]):
+        """Send `page` as acknowledged data in place of the next broadcast"""
+        self._acknowledged.append(page)
+
+    def next_message(self) -> Tuple[int, Sequence[int]]:
+        """Message ID and page of the next transmission"""
+        self.count += 1
+        if self._acknowledged:
+            return Message.ID.ACKNOWLEDGED_DATA, self._acknowledged.popleft()
+        return Message.ID.BROADCAST_DATA, self.pages(self.count - 1)
+
+
+class _Channel:
+    def __init__(self, number: int):
+        self.number = number
+        self.state = ChannelState.UNASSIGNED
+        self.type = 0
+        self.network = 0
+        self.ext_assign = 0
+        self.channel_id = (0, 0, 0)
+        self.period = 8192
+        self.rf_freq = 66
+        self.agility_frequencies: Tuple[int, ...] = ()
+        self.search_timeout = 12
+        self.low_priority_search_timeout = 2
+        self.id_list: List[Tuple[int, int, int]] = []
+        self.id_list_size = 0
+        self.id_list_exclude = False
+        self.device: Optional[SimulatedDevice] = None
+        self.search_started = 0.0
+        self.rx_fails = 0
+        self.acknowledged = None
+        self.burst: List[int] = []
+        self.burst_complete = False
+        # incremented to drop timeslots scheduled before a reconfiguration
+        self.generation = 0
+
+    @property
+    def transmit(self) -> bool:
+        return bool(self.type & _TRANSMIT)
+
+    @property
+    def is_open(self) -> bool:
+        return self.state in (ChannelState.SEARCHING, ChannelState.TRACKING)
+
+    @property
+    def frequencies(self) -> Tuple[int, ...]:
+        """RF frequencies the channel receives on, an agile channel hopping between its three"""
+        if self.ext_assign & _FREQUENCY_AGILITY and self.agility_frequencies:
+            return self.agility_frequencies
+        return (self.rf_freq,)
+
+    def matches(self, device: SimulatedDevice) -> bool:
+        if not device.in_range or device.rf_freq not in self.frequencies:
+            return False
+        if not _id_matches(self.channel_id, device.channel_id):
+            return False
+        if self.id_list_size:
+            listed = any(
+                _id_matches(i, device.channel_id)
+                for i in self.id_list[: self.id_list_size]
+            )
+            return listed != self.id_list_exclude
+        return True
+
+
+def _id_matches(mask: Tuple[int, int, int], channel_id: Tuple[int, int, int]):
+    return all(m == 0 or m == i for m, i in zip(mask, channel_id))
+
+
+class EmulatorDriver(Driver):
+    """
+    Emulates an ANT stick with `devices` in range
+
+    Time runs `speed` times faster than real time for everything radio;
+    configuration is answered straight away. With `buffer_size`, received
+    data beyond that many messages waiting to be read is dropped and counted
+    in `dropped`, as a stick overflows when the host doesn't keep up.
+    """
+
+    # seconds a read waits for data before timing out
+    READ_TIMEOUT = 0.1
+    # most messages returned by one read
+    READ_BATCH = 64
+
+    def __init__(
+        self,
+        devices: Iterable[SimulatedDevice] = (),
+        max_channels: int = 8,
+        max_networks: int = 8,
+        serial: int = 0x12345678,
+        version: bytes = b"EMU1.00B00\x00",
+        speed: float = 1.0,
+        buffer_size: Optional[int] = None,
+    ):
+        self.devices: List[SimulatedDevice] = list(devices)
+        self.max_channels = max_channels
+        self.max_networks = max_networks
+        self.serial = serial
+        self.version = version
+        self.speed = speed
+        self.buffer_size = buffer_size
+        self.dropped = 0
+        self.capabilities = [max_channels, max_networks, 0x00, 0xBA, 0x36, 0, 0x00]
+
+        self._cond = threading.Condition()
+        self._output = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._reset_state()
+
+    def __str__(self):
+        return f"EmulatorDriver({len(self.devices)} devices)"
+
+    def _reset_state(self):
+        self.channels = [_Channel(i) for i in range(self.max_channels)]
+        self.extended = False
+        self.scan_mode = False
+        self._schedule = []
+        self._sequence = itertools.count()
+
+    def open(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._reset_state()
+        self._thread = threading.Thread(
+            target=self._radio, name="openant.emulator", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def read(self):
+        try:
+            data = self._output.get(timeout=self.READ_TIMEOUT)
+        except queue.Empty:
+            raise DriverTimeoutException("No data from emulator")
+        for _ in range(self.READ_BATCH - 1):
+            try:
+                data.extend(self._output.get_nowait())
+            except queue.Empty:
+                break
+        return data
+
+    def write(self, data):
+        message = Message.parse(array.array("B", data))
+        with self._cond:
+            self._handle(message._id, list(message._data))
+            self._cond.notify_all()
+
+    def add_device(self, device: SimulatedDevice):
+        """Bring `device` in range"""
+        with self._cond:
+            self.devices.append(device)
+            for channel in self.channels:
+                if channel.is_open and self._scanning(channel):
+                    self._schedule_device(channel, device, 0)
+            self._cond.notify_all()
+
+    # Host to stick messages
+
+    def _send(self, message_id: int, data: Sequence[int]):
+        self._output.put(Message(message_id, array.array("B", data)).get())
+
+    def _respond(self, channel: int, message_id: int, code: int):
+        self._send(Message.ID.RESPONSE_CHANNEL, [channel, message_id, code])
+
+    def _event(self, channel: int, code: int):
+        self._send(Message.ID.RESPONSE_CHANNEL, [channel, 0x01, code])
+
+    def _handle(self, mid: int, data: List[int]):
+        if mid == Message.ID.RESET_SYSTEM:
+            self._reset_state()
+            # reset by command
+            self._send(Message.ID.STARTUP_MESSAGE, [0x20])
+        elif mid == Message.ID.REQUEST_MESSAGE:
+            self._request(data[0], data[1])
+        elif mid == Message.ID.SET_NETWORK_KEY:
+            code = (
+                Message.Code.RESPONSE_NO_ERROR
+                if data[0] < self.max_networks
+                else Message.Code.INVALID_NETWORK_NUMBER
+            )
+            self._respond(data[0], mid, code)
+        elif mid == Message.ID.ENABLE_EXT_RX_MESGS:
+            self.extended = bool(data[1])
+            self._respond(data[0], mid, Message.Code.RESPONSE_NO_ERROR)
+        elif mid == Message.ID.OPEN_RX_SCAN_MODE:
+            self._open_scan_mode(data[0])
+        elif mid in (
+            Message.ID.BROADCAST_DATA,
+            Message.ID.ACKNOWLEDGED_DATA,
+            Message.ID.BURST_TRANSFER_DATA,
+        ):
+            self._data(mid, data)
+        elif mid in _CHANNEL_MESSAGES:
+            if data[0] < self.max_channels:
+                self._configure(self.channels[data[0]], mid, data)
+            else:
+                self._respond(data[0], mid, Message.Code.INVALID_MESSAGE)
+        else:
+            # other configuration is accepted but has no effect on the emulation
+            self._respond(data[0] if data else 0, mid, Message.Code.RESPONSE_NO_ERROR)
+
+    def _request(self, channel: int, message_id: int):
+        if message_id == Message.ID.RESPONSE_CAPABILITIES:
+            self._send(message_id, self.capabilities)
+        elif message_id == Message.ID.RESPONSE_SERIAL_NUMBER:
+            self._send(message_id, struct.pack("<I", self.serial))
+        elif message_id == Message.ID.RESPONSE_ANT_VERSION:
+            self._send(message_id, self.version)
+        elif message_id == Message.ID.RESPONSE_CHANNEL_STATUS:
+            c = self.channels[channel]
+            status = c.state | (c.network << 2) | (c.type & 0xF0)
+            self._send(message_id, [channel, status])
+        elif message_id == Message.ID.RESPONSE_CHANNEL_ID:
+            c = self.channels[channel]
+            device_id = c.device.channel_id if c.device else c.channel_id
+            self._send(message_id, struct.pack("<BHBB", channel, *device_id))
+        else:
+            self._respond(channel, message_id, Message.Code.INVALID_MESSAGE)
+
+    def _configure(self, c: _Channel, mid: int, data: List[int]):
+        code = Message.Code.RESPONSE_NO_ERROR
+        if mid == Message.ID.ASSIGN_CHANNEL:
+            if c.state != ChannelState.UNASSIGNED:
+                code = Message.Code.CHANNEL_IN_WRONG_STATE
+            elif data[2] >= self.max_networks:
+                code = Message.Code.INVALID_NETWORK_NUMBER
+            else:
+                assigned = _Channel(c.number)
+                assigned.generation = c.generation + 1
+                self.channels[c.number] = c = assigned
+                c.state = ChannelState.ASSIGNED
+                c.type = data[1]
+                c.network = data[2]
+                c.ext_assign = data[3] if len(data) > 3 else 0
+        elif c.state == ChannelState.UNASSIGNED:
+            code = Message.Code.CHANNEL_IN_WRONG_STATE
+        elif mid == Message.ID.UNASSIGN_CHANNEL:
+            if c.is_open:
+                code = Message.Code.CHANNEL_IN_WRONG_STATE
+            else:
+                c.state = ChannelState.UNASSIGNED
+        elif mid == Message.ID.OPEN_CHANNEL:
+            if c.is_open or self.scan_mode:
+                code = Message.Code.CHANNEL_IN_WRONG_STATE
+            else:
+                self._open(c)
+        elif mid == Message.ID.CLOSE_CHANNEL:
+            if not c.is_open and not (self.scan_mode and c.number == 0):
+                code = Message.Code.CHANNEL_NOT_OPENED
+            else:
+                self._respond(c.number, mid, code)
+                self._close(c)
+                return
+        elif mid == Message.ID.SET_CHANNEL_ID:
+            c.channel_id = struct.unpack("<HBB", bytes(data[1:5]))
+            if c.is_open:
+                self._open(c)
+        elif mid == Message.ID.SET_CHANNEL_PERIOD:
+            c.period = data[1] + (data[2] << 8)
+        elif mid == Message.ID.SET_CHANNEL_RF_FREQ:
+            c.rf_freq = data[1]
+        elif mid == Message.ID.FREQUENCY_AGILITY:
+            c.agility_frequencies = tuple(data[1:4])
+        elif mid == Message.ID.SET_CHANNEL_SEARCH_TIMEOUT:
+            c.search_timeout = data[1]
+        elif mid == Message.ID.LOW_PRIORITY_CHANNEL_SEARCH_TIMEOUT:
+            c.low_priority_search_timeout = data[1]
+        elif mid == Message.ID.ADD_CHANNEL_ID:
+            if data[5] >= 4:
+                code = Message.Code.INVALID_LIST_ID
+            else:
+                del c.id_list[data[5] :]
+                c.id_list.extend([(0, 0, 0)] * (data[5] + 1 - len(c.id_list)))
+                c.id_list[data[5]] = struct.unpack("<HBB", bytes(data[1:5]))
+        elif mid == Message.ID.CONFIG_LIST:
+            c.id_list_size = data[1]
+            c.id_list_exclude = bool(data[2])
+        self._respond(c.number, mid, code)
+
+    def _data(self, mid: int, data: List[int]):
+        number = data[0] & 0x1F
+        if number >= self.max_channels:
+            self._respond(number, mid, Message.Code.INVALID_MESSAGE)
+            return
+        c = self.channels[number]
+        if not c.is_open:
+            self._respond(number, mid, Message.Code.CHANNEL_NOT_OPENED)
+        elif mid == Message.ID.ACKNOWLEDGED_DATA:
+            c.acknowledged = data[1:9]
+        elif mid == Message.ID.BURST_TRANSFER_DATA:
+            sequence = data[0] >> 5
+            if sequence == 0:
+                c.burst = []
+                c.burst_complete = False
+                self._event(number, Message.Code.EVENT_TRANSFER_TX_START)
+            c.burst.extend(data[1:9])
+            if sequence & 0b100:
+                c.burst_complete = True
+        # broadcast data is sent by a transmit channel each period
+
+    # Radio
+
+    def _scanning(self, c: _Channel) -> bool:
+        return not c.transmit and (
+            (self.scan_mode and c.number == 0) or c.ext_assign & _BACKGROUND_SCANNING
+        )
+
+    def _open(self, c: _Channel):
+        c.generation += 1
+        c.device = None
+        c.rx_fails = 0
+        c.search_started = time.monotonic()
+        if c.transmit:
+            c.state = ChannelState.TRACKING
+            self._schedule_channel(c, self._seconds(c.period))
+        elif self._scanning(c):
+            c.state = ChannelState.SEARCHING
+            for device in self.devices:
+                self._schedule_device(c, device, 0)
+        else:
+            c.state = ChannelState.SEARCHING
+            self._schedule_channel(c, self._seconds(c.period))
+
+    def _close(self, c: _Channel):
+        c.generation += 1
+        c.device = None
+        c.state = ChannelState.ASSIGNED
+        if c.number == 0:
+            self.scan_mode = False
+        self._event(c.number, Message.Code.EVENT_CHANNEL_CLOSED)
+
+    def _open_scan_mode(self, number: int):
+        if any(c.is_open for c in self.channels):
+            self._respond(
+                number, Message.ID.OPEN_RX_SCAN_MODE, Message.Code.CLOSE_ALL_CHANNELS
+            )
+        elif self.channels[0].state == ChannelState.UNASSIGNED:
+            self._respond(
+                number,
+                Message.ID.OPEN_RX_SCAN_MODE,
+                Message.Code.CHANNEL_IN_WRONG_STATE,
+            )
+        else:
+            self.scan_mode = True
+            self._respond(
+                number, Message.ID.OPEN_RX_SCAN_MODE, Message.Code.RESPONSE_NO_ERROR
+            )
+            self._open(self.channels[0])
+
+    def _seconds(self, period: int) -> float:
+        return period / 32768 / self.speed
+
+    def _schedule_channel(self, c: _Channel, delay: float):
+        heapq.heappush(
+            self._schedule,
+            (time.monotonic() + delay, next(self._sequence), c, None, c.generation),
+        )
+
+    def _schedule_device(self, c: _Channel, device: SimulatedDevice, delay: float):
+        heapq.heappush(
+            self._schedule,
+            (time.monotonic() + delay, next(self._sequence), c, device, c.generation),
+        )
+
+    def _radio(self):
+        with self._cond:
+            while self._running:
+                if not self._schedule:
+                    self._cond.wait(self.READ_TIMEOUT)
+                    continue
+                due, _, c, device, generation = self._schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heapq.heappop(self._schedule)
+                if generation != c.generation:
+                    continue
+                if device is not None:
+                    self._scan_timeslot(c, device)
+                elif c.transmit:
+                    self._transmit_timeslot(c)
+                else:
+                    self._receive_timeslot(c)
+
+    def _transmit_timeslot(self, c: _Channel):
+        self._event(c.number, Message.Code.EVENT_TX)
+        # a receiver is assumed to be listening
+        self._complete_transfers(c, None)
+        self._schedule_channel(c, self._seconds(c.period))
+
+    def _receive_timeslot(self, c: _Channel):
+        if c.state == ChannelState.SEARCHING:
+            c.device = next((d for d in self.devices if c.matches(d)), None)
+            if c.device is not None:
+                c.state = ChannelState.TRACKING
+                c.rx_fails = 0
+            elif self._search_timed_out(c):
+                self._event(c.number, Message.Code.EVENT_RX_SEARCH_TIMEOUT)
+                self._close(c)
+                return
+        elif not c.device.in_range:
+            c.rx_fails += 1
+            if c.rx_fails >= _RX_FAILS_TO_SEARCH:
+                self._event(c.number, Message.Code.EVENT_RX_FAIL_GO_TO_SEARCH)
+                c.device = None
+                c.state = ChannelState.SEARCHING
+                c.search_started = time.monotonic()
+            else:
+                self._event(c.number, Message.Code.EVENT_RX_FAIL)
+        else:
+            c.rx_fails = 0
+
+        if c.state == ChannelState.TRACKING and c.device.in_range:
+            self._receive(c, c.device)
+            self._complete_transfers(c, c.device)
+        self._schedule_channel(c, self._seconds(c.period))
+
+    def _scan_timeslot(self, c: _Channel, device: SimulatedDevice):
+        if c.matches(device):
+            c.state = ChannelState.TRACKING
+            self._receive(c, device)
+            self._complete_transfers(c, device)
+        self._schedule_device(c, device, self._seconds(device.period))
+
+    def _search_timed_out(self, c: _Channel) -> bool:
+        if c.search_timeout == 0xFF or c.low_priority_search_timeout == 0xFF:
+            return False
+        # timeouts are in 2.5 s counts
+        timeout = (c.search_timeout + c.low_priority_search_timeout) * 2.5
+        return (time.monotonic() - c.search_started) * self.speed >= timeout
+
+    def _receive(self, c: _Channel, device: SimulatedDevice):
+        mid, page = device.next_message()
+        if self.buffer_size is not None and self._output.qsize() >= self.buffer_size:
+            self.dropped += 1
+            return
+        data = [c.number] + list(page)
+        if self.extended:
+            data.append(_EXT_FLAG_CHANNEL_ID)
+            data.extend(struct.pack("<HBB", *device.channel_id))
+        self._send(mid, data)
+
+    def _complete_transfers(self, c: _Channel, device: Optional[SimulatedDevice]):
+        if c.acknowledged is not None:
+            if device is not None:
+                device.received.append(("acknowledged", c.acknowledged))
+            c.acknowledged = None
+            self._event(c.number, Message.Code.EVENT_TRANSFER_TX_COMPLETED)
+        if c.burst_complete:
+            if device is not None:
+                device.received.append(("burst", c.burst))
+            c.burst = []
+            c.burst_complete = False
+            self._event(c.number, Message.Code.EVENT_TRANSFER_TX_COMPLETED)
@@ -177,6 +177,9 @@ class Message:
                 if type(value) == int and value == event:
                     return key
 
+    # stamps of a traced message, see `openant.base.trace`
+    trace = None
+
     def __init__(self, mId, data):
         self._sync = 0xA4
         self._length = len(data)
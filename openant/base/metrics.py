@@ -0,0 +1,212 @@
+"""
+Counters and gauges of a `Node`, its channels and devices
+
+The data path only increments plain integers and `collections.Counter`
+entries it already owns; a `Registry` turns them into `Sample` lists when
+polled, so leaving metrics on costs next to nothing:
+
+.. code-block:: python
+
+    for sample in node.metrics.snapshot():
+        print(sample.key, sample.value)
+
+Names and labels follow Prometheus conventions, counters end `_total`, and
+a `MetricsServer` serves snapshots in the Prometheus text format over HTTP
+for scraping.
+"""
+# Ant
+#
+# Copyright (c) 2012, Gustav Tiger <gustav@tiger.name>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import http.server
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+_logger = logging.getLogger("openant.base.metrics")
+
+COUNTER = "counter"
+GAUGE = "gauge"
+
+
+@dataclass(frozen=True)
+class Sample:
+    """
+    Value of a metric with `labels` at the time of the snapshot
+
+    >>> Sample("openant_messages_read_total", 3, {"id": "0x4e"}).key
+    'openant_messages_read_total{id="0x4e"}'
+    """
+
+    name: str
+    value: float
+    labels: Dict[str, str] = field(default_factory=dict)
+    kind: str = COUNTER
+    help: str = ""
+
+    @property
+    def key(self) -> str:
+        if not self.labels:
+            return self.name
+        labels = ",".join(f'{k}="{v}"' for k, v in self.labels.items())
+        return f"{self.name}{{{labels}}}"
+
+
+Collector = Callable[[], Iterable[Sample]]
+
+
+class Registry:
+    """Collectors, each called for its samples when a snapshot is taken"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors: List[Collector] = []
+
+    def register(self, collector: Collector) -> Collector:
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def unregister(self, collector: Collector):
+        with self._lock:
+            try:
+                self._collectors.remove(collector)
+            except ValueError:
+                pass
+
+    def snapshot(self) -> List[Sample]:
+        """Samples of every collector, a failing collector is logged and skipped"""
+        with self._lock:
+            collectors = list(self._collectors)
+        samples = []
+        for collector in collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                _logger.warning(f"Metrics collector {collector} failed: {e}")
+        return samples
+
+    def as_dict(self) -> Dict[str, float]:
+        """Snapshot as values by `Sample.key`"""
+        return {s.key: s.value for s in self.snapshot()}
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def to_prometheus(samples: Iterable[Sample]) -> str:
+    """
+    `samples` in the Prometheus text exposition format
+
+    >>> print(to_prometheus([Sample("a_total", 2, {"ch": "0"}, help="A")]), end="")
+    # HELP a_total A
+    # TYPE a_total counter
+    a_total{ch="0"} 2
+    """
+    families: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        families.setdefault(sample.name, []).append(sample)
+
+    lines = []
+    for name, family in families.items():
+        if family[0].help:
+            lines.append(f"# HELP {name} {_escape(family[0].help, quote=False)}")
+        lines.append(f"# TYPE {name} {family[0].kind}")
+        for sample in family:
+            labels = ",".join(
+                f'{k}="{_escape(str(v))}"' for k, v in sample.labels.items()
+            )
+            lines.append(
+                f"{name}{{{labels}}} {sample.value}"
+                if labels
+                else f"{name} {sample.value}"
+            )
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class MetricsServer:
+    """
+    Serves snapshots of `registries` at /metrics from a daemon thread
+
+    Each scrape is answered on its own thread and only reads counters, so a
+    slow or stuck scraper never holds up the data path. Bind to `port` 0 for
+    any free port, see `port` once started.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(
+        self, registries: Sequence[Registry], port: int = 0, host: str = "127.0.0.1"
+    ):
+        self.registries = list(registries)
+        self.host = host
+        self._port = port
+        self._server: Optional[http.server.ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else self._port
+
+    def render(self) -> str:
+        samples = []
+        for registry in self.registries:
+            samples.extend(registry.snapshot())
+        return to_prometheus(samples)
+
+    def start(self):
+        if self._server is not None:
+            return
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", server.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                _logger.debug(f"{self.address_string()} {format % args}")
+
+        self._server = http.server.ThreadingHTTPServer((self.host, self._port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="openant.metrics", daemon=True
+        )
+        self._thread.start()
+        _logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
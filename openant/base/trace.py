@@ -0,0 +1,247 @@
+"""
+Latency tracing of received data from driver read to user callback
+
+When tracing is enabled on a `Node`, sampled messages are stamped with the
+monotonic time as they pass each `Stage` and the time spent getting to each
+stage is kept in a `Histogram` per stage and channel:
+
+.. code-block:: python
+
+    tracer = node.enable_tracing()
+    # later
+    print(tracer.summary())
+
+The stamps travel with the data as a `TracedData`, an `array.array` so data
+is passed to callbacks as usual. With tracing disabled nothing is stamped or
+allocated; each stage only checks whether there is a tracer.
+"""
+# Ant
+#
+# Copyright (c) 2012, Gustav Tiger <gustav@tiger.name>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import array
+import threading
+import time
+from enum import IntEnum
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class Stage(IntEnum):
+    """Points data is stamped at, in the order it passes them"""
+
+    # driver read returned the end of the message
+    READ = 0
+    # framed and parsed by `Ant.read_message`
+    FRAMED = 1
+    # put on and got from `Ant._events`
+    EVENTS_PUT = 2
+    EVENTS_GET = 3
+    # put on and got from `Node._datas`
+    DATAS_PUT = 4
+    DATAS_GET = 5
+    # entered ANT+ device decoding, only for device channels
+    DECODE = 6
+    # channel callback, including `on_device_data`, returned
+    DONE = 7
+
+
+class TracedData(array.array):
+    """Message data with the `trace` of stamps for each `Stage`, 0 if not stamped"""
+
+    trace: List[int]
+
+
+def traced(data: array.array, trace: List[int]) -> TracedData:
+    """`data` carrying `trace`, stamped as put on `Ant._events`"""
+    result = TracedData("B", data)
+    result.trace = trace
+    trace[Stage.EVENTS_PUT] = time.monotonic_ns()
+    return result
+
+
+def stamp(data, stage: Stage):
+    """Stamp `data` at `stage` if it is traced"""
+    trace = getattr(data, "trace", None)
+    if trace is not None:
+        trace[stage] = time.monotonic_ns()
+
+
+class Histogram:
+    """
+    Log-linear histogram of nanosecond latencies, percentiles within 12.5%
+
+    >>> h = Histogram()
+    >>> for ns in range(1, 1001):
+    ...     h.record(ns * 1000)
+    >>> h.count, h.max
+    (1000, 1000000)
+    >>> 450_000 <= h.percentile(50) <= 550_000
+    True
+    """
+
+    # significant bits kept of each value
+    _BITS = 4
+    _SUB = 1 << (_BITS - 1)
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        if value < 2 * cls._SUB:
+            return value
+        shift = value.bit_length() - cls._BITS
+        return shift * cls._SUB + (value >> shift)
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        """Middle of bucket `index`"""
+        if index < 2 * cls._SUB:
+            return index
+        shift = index // cls._SUB - 1
+        low = (index % cls._SUB + cls._SUB) << shift
+        return low + (1 << shift) // 2
+
+    def record(self, value: int):
+        value = max(value, 0)
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> int:
+        """Value `percent` of recorded values are at or below, 0 if none recorded"""
+        if not self.count:
+            return 0
+        rank = max(1, percent / 100 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def summary(self, percents: Sequence[float] = (50, 90, 99, 99.9)) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "max": self.max,
+            **{f"p{p:g}": self.percentile(p) for p in percents},
+        }
+
+
+# key of histograms over all channels
+ALL = None
+
+
+class Tracer:
+    """
+    Collects traces into histograms of time to each stage and in total
+
+    One in `sample_interval` messages is traced. Histograms are kept per
+    `(stage, channel)` and for all channels with channel `ALL`; stage None is
+    the total from driver read to callback done.
+    """
+
+    def __init__(self, sample_interval: int = 1):
+        if sample_interval < 1:
+            raise ValueError("sample_interval must be at least 1")
+        self.sample_interval = sample_interval
+        self._countdown = 1
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[Optional[Stage], Optional[int]], Histogram] = {}
+
+    def start(self, read_ns: int) -> Optional[List[int]]:
+        """Trace for a message read at `read_ns` and just framed, None if not sampled"""
+        self._countdown -= 1
+        if self._countdown:
+            return None
+        self._countdown = self.sample_interval
+        trace = [0] * len(Stage)
+        trace[Stage.READ] = read_ns
+        trace[Stage.FRAMED] = time.monotonic_ns()
+        return trace
+
+    def finish(self, channel: int, data):
+        """Stamp traced `data` done and record it against `channel`"""
+        trace = getattr(data, "trace", None)
+        if trace is None:
+            return
+        trace[Stage.DONE] = time.monotonic_ns()
+
+        with self._lock:
+            previous = trace[Stage.READ]
+            for stage in list(Stage)[1:]:
+                stamped = trace[stage]
+                if stamped:
+                    self._record(stage, channel, stamped - previous)
+                    previous = stamped
+            self._record(None, channel, trace[Stage.DONE] - trace[Stage.READ])
+
+    def _record(self, stage: Optional[Stage], channel: int, value: int):
+        for key in ((stage, channel), (stage, ALL)):
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.record(value)
+
+    def histogram(
+        self, stage: Optional[Stage] = None, channel: Optional[int] = ALL
+    ) -> Histogram:
+        """Copy of histogram of time to `stage` (total if None) on `channel`"""
+        with self._lock:
+            histogram = self.histograms.get((stage, channel))
+            result = Histogram()
+            if histogram is not None:
+                result.buckets = dict(histogram.buckets)
+                result.count = histogram.count
+                result.total = histogram.total
+                result.max = histogram.max
+            return result
+
+    def summary(self, percents: Sequence[float] = (50, 90, 99, 99.9)) -> dict:
+        """
+        Percentiles (ns) by channel, "all" for all channels, then by stage name, "total" for the total
+        """
+        with self._lock:
+            keys = list(self.histograms)
+        result = {}
+        for stage, channel in sorted(
+            keys,
+            key=lambda k: (k[1] is not None, k[1] or 0, -1 if k[0] is None else k[0]),
+        ):
+            result.setdefault("all" if channel is ALL else channel, {})[
+                "total" if stage is None else stage.name.lower()
+            ] = self.histogram(stage, channel).summary(percents)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
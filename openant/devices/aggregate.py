@@ -0,0 +1,270 @@
+"""
+Streaming windowed aggregations of device data fields
+
+An `Aggregation` keeps `Metric` of one field of device data up to date as
+pages arrive, each in O(1) (amortised for windows) per page, and publishes
+their values every `interval` seconds rather than per page:
+
+.. code-block:: python
+
+    def publish(values):
+        print(values["power_3s"], values["np"])
+
+    meter.aggregate(
+        "instantaneous_power",
+        {
+            "power_3s": RollingMean(3),
+            "power_30s": RollingMean(30),
+            "max_10s": RollingMax(10),
+            "smooth": Ewma(5),
+            "np": NormalizedPower(),
+        },
+        interval=1.0,
+        callback=publish,
+        # power is also in the torque page, count it once
+        pages=["standard_power"],
+    )
+
+Publishing happens on the thread delivering pages, with the first page at
+or after each interval; when pages stop, so does publishing.
+"""
+import abc
+import collections
+import math
+import threading
+import time
+from typing import Callable, Collection, Dict, Optional
+
+_NUMBERS = (int, float)
+
+
+class Metric(abc.ABC):
+    """Aggregate of values added with the monotonic time they were seen"""
+
+    @abc.abstractmethod
+    def add(self, value: float, now: float):
+        """Add `value` seen at monotonic time `now`"""
+
+    @property
+    @abc.abstractmethod
+    def value(self) -> Optional[float]:
+        """Current aggregate, None if there is none"""
+
+    @abc.abstractmethod
+    def reset(self):
+        """Forget values added"""
+
+
+class RollingMean(Metric):
+    """
+    Mean of values seen in the last `window` seconds
+
+    >>> m = RollingMean(3)
+    >>> for t, v in enumerate([100, 200, 300, 400]):
+    ...     m.add(v, t)
+    >>> m.value
+    300.0
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self._samples = collections.deque()
+        self._total = 0.0
+
+    def add(self, value: float, now: float):
+        samples = self._samples
+        samples.append((now, value))
+        self._total += value
+        cutoff = now - self.window
+        while samples[0][0] <= cutoff:
+            self._total -= samples.popleft()[1]
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self._samples:
+            return None
+        return self._total / len(self._samples)
+
+
+class _RollingExtreme(Metric):
+    """Monotonic deque of (time, value), the extreme of the window first"""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self._samples = collections.deque()
+
+    @staticmethod
+    @abc.abstractmethod
+    def _keep(old: float, new: float) -> bool:
+        """True if `old` can still be the extreme once `new` is seen"""
+
+    def add(self, value: float, now: float):
+        samples = self._samples
+        # values the new one outlasts and beats can never be the extreme
+        while samples and not self._keep(samples[-1][1], value):
+            samples.pop()
+        samples.append((now, value))
+        cutoff = now - self.window
+        while samples[0][0] <= cutoff:
+            samples.popleft()
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._samples[0][1] if self._samples else None
+
+
+class RollingMax(_RollingExtreme):
+    """
+    Largest value seen in the last `window` seconds
+
+    >>> m = RollingMax(2)
+    >>> for t, v in enumerate([5, 3, 4, 1]):
+    ...     m.add(v, t)
+    >>> m.value
+    4
+    """
+
+    @staticmethod
+    def _keep(old: float, new: float) -> bool:
+        return old > new
+
+
+class RollingMin(_RollingExtreme):
+    """Smallest value seen in the last `window` seconds"""
+
+    @staticmethod
+    def _keep(old: float, new: float) -> bool:
+        return old < new
+
+
+class Ewma(Metric):
+    """
+    Exponentially weighted moving average with `time_constant` seconds
+
+    Weighted by time between values, so irregular pages do not skew it.
+    """
+
+    def __init__(self, time_constant: float):
+        self.time_constant = time_constant
+        self.reset()
+
+    def reset(self):
+        self._value: Optional[float] = None
+        self._last = 0.0
+
+    def add(self, value: float, now: float):
+        if self._value is None:
+            self._value = float(value)
+        else:
+            alpha = 1.0 - math.exp(-max(now - self._last, 0.0) / self.time_constant)
+            self._value += alpha * (value - self._value)
+        self._last = now
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+
+class NormalizedPower(Metric):
+    """
+    Normalized power: 4th root of the mean 4th power of the `window` rolling mean
+
+    The rolling mean is taken at each value added rather than each second,
+    the same for pages at a steady rate.
+
+    >>> np = NormalizedPower()
+    >>> for t in range(60):
+    ...     np.add(200, t)
+    >>> round(np.value, 6)
+    200.0
+    """
+
+    def __init__(self, window: float = 30.0):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self._rolling = RollingMean(self.window)
+        self._total = 0.0
+        self._count = 0
+
+    def add(self, value: float, now: float):
+        self._rolling.add(value, now)
+        self._total += self._rolling.value**4
+        self._count += 1
+
+    @property
+    def value(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return (self._total / self._count) ** 0.25
+
+
+class Aggregation:
+    """
+    `metrics` by name of `field` of device data, published to `callback` every `interval` seconds
+
+    Only pages named in `pages` are used if set. Values that are not numbers
+    (such as None) are skipped. Offered pages like a `Subscription`, see
+    `AntPlusDevice.aggregate`.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        metrics: Dict[str, Metric],
+        interval: float = 1.0,
+        callback: Optional[Callable[[Dict[str, Optional[float]]], None]] = None,
+        pages: Optional[Collection[str]] = None,
+    ):
+        self.field = field
+        self.metrics = dict(metrics)
+        self.interval = interval
+        self.callback = callback
+        self.pages = None if pages is None else frozenset(pages)
+        self._next: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Aggregation({self.field!r}, {list(self.metrics)})"
+
+    def add(self, value: float, now: Optional[float] = None):
+        """Add `value` of the field to every metric, publishing if due"""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            for metric in self.metrics.values():
+                metric.add(value, now)
+            if self._next is None:
+                self._next = now + self.interval
+                return
+            if now < self._next:
+                return
+            # next on the cadence, skipping intervals without pages
+            self._next += ((now - self._next) // self.interval + 1) * self.interval
+            values = {name: m.value for name, m in self.metrics.items()}
+        if self.callback is not None:
+            self.callback(values)
+
+    def offer(self, page: int, page_name: str, data, now: Optional[float] = None):
+        if self.pages is not None and page_name not in self.pages:
+            return
+        value = getattr(data, self.field, None)
+        if isinstance(value, _NUMBERS):
+            self.add(value, now)
+
+    def values(self) -> Dict[str, Optional[float]]:
+        with self._lock:
+            return {name: m.value for name, m in self.metrics.items()}
+
+    def reset(self):
+        with self._lock:
+            for metric in self.metrics.values():
+                metric.reset()
+            self._next = None
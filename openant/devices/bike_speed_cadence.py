@@ -4,7 +4,8 @@ from typing import List, Optional
 from dataclasses import dataclass, field
 
 from ..easy.node import Node
-from .common import DeviceData, AntPlusDevice, DeviceType, BatteryStatus
+from .common import BATTERY_VOLTAGE, DeviceData, AntPlusDevice, DeviceType
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -43,7 +44,9 @@ class BikeSpeedData(DeviceData):
         )
         delta_event_time = self.bike_speed_event_time[1] - self.bike_speed_event_time[0]
         if delta_event_time > 0:
-            self.calculated_speed = (wheel_circumference_m * delta_rev_count) / delta_event_time * 3.6
+            self.calculated_speed = (
+                (wheel_circumference_m * delta_rev_count) / delta_event_time * 3.6
+            )
             return self.calculated_speed
         else:
             return None
@@ -59,7 +62,9 @@ class BikeSpeedData(DeviceData):
         >>> bs.calculate_distance(2.3)
         11.5
         """
-        self.calculated_distance = wheel_circumference_m * self.cumulative_speed_revolution[1]
+        self.calculated_distance = (
+            wheel_circumference_m * self.cumulative_speed_revolution[1]
+        )
         return self.calculated_distance
 
 
@@ -107,6 +112,26 @@ class BikeCadenceData(DeviceData):
             return None
 
 
+# the 4 bytes of event time and revolutions ending each page
+REVOLUTIONS = Page(
+    "revolutions",
+    [
+        Field("event_time", 0, size=2, scale=1 / 1024, rollover=True),
+        Field("revolutions", 2, size=2, rollover=True),
+    ],
+    size=4,
+)
+
+OPERATING_TIME = Page(
+    "operating_time", [Field("cumulative_operating_time", 1, size=3, scale=2)]
+)
+
+MANUFACTURER_INFO = Page(
+    "manufacturer_info",
+    [Field("manufacturer_id_lsb", 1), Field("serial_number", 2, size=2)],
+)
+
+
 class BikeSpeed(AntPlusDevice):
     """Device profile for speed sensor"""
 
@@ -130,21 +155,24 @@ class BikeSpeed(AntPlusDevice):
         self.data = {**self.data, "bike_speed": BikeSpeedData()}
 
     @staticmethod
-    def update_speed_data(bike_speed_data: BikeSpeedData, data: List[int], wheel_circumference_m: Optional[float] = None):
+    def update_speed_data(
+        bike_speed_data: BikeSpeedData,
+        data: List[int],
+        wheel_circumference_m: Optional[float] = None,
+    ):
         if len(data) != 4:
             raise ValueError("data length must be == 4")
 
-        bike_speed_event_time = (
-            int.from_bytes(data[0:2], byteorder="little") / 1024
-        )  # 1/1024 seconds
-        bike_speed_data.bike_speed_event_time[
-            0
-        ] = bike_speed_data.bike_speed_event_time[1]
+        bike_speed_event_time, cumulative_speed_revolution = REVOLUTIONS.decode(
+            bytes(data)
+        )
+        bike_speed_data.bike_speed_event_time[0] = (
+            bike_speed_data.bike_speed_event_time[1]
+        )
         bike_speed_data.bike_speed_event_time[1] = bike_speed_event_time
-        cumulative_speed_revolution = int.from_bytes(data[2:4], byteorder="little")
-        bike_speed_data.cumulative_speed_revolution[
-            0
-        ] = bike_speed_data.cumulative_speed_revolution[1]
+        bike_speed_data.cumulative_speed_revolution[0] = (
+            bike_speed_data.cumulative_speed_revolution[1]
+        )
         bike_speed_data.cumulative_speed_revolution[1] = cumulative_speed_revolution
         if wheel_circumference_m:
             bike_speed_data.calculate_speed(wheel_circumference_m)
@@ -164,26 +192,17 @@ class BikeSpeed(AntPlusDevice):
                 self.update_speed_data(self.data["bike_speed"], data[4:8])
             # comulative operating time
             elif dp == 0x01:
-                self.data["bike_speed"].cumulative_operating_time = (
-                    int.from_bytes(data[1:4], byteorder="little") * 2
-                )  # 2 second units
+                OPERATING_TIME.update(self.data["bike_speed"], data)
                 self.update_speed_data(self.data["bike_speed"], data[4:8])
             # manufacturer ID
             elif dp == 0x02:
-                self.data["bike_speed"].manufacturer_id_lsb = data[1]
-                self.data["bike_speed"].serial_number = int.from_bytes(
-                    data[2:4], byteorder="little"
-                )
+                MANUFACTURER_INFO.update(self.data["bike_speed"], data)
                 self.update_speed_data(self.data["bike_speed"], data[4:8])
             # background page product info
             elif dp == 0x03:
                 self.update_speed_data(self.data["bike_speed"], data[4:8])
             elif dp == 0x04:
-                self.data["common"].last_battery_data.voltage_fractional = data[2] / 256
-                self.data["common"].last_battery_data.voltage_coarse = data[3] & 0x0F
-                self.data["common"].last_battery_data.status = BatteryStatus(
-                    (data[3] & 0x70) >> 4
-                )
+                BATTERY_VOLTAGE.update(self.data["common"].last_battery_data, data)
                 self.update_speed_data(self.data["bike_speed"], data[4:8])
                 # trigger the on battery callback
                 self._on_battery(self.data["common"].last_battery_data)
@@ -191,7 +210,7 @@ class BikeSpeed(AntPlusDevice):
             elif dp == 0x05:
                 self.update_speed_data(self.data["bike_speed"], data[4:8])
 
-            self.on_device_data(page, "bike_speed", self.data["bike_speed"])
+            self._on_device_data(page, "bike_speed", self.data["bike_speed"])
 
 
 class BikeCadence(AntPlusDevice):
@@ -221,20 +240,19 @@ class BikeCadence(AntPlusDevice):
         if len(data) != 4:
             raise ValueError("data length must be == 4")
 
-        bike_cadence_event_time = (
-            int.from_bytes(data[0:2], byteorder="little") / 1024
-        )  # 1/1024 seconds
-        bike_cadence_data.bike_cadence_event_time[
-            0
-        ] = bike_cadence_data.bike_cadence_event_time[1]
+        bike_cadence_event_time, cumulative_cadence_revolution = REVOLUTIONS.decode(
+            bytes(data)
+        )
+        bike_cadence_data.bike_cadence_event_time[0] = (
+            bike_cadence_data.bike_cadence_event_time[1]
+        )
         bike_cadence_data.bike_cadence_event_time[1] = bike_cadence_event_time
-        cumulative_cadence_revolution = int.from_bytes(data[2:4], byteorder="little")
-        bike_cadence_data.cumulative_cadence_revolution[
-            0
-        ] = bike_cadence_data.cumulative_cadence_revolution[1]
-        bike_cadence_data.cumulative_cadence_revolution[
-            1
-        ] = cumulative_cadence_revolution
+        bike_cadence_data.cumulative_cadence_revolution[0] = (
+            bike_cadence_data.cumulative_cadence_revolution[1]
+        )
+        bike_cadence_data.cumulative_cadence_revolution[1] = (
+            cumulative_cadence_revolution
+        )
         bike_cadence_data.calculate_cadence()
 
     def on_data(self, data):
@@ -251,26 +269,17 @@ class BikeCadence(AntPlusDevice):
                 self.update_cadence_data(self.data["bike_cadence"], data[4:8])
             # comulative operating time
             elif dp == 0x01:
-                self.data["bike_cadence"].cumulative_operating_time = (
-                    int.from_bytes(data[1:4], byteorder="little") * 2
-                )  # 2 second units
+                OPERATING_TIME.update(self.data["bike_cadence"], data)
                 self.update_cadence_data(self.data["bike_cadence"], data[4:8])
             # manufacturer ID
             elif dp == 0x02:
-                self.data["bike_cadence"].manufacturer_id_lsb = data[1]
-                self.data["bike_cadence"].serial_number = int.from_bytes(
-                    data[2:4], byteorder="little"
-                )
+                MANUFACTURER_INFO.update(self.data["bike_cadence"], data)
                 self.update_cadence_data(self.data["bike_cadence"], data[4:8])
             # background page product info
             elif dp == 0x03:
                 self.update_cadence_data(self.data["bike_cadence"], data[4:8])
             elif dp == 0x04:
-                self.data["common"].last_battery_data.voltage_fractional = data[2] / 256
-                self.data["common"].last_battery_data.voltage_coarse = data[3] & 0x0F
-                self.data["common"].last_battery_data.status = BatteryStatus(
-                    (data[3] & 0x70) >> 4
-                )
+                BATTERY_VOLTAGE.update(self.data["common"].last_battery_data, data)
                 self.update_cadence_data(self.data["bike_cadence"], data[4:8])
                 # trigger the on battery callback
                 self._on_battery(self.data["common"].last_battery_data)
@@ -278,7 +287,7 @@ class BikeCadence(AntPlusDevice):
             elif dp == 0x05:
                 self.update_cadence_data(self.data["bike_cadence"], data[4:8])
 
-            self.on_device_data(page, "bike_cadence", self.data["bike_cadence"])
+            self._on_device_data(page, "bike_cadence", self.data["bike_cadence"])
 
 
 class BikeSpeedCadence(AntPlusDevice):
@@ -317,7 +326,9 @@ class BikeSpeedCadence(AntPlusDevice):
         # only one page
         if (page & 0x0F) <= 5:
             BikeCadence.update_cadence_data(self.data["bike_cadence"], data[0:4])
-            BikeSpeed.update_speed_data(self.data["bike_speed"], data[4:8], self.wheel_circumference_m)
+            BikeSpeed.update_speed_data(
+                self.data["bike_speed"], data[4:8], self.wheel_circumference_m
+            )
 
-            self.on_device_data(page, "bike_cadence", self.data["bike_cadence"])
-            self.on_device_data(page, "bike_speed", self.data["bike_speed"])
+            self._on_device_data(page, "bike_cadence", self.data["bike_cadence"])
+            self._on_device_data(page, "bike_speed", self.data["bike_speed"])
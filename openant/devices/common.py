@@ -11,16 +11,26 @@ Creating a device then just requires a openant.easy.node.Node() wtih network con
     node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
     generic_device = AntPlusDevice(node)
 """
+import collections
 import dataclasses
 import datetime
 import logging
+from time import time_ns
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, List
+from typing import Callable, Collection, Dict, Hashable, Optional, List, Tuple, Union
 
+from ..base.metrics import Sample
+from ..base.trace import Stage, stamp
 from ..easy.channel import Channel
 from ..easy.exception import AntException
 from ..easy.node import Node
+from .schema import Field, Page
+from .serialize import Serializer
+from .aggregate import Aggregation, Metric
+from .fleet import FleetStore
+from .pairing import PairingCache
+from .subscription import Subscription, SubscriptionCallback
 
 _logger = logging.getLogger(__name__)
 
@@ -50,7 +60,7 @@ class DeviceType(Enum):
     DropperSeatpost = 115
 
     @classmethod
-    def _missing_(cls, _): # type: ignore
+    def _missing_(cls, _):  # type: ignore
         return DeviceType.Unknown
 
 
@@ -69,7 +79,7 @@ class BatteryStatus(Enum):
     Invalid = 7
 
     @classmethod
-    def _missing_(cls, _): # type: ignore
+    def _missing_(cls, _):  # type: ignore
         return BatteryStatus.Unknown
 
 
@@ -79,37 +89,45 @@ class DeviceData:
     The base class for device data page dataclasses
     """
 
-    def to_influx_json(self, tags: dict):
+    @classmethod
+    def serializer(cls) -> Serializer:
+        """`Serializer` generated for this class on first use"""
+        return Serializer.of(cls)
+
+    def to_influx_json(self, tags: dict, time: Optional[int] = None):
         """
         Converts DeviceData into json dict expected by InfluxDB 1 -> `write_points` and compatiable with InfluxDB 2 `write`
 
         :param tags dict: tags to include in write
+        :param time int: timestamp in ns since the epoch, now if None
 
         >>> from openant.devices.power_meter import PowerData
         >>> p = PowerData()
         >>> p.to_influx_json({"taggy": "blah"}) #doctest: +ELLIPSIS
         {'measurement': 'PowerData', 'tags': {'taggy': 'blah'}, 'time': ..., 'fields': {'instantaneous_power': 0, 'average_power': 0, 'left_power': -1, 'right_power': -1, 'torque': 0.0, 'angular_velocity': 0.0, 'cadence': 255}}
         """
-        fields = {name: getattr(self, name) for name in self.__dataclass_fields__}
-
-        # convert enums to values and filter out non numeric fields
-        filtered = {}
-        for k, v in fields.items():
-            if isinstance(v, Enum):
-                filtered.update({k: v.value})
-            elif isinstance(v, (int, float)):
-                filtered.update({k: v})
-
-        return {
-            "measurement": type(self).__name__,
-            "tags": tags,
-            "time": int(
-                datetime.datetime.now(datetime.UTC)
-                .timestamp()
-                * 1e9
-            ),
-            "fields": filtered,
-        }
+        return Serializer.of(type(self)).influx_json(
+            self, tags, time_ns() if time is None else time
+        )
+
+    def to_line_protocol(self, tags: dict, time: Optional[int] = None) -> Optional[str]:
+        """
+        Converts DeviceData into a line of InfluxDB line protocol, None if it has no numeric fields
+
+        >>> from openant.devices.environment import EnvironmentData
+        >>> e = EnvironmentData(temperature=21.5, min_24h_temperature=-2.0, max_24h_temperature=25.0)
+        >>> print(e.to_line_protocol({"device": "env 1"}, time=0))
+        EnvironmentData,device=env\\ 1 temperature=21.5,min_24h_temperature=-2.0,max_24h_temperature=25.0 0
+        """
+        return Serializer.of(type(self)).line(
+            self, tags, time_ns() if time is None else time
+        )
+
+    def to_tuple(self) -> tuple:
+        """
+        Numeric field values, enums as their value, in the order of `serializer().columns`; None for a field without one
+        """
+        return Serializer.of(type(self)).values(self)
 
 
 @dataclass
@@ -165,6 +183,66 @@ class CommonData(DeviceData):
         return payload
 
 
+# % Common Pages %
+MANUFACTURER_INFO = Page(
+    "manufacturer_info",
+    [
+        Field("hardware_rev", 3),
+        Field("manufacturer_id", 4, size=2),
+        Field("model_no", 6, size=2),
+    ],
+    number=80,
+)
+
+PRODUCT_INFO = Page(
+    "product_info",
+    [
+        Field("sw_rev", 2),
+        Field("sw_main", 3),
+        Field("serial_no", 4, size=4),
+    ],
+    number=81,
+)
+
+BATTERY_STATUS = Page(
+    "battery_status",
+    [
+        Field("battery_identifier", 2),
+        Field("battery_number", 2, bits=4),
+        Field("battery_id", 2, shift=4, bits=4),
+        Field("operating_time", 3, size=2),
+        Field("voltage_fractional", 6, scale=1 / 256),
+        Field("voltage_coarse", 7, bits=4),
+        Field("status", 7, shift=4, bits=3, enum=BatteryStatus),
+        Field("resolution_2s", 7, shift=7, bits=1, enum=bool),
+    ],
+    number=82,
+)
+
+DATE_TIME = Page(
+    "date_time",
+    [
+        Field("second", 2),
+        Field("minute", 3),
+        Field("hour", 4),
+        Field("day", 5, bits=5),
+        Field("month", 6),
+        Field("year", 7, offset=2000),
+    ],
+    number=83,
+)
+
+# battery voltage and status as in the battery status page of sensors without common pages
+BATTERY_VOLTAGE = Page(
+    "battery_voltage",
+    [
+        Field("voltage_fractional", 2, scale=1 / 256),
+        Field("voltage_coarse", 3, bits=4),
+        Field("status", 3, shift=4, bits=3, enum=BatteryStatus),
+    ],
+)
+
+
 class AntPlusDevice:
     """
     Base class to create ANT+ devices with. Handles attached state and common data pages in `_on_data`.
@@ -193,38 +271,163 @@ class AntPlusDevice:
         if master and trans_type == 0:
             self.trans_type = 5
         else:
-            self.trans_type = 0
+            self.trans_type = trans_type
         self.name = name
         self.master = master
 
         self._found = False
         self._attached = False
         self._page_count = 0  # for interleaving pages
+        # pages received by page number
+        self.page_counts = collections.Counter()
+        # replaced rather than changed, so can be iterated while subscribing
+        self._subscriptions: Tuple[Union[Subscription, Aggregation], ...] = ()
+        # records the device attached to, see `use_pairing`
+        self.pairing: Optional[PairingCache] = None
+        self.tag = ""
 
         self.data = {
             "common": CommonData(),
-            "batteries": [
-                BatteryData() for _ in range(15)
-            ],  # multi battery systems will update list with battery ID as index
+            # by battery ID, added as multi battery systems report each battery
+            "batteries": {},
         }
 
         self.node = node
 
         self.open_channel()
+        self._channel_node.metrics.register(self.collect_metrics)
 
     def __str__(self):
         return f"{self.name}_{self.device_id:05}"
 
+    def _callback(self, hook: str, *args):
+        """Call user callback `hook`, timed if the node of the channel has a callback monitor"""
+        monitor = self._channel_node.callback_monitor
+        if monitor is None:
+            return getattr(self, hook)(*args)
+        return monitor.call(str(self), hook, getattr(self, hook), *args)
+
+    def _on_device_data(self, page: int, page_name: str, data: DeviceData):
+        self._callback("on_device_data", page, page_name, data)
+        if not self._subscriptions:
+            return
+        monitor = self._channel_node.callback_monitor
+        for subscription in self._subscriptions:
+            if monitor is None:
+                subscription.offer(page, page_name, data)
+            else:
+                monitor.call(
+                    str(self),
+                    "subscription",
+                    subscription.offer,
+                    page,
+                    page_name,
+                    data,
+                )
+
+    def subscribe(
+        self,
+        callback: SubscriptionCallback,
+        fields: Optional[Collection[str]] = None,
+        deadband: Union[float, Dict[str, float]] = 0,
+        min_interval: float = 0.0,
+        max_interval: Optional[float] = None,
+        pages: Optional[Collection[str]] = None,
+    ) -> Subscription:
+        """
+        Call `callback` like `on_device_data` but only for meaningful changes, see `Subscription`
+
+        :param fields: names of fields to watch for changes, all numeric fields if None
+        :param deadband: change ignored, for all fields or by field name
+        :param min_interval: least seconds between calls
+        :param max_interval: call when a page arrives this long after the last call even if unchanged
+        :param pages: page names to watch, e.g. "heart_rate", all if None
+        :raises ValueError: a field in `fields` or `deadband` is not in the data of the device
+        """
+        names = set(fields or ()) | set(deadband if isinstance(deadband, dict) else ())
+        if names:
+            columns = {
+                column
+                for data in self.data.values()
+                if isinstance(data, DeviceData)
+                for column in type(data).serializer().columns
+            }
+            unknown = names - columns
+            if unknown:
+                raise ValueError(f"{self} has no fields {sorted(unknown)} to watch")
+        subscription = Subscription(
+            callback, fields, deadband, min_interval, max_interval, pages
+        )
+        self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def aggregate(
+        self,
+        field: str,
+        metrics: Dict[str, Metric],
+        interval: float = 1.0,
+        callback: Optional[Callable[[Dict[str, Optional[float]]], None]] = None,
+        pages: Optional[Collection[str]] = None,
+    ) -> Aggregation:
+        """
+        Aggregate `field` of device data into `metrics` by name, see `Aggregation`
+
+        :param field: name of the `DeviceData` field, e.g. "instantaneous_power"
+        :param metrics: `Metric` by name, e.g. {"power_3s": RollingMean(3)}
+        :param interval: seconds between calls of `callback` with the metric values
+        :param pages: page names to use, all if None
+
+        Remove with `unsubscribe`.
+        """
+        aggregation = Aggregation(field, metrics, interval, callback, pages)
+        self._subscriptions = self._subscriptions + (aggregation,)
+        return aggregation
+
+    def unsubscribe(self, subscription: Union[Subscription, Aggregation]):
+        self._subscriptions = tuple(
+            s for s in self._subscriptions if s is not subscription
+        )
+
+    def use_store(self, store: FleetStore, key: Optional[Hashable] = None):
+        """
+        Keep the data of `store.data_class` in `store` rather than in a dataclass of its own
+
+        :param store: `FleetStore` shared by devices, e.g. of PowerData
+        :param key: key of the device in `store`, "device_id:device_type" as `Scanner.common` if None
+
+        Current values are copied to the store and the view of them replaces the dataclass in `data`, which is returned.
+        """
+        names = [n for n, d in self.data.items() if type(d) is store.data_class]
+        if not names:
+            raise ValueError(f"{self} has no {store.data_class.__name__} data")
+        if key is None:
+            key = f"{self.device_id}:{self.device_type}"
+        store[key] = self.data[names[0]]
+        self.data[names[0]] = store[key]
+        return self.data[names[0]]
+
+    def use_pairing(self, pairing: PairingCache, tag: str = ""):
+        """
+        Record the device attached to in `pairing` as `tag`, so it can be opened on directly next time
+
+        `auto_create_device` opens on the device paired and calls this.
+        """
+        self.pairing = pairing
+        self.tag = tag
+        if self._attached:
+            pairing.pair(self.device_type, tag, self.device_id, self.trans_type)
+
     @staticmethod
     def on_device_data(page: int, page_name: str, data: DeviceData):
         """Override this to capture device specific page data updates"""
-        assert page
+        # page 0 is valid, e.g. speed and cadence sensor default page
+        assert page is not None
         assert page_name
         assert data
         pass
 
     def _on_update(self, data: list):
-        self.on_update(data)
+        self._callback("on_update", data)
 
     @staticmethod
     def on_update(data: list):
@@ -233,7 +436,7 @@ class AntPlusDevice:
         pass
 
     def _on_found(self):
-        self.on_found()
+        self._callback("on_found")
 
     @staticmethod
     def on_found():
@@ -244,7 +447,7 @@ class AntPlusDevice:
         _logger.info(
             f"Battery info {self}: ID: {self.data['common'].last_battery_id}; Fractional V: {self.data['common'].last_battery_data.voltage_fractional} V; Coarse V: {self.data['common'].last_battery_data.voltage_coarse} V; Status: {self.data['common'].last_battery_data.status}"
         )
-        self.on_battery(data)
+        self._callback("on_battery", data)
 
     @staticmethod
     def on_battery(data: BatteryData):
@@ -264,20 +467,32 @@ class AntPlusDevice:
             )
 
         self.channel = self.node.new_channel(channel_type, 0x00, ext_assign)
+        # `node` can be a `NodePool`, so the Node the channel was placed on
+        self._channel_node: Node = self.channel._node
 
         # configure callbacks based on if slave or master device
         if not self.master:
             self.channel.on_broadcast_data = self._on_data
             self.channel.on_burst_data = self._on_data
             self.channel.on_acknowledge = self._on_data
-            # only search timeout if slave as searching
-            self.channel.set_search_timeout(0xFF)
+            # only search timeout and priority if slave as searching
+            self.node.search_policy.apply(self.channel, self.device_type)
         else:
             self.channel.on_broadcast_tx_data = self._on_tx_data
             self.channel.on_acknowledge_data = self._on_ack_data
 
         self.channel.set_id(self.device_id, self.device_type, self.trans_type)
 
+        # wildcard search ignores devices already being tracked on other channels
+        if (
+            not self.master
+            and self.device_id == 0
+            and self.node.search_policy.exclude_tracked
+        ):
+            tracked = self.node.tracked_ids(self.device_type)
+            if tracked:
+                self.channel.set_id_list(tracked[-Channel.MAX_ID_LIST :], exclude=True)
+
         if extended:
             self.channel.enable_extended_messages(1)
 
@@ -291,8 +506,33 @@ class AntPlusDevice:
 
     def close_channel(self):
         """Closes and removes the device channel on the Node"""
+        self._channel_node.metrics.unregister(self.collect_metrics)
         self.node.remove_channel(self.channel)
 
+    def collect_metrics(self) -> List[Sample]:
+        """Pages decoded by page number as metrics `Sample`"""
+        labels = {"device": str(self), "device_type": str(self.device_type)}
+        return [
+            Sample(
+                "openant_device_pages_total",
+                count,
+                {**labels, "page": str(page)},
+                help="Pages decoded by device and page number",
+            )
+            for page, count in sorted(dict(self.page_counts).items())
+        ]
+
+    def set_id_list(self, ids: List[Tuple[int, int, int]], exclude: bool = False):
+        """
+        Only accept (or with `exclude` ignore) devices in `ids` when searching for wildcard device
+
+        :param ids List[Tuple[int, int, int]]: (device_id, device_type, trans_type) entries, 0 is a wildcard
+        :param exclude bool: list is an exclusion list
+        """
+        self.channel.close()
+        self.channel.set_id_list(ids, exclude)
+        self.channel.open()
+
     def request_dp(self, page: int = 71, no_times: int = 1):
         """
         Request datapage using the request page
@@ -317,9 +557,13 @@ class AntPlusDevice:
             self.channel.send_acknowledged_data(data)
         except AntException as e:
             if data[0] == 0x46:  # request page
-                _logger.warning(f"Failed to get acknowledgement of TX request page (0x46) {data[6]:#x}: {e}")
+                _logger.warning(
+                    f"Failed to get acknowledgement of TX request page (0x46) {data[6]:#x}: {e}"
+                )
             else:
-                _logger.warning(f"Failed to get acknowledgement of TX page {data[0]:#x}: {e}")
+                _logger.warning(
+                    f"Failed to get acknowledgement of TX page {data[0]:#x}: {e}"
+                )
 
     def on_data(self, data):
         """Override this to capture raw data when recieved in child classes"""
@@ -327,6 +571,10 @@ class AntPlusDevice:
         assert data
 
     def _on_data(self, data):
+        if self._channel_node.tracer is not None:
+            stamp(data, Stage.DECODE)
+        self.page_counts[data[0]] += 1
+
         # extended (> 8) has the device number and id beyond page
         if len(data) > 8 and not self._attached:
             device_id = data[9] + (data[10] << 8)
@@ -347,6 +595,9 @@ class AntPlusDevice:
                 raise RuntimeError(
                     f"Device ID #{device_id:05} does not match Device ID channel was set to #{self.device_id:05}!"
                 )
+            # searched for any transmission type of the device
+            elif self.trans_type == 0:
+                self.trans_type = trans_type
 
             _logger.info(
                 f"Device ID #{device_id:05} of type {device_type}:{trans_type} attached: {self}"
@@ -355,89 +606,83 @@ class AntPlusDevice:
             # else device id was set and device is found so attached
             self._attached = True
 
+            if self.pairing is not None:
+                self.pairing.pair(
+                    self.device_type, self.tag, self.device_id, self.trans_type
+                )
+
         # fire on_found after we could have obtained ext device data
         if not self._found:
             self._found = True
 
-            self.on_found()
+            self._on_found()
 
         # % Common Pages %
         # manufacturer info
         if data[0] == 80:
-            self.data["common"].hardware_rev = data[3]
-            self.data["common"].manufacturer_id = data[4] + (data[5] << 8)
-            self.data["common"].model_no = data[6] + (data[7] << 8)
+            MANUFACTURER_INFO.update(self.data["common"], data)
 
             _logger.info(
                 f"Manufacturer info {self}: HW Rev: {self.data['common'].hardware_rev}; ID: {self.data['common'].manufacturer_id}; Model: {self.data['common'].model_no}"
             )
         # product info
         elif data[0] == 81:
-            sw_rev = data[2]
-            sw_main = data[3]
+            sw_rev, sw_main, self.data["common"].serial_no = PRODUCT_INFO.decode(data)
 
             if sw_rev == 0xFF:
                 self.data["common"].software_ver = str(sw_main / 10)
             else:
                 self.data["common"].software_ver = str((sw_main * 100 + sw_rev) / 1000)
 
-            self.data["common"].serial_no = int.from_bytes(
-                data[4:8], byteorder="little"
-            )
-
             _logger.info(
                 f"Product info {self}: Software: {self.data['common'].software_ver}; Serial Number: {self.data['common'].serial_no}"
             )
         # battery status
         elif data[0] == 82:
-            self.data["common"].last_battery_data.voltage_fractional = data[6] / 256
-            self.data["common"].last_battery_data.voltage_coarse = data[7] & 0x0F
-            self.data["common"].last_battery_data.status = BatteryStatus(
-                (data[7] & 0x70) >> 4
-            )
-            self.data["common"].last_battery_data.battery_id = (data[2] & 0xF0) >> 4
-
-            cumulative_resolution_bit = (data[7] & 0x80) == 0x80
-
-            if cumulative_resolution_bit:
-                self.data["common"].last_battery_data.operating_time = (
-                    int.from_bytes(data[3:5], byteorder="little") * 2
+            (
+                identifier,
+                number,
+                battery_id,
+                operating_time,
+                voltage_fractional,
+                voltage_coarse,
+                status,
+                resolution_2s,
+            ) = BATTERY_STATUS.decode(data)
+            battery = self.data["common"].last_battery_data
+            battery.voltage_fractional = voltage_fractional
+            battery.voltage_coarse = voltage_coarse
+            battery.status = status
+            battery.battery_id = battery_id
+            battery.operating_time = operating_time * (2 if resolution_2s else 16)
+
+            # if system has multiple batteries to report, assign to ID in batteries
+            if identifier != 0xFF:
+                self.data["common"].battery_number = number
+                self.data["common"].last_battery_id = battery_id
+                # copy the dataclass to batteries
+                self.data["batteries"][self.data["common"].last_battery_id] = (
+                    dataclasses.replace(self.data["common"].last_battery_data)
                 )
-            else:
-                self.data["common"].last_battery_data.operating_time = (
-                    int.from_bytes(data[3:5], byteorder="little") * 16
-                )
-
-            # if system has multiple batteries to report, assign to index in batteries list
-            if data[2] != 0xFF:
-                self.data["common"].battery_number = data[2] & 0x0F
-                self.data["common"].last_battery_id = (data[2] & 0xF0) >> 4
-                # copy the dataclass to batteries list
-                self.data["batteries"][
-                    self.data["common"].last_battery_id
-                ] = dataclasses.replace(self.data["common"].last_battery_data)
             # else not using ID so just report that as invalid and 1 battery
             else:
                 self.data["common"].battery_number = 1
-                self.data["common"].last_battery_id = data[2]
+                self.data["common"].last_battery_id = identifier
 
             self._on_battery(self.data["common"].last_battery_data)
         # date and time
         elif data[0] == 83:
-            second = data[2]
-            minute = data[3]
-            hour = data[4]
-            # day_of_month = (data[5] & 0xE0) >> 5 # bits 5-7
-            day = data[5] & 0x1F  # bits 0-4
-            month = data[6]
-            year = data[7] + 2000
+            # day of week in bits 5-7 of the day
+            second, minute, hour, day, month, year = DATE_TIME.decode(data)
 
             try:
                 self.data["common"].timedate = datetime.datetime(
                     year, month, day, hour, minute, second
                 )
             except ValueError as e:
-                _logger.warning(f"Invalid date and time: {e}. Device {self.device_id} raw_data: {data}")
+                _logger.warning(
+                    f"Invalid date and time: {e}. Device {self.device_id} raw_data: {data}"
+                )
 
         # run other pages for sub-classes
         self.on_data(data)
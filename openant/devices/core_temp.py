@@ -6,6 +6,7 @@ from dataclasses import dataclass, field
 
 from ..easy.node import Node
 from .common import DeviceData, AntPlusDevice, DeviceType, BatteryStatus
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -32,6 +33,23 @@ class CoteTemperatureData(DeviceData):
     core_temp: float = field(default=0, metadata={"unit": "°C"})
 
 
+GENERAL_INFO = Page(
+    "general_info", [Field("quality", 2, enum=CoreTempDataQuality)], number=0x00
+)
+
+CORE_TEMPERATURE = Page(
+    "core_temperature",
+    [
+        Field("event_count", 1),
+        # skin temperature MSN is in the top of the byte after its LSB
+        Field("skin_temp_lsb", 3),
+        Field("skin_temp_msn", 4, shift=4, bits=4),
+        Field("core_temp", 6, size=2, scale=0.01),
+    ],
+    number=0x01,
+)
+
+
 class CoreTemperature(AntPlusDevice):
     def __init__(
         self,
@@ -60,16 +78,18 @@ class CoreTemperature(AntPlusDevice):
 
         # General info
         if page == 0x00:
-            self.data["core_temp"].quality = CoreTempDataQuality(data[2])
+            GENERAL_INFO.update(self.data["core_temp"], data)
 
         # core temp main page
         elif page == 0x01:
-            self._event_cout = data[1]
+            (
+                self._event_cout,
+                skin_temp_lsb,
+                skin_temp_msn,
+                self.data["core_temp"].core_temp,
+            ) = CORE_TEMPERATURE.decode(data)
             self.data["core_temp"].skin_temp = (
-                data[3] | ((data[4] & 0xF0) << 4)
+                skin_temp_lsb | (skin_temp_msn << 8)
             ) * 0.05
-            self.data["core_temp"].core_temp = (
-                int.from_bytes(data[6:8], byteorder="little") * 0.01
-            )
 
-        self.on_device_data(page, "core_temp", self.data["core_temp"])
+        self._on_device_data(page, "core_temp", self.data["core_temp"])
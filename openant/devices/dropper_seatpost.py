@@ -5,6 +5,7 @@ from dataclasses import dataclass, field
 
 from ..easy.node import Node
 from .common import BatteryData, DeviceData, AntPlusDevice, DeviceType
+from .schema import Field, Page
 from .shift import ShiftingSystemID
 
 _logger = logging.getLogger(__name__)
@@ -34,6 +35,30 @@ class DropperSeatpostData(DeviceData):
     command_sequence: int = 0
 
 
+STATUS = Page(
+    "dropper_seatpost_status",
+    [
+        Field("event_count", 4, size=2),
+        Field("delay", 6, bits=7),
+        Field("delay_indicator", 6, shift=7, bits=1, enum=DelayIndicator),
+        Field("valve_state", 7, shift=7, bits=1, enum=ValveState),
+    ],
+    number=0x01,
+)
+
+SETTINGS = Page(
+    "settings",
+    [
+        Field("slave_serial", 1, size=2),
+        # increment with each command
+        Field("command_sequence", 3),
+        # other bits reserved
+        Field("lock_setting", 4, bits=1, enum=ValveState),
+    ],
+    number=0x20,
+)
+
+
 class DropperSeatpost(AntPlusDevice):
     def __init__(
         self,
@@ -64,7 +89,7 @@ class DropperSeatpost(AntPlusDevice):
                 f"Battery info {self}: ID: {self.data['common'].last_battery_id}; Fractional V: {self.data['common'].last_battery_data.voltage_fractional} V; Coarse V: {self.data['common'].last_battery_data.voltage_coarse} V; Status: {self.data['common'].last_battery_data.status}"
             )
 
-        self.on_battery(data)
+        self._callback("on_battery", data)
 
     def on_data(self, data):
         page = data[0]
@@ -73,19 +98,18 @@ class DropperSeatpost(AntPlusDevice):
 
         # main page
         if page == 0x01:
+            (
+                event_count,
+                delay,
+                self.data["dropper_seatpost"].delay_indicator,
+                self.data["dropper_seatpost"].valve_state,
+            ) = STATUS.decode(data)
             self._event_count[0] = self._event_count[1]
-            self._event_count[1] = int.from_bytes(data[4:6], byteorder="little")
+            self._event_count[1] = event_count
 
-            delay = data[6] & 0x7F
             self.data["dropper_seatpost"].configured_unlock_delay = (
                 0x7F if delay == 0x7F else delay * 1e-2
             )  # in 100 ms
-            self.data["dropper_seatpost"].delay_indicator = DelayIndicator(
-                (data[6] & 0x80 >> 7)
-            )
-            self.data["dropper_seatpost"].valve_state = ValveState(
-                (data[7] & 0x80) >> 7
-            )
 
             delta_update_count = (
                 self._event_count[1] + 256 - self._event_count[0]
@@ -96,20 +120,12 @@ class DropperSeatpost(AntPlusDevice):
                 _logger.info(
                     f"Seat post state change {self}: {self.data['dropper_seatpost']}"
                 )
-                self.on_device_data(
+                self._on_device_data(
                     page, "dropper_seatpost_status", self.data["dropper_seatpost"]
                 )
         # settings page
         elif page == 0x20:
-            self.data["dropper_seatpost"].slave_serial = int.from_bytes(
-                data[1:3], byteorder="little"
-            )
-            self.data["dropper_seatpost"].command_sequence = data[
-                3
-            ]  # increment with each command
-            self.data["dropper_seatpost"].lock_setting = ValveState(
-                data[4] & 0x01
-            )  # other bits reserved
+            SETTINGS.update(self.data["dropper_seatpost"], data)
 
     def set_data(
         self,
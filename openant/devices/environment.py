@@ -5,6 +5,7 @@ import logging
 from dataclasses import dataclass, field
 
 from .common import DeviceData, AntPlusDevice, DeviceType, BatteryStatus
+from .schema import Field, Page
 from ..easy.node import Node
 
 _logger = logging.getLogger(__name__)
@@ -19,6 +20,18 @@ class EnvironmentData(DeviceData):
     max_24h_temperature: float = field(default=-1, metadata={"unit": "C"})
 
 
+TEMPERATURE = Page(
+    "temperature",
+    [
+        # signed 12 bit 24 hour low and high share the middle byte, 0.1 C
+        Field("min_24h_temperature", 3, size=2, bits=12, signed=True, scale=0.1),
+        Field("max_24h_temperature", 4, size=2, shift=4, signed=True, scale=0.1),
+        Field("temperature", 6, size=2, signed=True, scale=0.01),
+    ],
+    number=0x01,
+)
+
+
 class Environment(AntPlusDevice):
     def __init__(
         self,
@@ -44,17 +57,6 @@ class Environment(AntPlusDevice):
 
         if page == 1:
             # Data page 1, temperature info
-            # bytes 6,7 indicate temperature, LSB first
-            low_msn = (data[4] & 0xF0)>>4
-            high_lsn = (data[4] & 0x0F)<<4
-            self.data["environment"].temperature = (
-                int.from_bytes(data[6:8], byteorder="little") * 0.01
-            )
-            self.data["environment"].min_24h_temperature = (
-                int.from_bytes([data[3], low_msn], byteorder="little") * 0.1
-            )
-            self.data["environment"].max_24h_temperature = (
-                (int.from_bytes([data[5],high_lsn], byteorder="big")>>4) * 0.1
-            )
-
-            self.on_device_data(page, "environment", self.data["environment"])
+            TEMPERATURE.update(self.data["environment"], data)
+
+            self._on_device_data(page, "environment", self.data["environment"])
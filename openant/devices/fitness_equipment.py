@@ -13,6 +13,7 @@ from ..easy.node import Node
 
 from .common import DeviceData, AntPlusDevice, DeviceType
 from .power_meter import PowerData
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -86,6 +87,65 @@ class FitnessEquipmentData(DeviceData):
     target_resistance: float = 255.0
 
 
+# FE state in bits 4-6 of the last byte of general pages
+_STATE = Field("state", 7, shift=4, bits=3, enum=FitnessEquipmentState)
+
+STANDARD_POWER = Page(
+    "standard_power",
+    [
+        Field("event_count", 1, rollover=True),
+        Field("cadence", 2),
+        Field("accumulated_power", 3, size=2, rollover=True),
+        Field("instantaneous_power", 5, size=2, bits=12),
+    ],
+    number=0x19,
+)
+
+STANDARD_TORQUE = Page(
+    "standard_torque",
+    [
+        Field("event_count", 1, rollover=True),
+        Field("wheel_ticks", 2, rollover=True),
+        Field("wheel_period", 4, size=2, rollover=True),
+        Field("accumulated_torque", 6, size=2, rollover=True),
+        _STATE,
+    ],
+    number=0x1A,
+)
+
+GENERAL_FE = Page(
+    "general_fe",
+    [
+        Field("type", 1),
+        Field("capabilities", 2, bits=4),
+        Field("speed", 4, size=2, scale=0.001, digits=3),
+        _STATE,
+    ],
+    number=0x10,
+)
+
+GENERAL_SETTINGS = Page(
+    "general_settings",
+    [
+        Field("type", 1),
+        Field("incline", 4, size=2, scale=0.01, digits=2, invalid=0x7FFF),
+        Field("resistance", 6, scale=0.5, digits=1),
+    ],
+    number=0x11,
+)
+
+COMMAND_STATUS = Page(
+    "command_status",
+    [
+        Field("resistance_mode", 1, enum=ResistenceMode),
+        Field("command_status", 3, enum=CommandStatus),
+        Field("target_power", 6, size=2, scale=0.25, digits=2),
+        Field("basic_resistance", 7, scale=0.5, digits=1),
+    ],
+    number=0x47,
+)
+
+
 @dataclass
 class Workout:
     """
@@ -236,14 +296,18 @@ class FitnessEquipment(AntPlusDevice):
 
         # standard power
         if page == 0x19:
+            (
+                event_count,
+                self.data["power"].cadence,
+                accumulated_power,
+                self.data["power"].instantaneous_power,
+            ) = STANDARD_POWER.decode(data)
+
             self._power_update_event_count[0] = self._power_update_event_count[1]
-            self._power_update_event_count[1] = data[1]
+            self._power_update_event_count[1] = event_count
 
             self._accumulated_power[0] = self._accumulated_power[1]
-            self._accumulated_power[1] = data[3] + (data[4] << 8)
-
-            self.data["power"].cadence = data[2]
-            self.data["power"].instantaneous_power = data[5] + ((data[6] & 0x0F) << 8)
+            self._accumulated_power[1] = accumulated_power
 
             delta_update_count = (
                 self._power_update_event_count[1]
@@ -268,20 +332,28 @@ class FitnessEquipment(AntPlusDevice):
                     f"Standard power update {self}: {self.data['power'].instantaneous_power} W; Average Power: {self.data['power'].average_power} W; Cadence {self.data['power'].cadence} rpm"
                 )
 
-                self.on_device_data(page, "standard_power", self.data["power"])
+                self._on_device_data(page, "standard_power", self.data["power"])
         # standard torque
         elif page == 0x1A:
+            (
+                event_count,
+                wheel_ticks,
+                wheel_period,
+                accumulated_torque,
+                self.data["fe"].state,
+            ) = STANDARD_TORQUE.decode(data)
+
             self._torque_update_event_count[0] = self._torque_update_event_count[1]
-            self._torque_update_event_count[1] = data[1]
+            self._torque_update_event_count[1] = event_count
 
             self._wheel_ticks[0] = self._wheel_ticks[1]
-            self._wheel_ticks[1] = data[2]
+            self._wheel_ticks[1] = wheel_ticks
 
             self._wheel_period[0] = self._wheel_period[1]
-            self._wheel_period[1] = data[4] + (data[5] << 8)
+            self._wheel_period[1] = wheel_period
 
             self._accumulated_torque[0] = self._accumulated_torque[1]
-            self._accumulated_torque[1] = data[6] + (data[7] << 8)
+            self._accumulated_torque[1] = accumulated_torque
 
             # do the maths on new data
             delta_update_count = (
@@ -296,8 +368,6 @@ class FitnessEquipment(AntPlusDevice):
                 self._wheel_period[1] + 65536 - self._wheel_period[0] % 65536
             )
 
-            self.data["fe"].state = FitnessEquipmentState(data[7] & 0x70 >> 4)
-
             # if it's a new event (count change)
             if delta_update_count:
                 self.data["power"].torque = round(
@@ -321,44 +391,40 @@ class FitnessEquipment(AntPlusDevice):
                     f"Standard torque update {self}: {self.data['power'].average_power} W; Angular Velocity {self.data['power'].angular_velocity} rad/s; Average Torque: {self.data['power'].torque} Nm"
                 )
 
-                self.on_device_data(page, "standard_torque", self.data["power"])
+                self._on_device_data(page, "standard_torque", self.data["power"])
         # general FE data
         elif page == 0x10:
-            self.data["fe"].type = data[1]
-            self.data["fe"].capabilities = data[2] & 0x0F
-            self.data["fe"].speed = round((data[4] + (data[5] << 8)) / 1000, 3)
-            self.data["fe"].state = FitnessEquipmentState(data[7] & 0x70 >> 4)
+            GENERAL_FE.update(self.data["fe"], data)
 
             _logger.info(
                 f"General FE {self}: Type: {self.data['fe'].type}; State: {self.data['fe'].state}"
             )
 
-            self.on_device_data(page, "general_fe", self.data["fe"])
+            self._on_device_data(page, "general_fe", self.data["fe"])
         # general settings
         elif page == 0x11:
-            self.data["fe"].type = data[1]
-            self.data["fe"].resistance = round(data[6] / 2, 1)
-            incline = data[4] + (data[5] << 8)
-            if incline != 0x7FFF:
-                self.data["fe"].incline = round(incline / 100, 2)  # 0.01 %
+            GENERAL_SETTINGS.update(self.data["fe"], data)
 
             _logger.info(
                 f"General settings {self}: Type: {self.data['fe'].type}; Resistence: {self.data['fe'].resistance}"
             )
 
-            self.on_device_data(page, "general_settings", self.data["fe"])
+            self._on_device_data(page, "general_settings", self.data["fe"])
         # datapage reply 71
         elif page == 0x47:
-            self.data["fe"].resistance_mode = ResistenceMode(data[1])
+            (
+                self.data["fe"].resistance_mode,
+                self.command_status,
+                target_power,
+                basic_resistance,
+            ) = COMMAND_STATUS.decode(data)
 
             if self.data["fe"].resistance_mode == ResistenceMode.Basic:
-                self.data["fe"].resistance = round(data[7] / 2, 1)
+                self.data["fe"].resistance = basic_resistance
             elif self.data["fe"].resistance_mode == ResistenceMode.TargetPower:
-                self.data["fe"].resistance = round((data[6] + (data[7] << 8)) / 4, 2)
+                self.data["fe"].resistance = target_power
             # not bothered about the others
 
-            self.command_status = CommandStatus(data[3])
-
             if self.command_status not in (
                 CommandStatus.Pass,
                 CommandStatus.Unitialised,
@@ -0,0 +1,222 @@
+"""
+Compact store of the latest device data of a fleet of devices
+
+Each device normally keeps its data in dataclass instances of its own. A
+`FleetStore` instead holds the fields of one `DeviceData` class for any
+number of devices as columns indexed by device slot: int and float fields
+in typed `array.array` columns of 8 bytes a device, other fields in lists.
+Indexing it by device key gives a view that reads and writes the columns
+but otherwise behaves as the dataclass, so pages decode into it and it
+serializes as usual:
+
+.. code-block:: python
+
+    common = FleetStore(CommonData)
+    scanner = Scanner(node, store=common)  # scanner.common is now the store
+
+    power = FleetStore(PowerData)
+    for meter in meters:
+        meter.use_store(power)
+
+    power["1234:11"].instantaneous_power  # as meter.data["power"]
+    power.column("instantaneous_power")  # of every device, by slot
+
+A column keeps values of exactly its hinted type; the first value of another
+type (such as a float in an int field, or None) turns it into a list so values
+read back are always those written.
+"""
+import array
+import dataclasses
+import functools
+import typing
+from typing import Any, Dict, Hashable, Iterator, List, MutableMapping, Optional
+
+# array type code of field hints stored in arrays
+_TYPECODES = {int: "q", float: "d"}
+
+
+def _field_property(index: int, name: str) -> property:
+    def get(self):
+        return self._store._columns[index][self._slot]
+
+    def set(self, value):
+        self._store._set(index, self._slot, value)
+
+    return property(get, set, doc=f"{name} of the device in the store")
+
+
+@functools.lru_cache(maxsize=None)
+def _view_class(data_class: type) -> type:
+    """Subclass of `data_class` with fields read from and written to a store"""
+
+    names = [f.name for f in dataclasses.fields(data_class)]
+
+    def __init__(self, store: "FleetStore", slot: int):
+        self._store = store
+        self._slot = slot
+
+    def __eq__(self, other):
+        # equal to instances of the dataclass with the same values too
+        if not isinstance(other, data_class):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in names)
+
+    namespace: Dict[str, Any] = {
+        "__slots__": ("_store", "_slot"),
+        "__init__": __init__,
+        "__eq__": __eq__,
+        "__hash__": None,
+        "__module__": data_class.__module__,
+        # repr and serialized measurement as the dataclass
+        "__qualname__": data_class.__qualname__,
+    }
+    for index, name in enumerate(names):
+        namespace[name] = _field_property(index, name)
+    return type(data_class.__name__, (data_class,), namespace)
+
+
+class FleetStore(MutableMapping):
+    """
+    Latest values of dataclass `data_class` by device key, e.g. "device_id:device_type"
+
+    Getting a key gives a view of its slot; setting a key copies the fields
+    of a `data_class` instance (or view) into its slot. Slots of deleted
+    keys are reused, so views of them should not be kept. Views cannot be
+    copied with `dataclasses.replace`, use `snapshot`.
+
+    >>> from openant.devices.power_meter import PowerData
+    >>> store = FleetStore(PowerData)
+    >>> store.view("1:11").instantaneous_power = 250
+    >>> store["1:11"]
+    PowerData(instantaneous_power=250, average_power=0, left_power=-1, right_power=-1, torque=0.0, angular_velocity=0.0, cadence=255)
+    >>> store.column("instantaneous_power")
+    array('q', [250])
+    """
+
+    def __init__(self, data_class: type):
+        if not dataclasses.is_dataclass(data_class):
+            raise TypeError(f"{data_class} is not a dataclass")
+        self.data_class = data_class
+        self._view_class = _view_class(data_class)
+        self._fields = dataclasses.fields(data_class)
+        try:
+            hints = typing.get_type_hints(data_class)
+        except Exception:
+            hints = {}
+
+        # type of every value of each array column, None for list columns
+        self._types: List[Optional[type]] = []
+        self._columns: List[typing.MutableSequence] = []
+        for f in self._fields:
+            if f.default is dataclasses.MISSING and (
+                f.default_factory is dataclasses.MISSING
+            ):
+                raise TypeError(f"{data_class.__name__}.{f.name} has no default")
+            hint = hints.get(f.name)
+            if hint in _TYPECODES and f.default.__class__ is hint:
+                self._types.append(hint)
+                self._columns.append(array.array(_TYPECODES[hint]))
+            else:
+                self._types.append(None)
+                self._columns.append([])
+
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+
+    def __repr__(self):
+        return f"FleetStore({self.data_class.__name__}, {len(self)} devices)"
+
+    def _set(self, index: int, slot: int, value):
+        column = self._columns[index]
+        kind = self._types[index]
+        if kind is not None and value.__class__ is not kind:
+            column = self._to_list(index)
+        try:
+            column[slot] = value
+        except OverflowError:
+            self._to_list(index)[slot] = value
+
+    def _to_list(self, index: int) -> list:
+        """Column `index` as a list, holding values of any type from now on"""
+        column = self._columns[index] = list(self._columns[index])
+        self._types[index] = None
+        return column
+
+    def _defaults(self, slot: int):
+        for index, f in enumerate(self._fields):
+            if f.default_factory is not dataclasses.MISSING:
+                value = f.default_factory()
+            else:
+                value = f.default
+            if slot == self._size:
+                # array columns only hold defaults of their type
+                self._columns[index].append(value)
+            else:
+                self._set(index, slot, value)
+
+    def slot(self, key: Hashable) -> int:
+        """Slot of `key` in the columns, allocated with default values if new"""
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = self._size
+                self._defaults(slot)
+                self._size += 1
+            self._slots[key] = slot
+        return slot
+
+    def view(self, key: Hashable):
+        """View of `key`, added with default values if new"""
+        return self._view_class(self, self.slot(key))
+
+    def column(self, name: str) -> typing.Sequence:
+        """
+        Values of field `name` of every slot, an array or list indexed by `slot`
+
+        Slots of deleted keys have default values. Changes as devices are
+        added and values of other types are set, so get it again when used.
+        """
+        for index, f in enumerate(self._fields):
+            if f.name == name:
+                return self._columns[index]
+        raise KeyError(name)
+
+    def snapshot(self, key: Hashable):
+        """Values of `key` copied into a new instance of `data_class`"""
+        slot = self._slots[key]
+        data = self.data_class(
+            **{
+                f.name: self._columns[index][slot]
+                for index, f in enumerate(self._fields)
+                if f.init
+            }
+        )
+        for index, f in enumerate(self._fields):
+            if not f.init:
+                setattr(data, f.name, self._columns[index][slot])
+        return data
+
+    def __getitem__(self, key: Hashable):
+        return self._view_class(self, self._slots[key])
+
+    def __setitem__(self, key: Hashable, data):
+        slot = self.slot(key)
+        for index, f in enumerate(self._fields):
+            self._set(index, slot, getattr(data, f.name))
+
+    def __delitem__(self, key: Hashable):
+        slot = self._slots.pop(key)
+        self._defaults(slot)
+        self._free.append(slot)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key) -> bool:
+        return key in self._slots
@@ -6,7 +6,8 @@ import logging
 from dataclasses import dataclass, field
 
 from ..easy.node import Node
-from .common import DeviceData, AntPlusDevice, DeviceType, BatteryStatus
+from .common import BATTERY_VOLTAGE, DeviceData, AntPlusDevice, DeviceType
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -26,6 +27,37 @@ class HeartRateData(DeviceData):
     battery_percentage: int = 0xFF
 
 
+# all pages 0-7 start with the page specific bytes and end with the beat
+HEART_RATE = Page(
+    "heart_rate",
+    [
+        Field("page_specific", 1, size=3),
+        Field("beat_time", 4, size=2, scale=1 / 1024, rollover=True),
+        Field("beat_count", 6, rollover=True),
+        Field("heart_rate", 7),
+    ],
+)
+
+OPERATING_TIME = Page("operating_time", [Field("operating_time", 1, size=3, scale=2)])
+
+MANUFACTURER_INFO = Page(
+    "manufacturer_info",
+    [Field("manufacturer_id_lsb", 1), Field("serial_number", 2, size=2)],
+)
+
+PREVIOUS_HEART_BEAT = Page(
+    "previous_heart_beat",
+    [Field("previous_heart_beat_time", 2, size=2, scale=1 / 1024)],
+)
+
+CAPABILITIES = Page(
+    "capabilities",
+    [Field("features_supported", 2), Field("features_enabled", 3)],
+)
+
+BATTERY_STATUS = Page("battery_status", [Field("battery_percentage", 1)])
+
+
 class HeartRate(AntPlusDevice):
     def __init__(
         self,
@@ -54,50 +86,30 @@ class HeartRate(AntPlusDevice):
 
         # MSB is page change toggle, 0-7 can be rotated with page specific data but all include these bytes
         if (page & 0x0F) <= 7:
+            HEART_RATE.update(self.data["heart_rate"], data)
             self._event_count[0] = self._event_count[1]
-            self._event_count[1] = data[6]
+            self._event_count[1] = self.data["heart_rate"].beat_count
             dp = page & 0x0F
 
-            self.data["heart_rate"].page_specific = int.from_bytes(
-                data[1:4], byteorder="little"
-            )
-            self.data["heart_rate"].beat_time = (
-                int.from_bytes(data[4:6], byteorder="little") / 1024
-            )
-            self.data["heart_rate"].beat_count = data[6]
-            self.data["heart_rate"].heart_rate = data[7]
-
             if dp == 0x01:
-                self.data["heart_rate"].operating_time = (
-                    self.data["heart_rate"].page_specific * 2
-                )
+                OPERATING_TIME.update(self.data["heart_rate"], data)
             elif dp == 0x02:
-                self.data["heart_rate"].manufacturer_id_lsb = data[1]
-                self.data["heart_rate"].serial_number = int.from_bytes(
-                    data[2:4], byteorder="little"
-                )
+                MANUFACTURER_INFO.update(self.data["heart_rate"], data)
             # background page product info
             elif dp == 0x03:
                 pass
             # main page previous heart beat
             elif dp == 0x04:
-                self.data["heart_rate"].previous_heart_beat_time = (
-                    int.from_bytes(data[2:4], byteorder="little") / 1024
-                )
+                PREVIOUS_HEART_BEAT.update(self.data["heart_rate"], data)
             # swim interval stuff
             elif dp == 0x05:
                 pass
             elif dp == 0x06:
-                self.data["heart_rate"].features_supported = data[2]
-                self.data["heart_rate"].features_enabled = data[3]
+                CAPABILITIES.update(self.data["heart_rate"], data)
             elif dp == 0x07:
-                self.data["heart_rate"].battery_percentage = data[1]
-                self.data["common"].last_battery_data.voltage_fractional = data[2] / 256
-                self.data["common"].last_battery_data.voltage_coarse = data[3] & 0x0F
-                self.data["common"].last_battery_data.status = BatteryStatus(
-                    (data[3] & 0x70) >> 4
-                )
+                BATTERY_STATUS.update(self.data["heart_rate"], data)
+                BATTERY_VOLTAGE.update(self.data["common"].last_battery_data, data)
                 # trigger the on battery callback
                 self._on_battery(self.data["common"].last_battery_data)
 
-            self.on_device_data(page, "heart_rate", self.data["heart_rate"])
+            self._on_device_data(page, "heart_rate", self.data["heart_rate"])
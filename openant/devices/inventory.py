@@ -0,0 +1,194 @@
+"""
+Persistent inventory of devices seen, in SQLite
+
+`Scanner.save` writes the devices found to JSON when a scan ends. A
+`DeviceInventory` passed to a `Scanner` is instead written as devices are
+found and their common pages change, with when each was first and last
+seen, so it survives a crash and can be queried at startup:
+
+.. code-block:: python
+
+    with DeviceInventory("devices.db") as inventory:
+        scanner = Scanner(node, inventory=inventory)
+        ...
+
+    with DeviceInventory("devices.db") as inventory:
+        for device in inventory.devices(DeviceType.PowerMeter):
+            print(device.device_id, device.serial_no, device.last_seen)
+
+Times are seconds since the epoch. Last seen times are written in batches,
+see `Scanner`.
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple, Union
+
+from .common import CommonData, DeviceType
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    device_id INTEGER NOT NULL,
+    device_type INTEGER NOT NULL,
+    trans_type INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    manufacturer_id INTEGER,
+    serial_no INTEGER,
+    model_no INTEGER,
+    hardware_rev INTEGER,
+    software_ver TEXT,
+    PRIMARY KEY (device_id, device_type, trans_type)
+);
+CREATE INDEX IF NOT EXISTS devices_by_type ON devices (device_type, last_seen);
+"""
+
+_COMMON = ("manufacturer_id", "serial_no", "model_no", "hardware_rev", "software_ver")
+
+# values of `CommonData` before the common pages are received
+_NOT_RECEIVED = {name: getattr(CommonData(), name) for name in _COMMON}
+
+
+@dataclass
+class InventoryDevice:
+    """A device in the inventory, common data None until received"""
+
+    device_id: int
+    device_type: int
+    trans_type: int
+    first_seen: float
+    last_seen: float
+    manufacturer_id: Optional[int] = None
+    serial_no: Optional[int] = None
+    model_no: Optional[int] = None
+    hardware_rev: Optional[int] = None
+    software_ver: Optional[str] = None
+
+    @property
+    def device(self) -> Tuple[int, int, int]:
+        """(device_id, device_type, trans_type) as `Scanner.found`"""
+        return (self.device_id, self.device_type, self.trans_type)
+
+
+class DeviceInventory:
+    """
+    Devices seen, in SQLite database `path`, e.g. "devices.db" or ":memory:"
+
+    Each change is committed when made; the connection can be used from
+    the node thread the scanner writes from and any other.
+
+    >>> inventory = DeviceInventory(":memory:")
+    >>> inventory.found((1234, 120, 1), now=100.0)
+    >>> inventory.update_common((1234, 120, 1), CommonData(serial_no=42))
+    >>> inventory.get((1234, 120, 1)).serial_no
+    42
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection as connection:
+            if path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+                # committed transactions can only be lost with the OS, not the process
+                connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f"DeviceInventory({self.path!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def found(self, device: Tuple[int, int, int], now: Optional[float] = None):
+        """Add `device` seen at `now`, the current time if None; marked seen if known"""
+        if now is None:
+            now = time.time()
+        with self._lock, self._connection as connection:
+            connection.execute(
+                "INSERT INTO devices (device_id, device_type, trans_type, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (device_id, device_type, trans_type) "
+                "DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                (*device, now, now),
+            )
+
+    def seen(self, devices: Iterable[Tuple[Tuple[int, int, int], float]]):
+        """Set last seen times of known devices from (device, time) pairs, in one transaction"""
+        with self._lock, self._connection as connection:
+            connection.executemany(
+                "UPDATE devices SET last_seen = MAX(last_seen, ?) "
+                "WHERE device_id = ? AND device_type = ? AND trans_type = ?",
+                ((seen, *device) for device, seen in devices),
+            )
+
+    def update_common(self, device: Tuple[int, int, int], common: CommonData):
+        """Set the common data of known `device`, leaving that not received unset"""
+        values = []
+        for name in _COMMON:
+            value = getattr(common, name)
+            if value == _NOT_RECEIVED[name]:
+                value = None
+            values.append(value)
+        with self._lock, self._connection as connection:
+            connection.execute(
+                "UPDATE devices SET "
+                + ", ".join(f"{name} = COALESCE(?, {name})" for name in _COMMON)
+                + " WHERE device_id = ? AND device_type = ? AND trans_type = ?",
+                (*values, *device),
+            )
+
+    def get(self, device: Tuple[int, int, int]) -> Optional[InventoryDevice]:
+        rows = self._select(
+            "WHERE device_id = ? AND device_type = ? AND trans_type = ?", device
+        )
+        return rows[0] if rows else None
+
+    def devices(
+        self,
+        device_type: Optional[Union[DeviceType, int]] = None,
+        since: Optional[float] = None,
+    ) -> List[InventoryDevice]:
+        """Devices of `device_type` (all if None) seen since `since`, most recently seen first"""
+        where = []
+        parameters: list = []
+        if device_type is not None:
+            where.append("device_type = ?")
+            parameters.append(
+                device_type.value
+                if isinstance(device_type, DeviceType)
+                else device_type
+            )
+        if since is not None:
+            where.append("last_seen >= ?")
+            parameters.append(since)
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        return self._select(clause + "ORDER BY last_seen DESC", parameters)
+
+    def _select(self, clause: str, parameters) -> List[InventoryDevice]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT device_id, device_type, trans_type, first_seen, last_seen, "
+                + ", ".join(_COMMON)
+                + " FROM devices "
+                + clause,
+                tuple(parameters),
+            ).fetchall()
+        return [InventoryDevice(*row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM devices"
+            ).fetchone()
+        return count
@@ -4,6 +4,7 @@ from enum import Enum
 
 from ..easy.node import Node
 from .common import AntPlusDevice, DeviceData, DeviceType
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -119,6 +120,107 @@ class LevDisplayCommand(DeviceData):
         return i.to_bytes(2, byteorder="little")
 
 
+def _travel_mode(byte):
+    return [
+        Field("current_assist_level", byte, shift=3, bits=3),
+        Field("current_regenerative_level", byte, bits=3),
+    ]
+
+
+def _system_state(byte):
+    return [
+        Field("manual_throttle", byte, shift=4, bits=1, enum=bool),
+        Field("lights", byte, shift=3, bits=1, enum=bool),
+        Field("light_high_beam", byte, shift=2, bits=1, enum=bool),
+        Field("turn_signal_left", byte, shift=1, bits=1, enum=bool),
+        Field("turn_signal_right", byte, bits=1, enum=bool),
+    ]
+
+
+def _gear_state(byte):
+    return [
+        Field("gear_exist", byte, shift=7, bits=1, enum=bool),
+        Field("gear_manual", byte, shift=6, bits=1, enum=bool),
+        Field("gear_rear", byte, shift=2, bits=3),
+        Field("gear_front", byte, bits=2),
+    ]
+
+
+# 0.1 km/h units, only first 4 bits of byte 7
+_SPEED = Field("speed", 6, size=2, bits=12, scale=0.1)
+# 0.01 km units
+_ODOMETER = Field("odometer", 1, size=3, scale=0.01)
+
+SPEED_SYSTEM = Page(
+    "speed_system",
+    [
+        Field("motor_temperature", 1, shift=4, bits=3, enum=TemperatureState),
+        Field("motor_alert", 1, shift=7, bits=1, enum=TemperatureAlert),
+        Field("battery_temperature", 1, bits=3, enum=TemperatureState),
+        Field("battery_alert", 1, shift=3, bits=1, enum=TemperatureAlert),
+        *_travel_mode(2),
+        *_system_state(3),
+        *_gear_state(4),
+        Field("error_message", 5, enum=LevErrorMessage),
+        _SPEED,
+    ],
+    number=0x01,
+)
+
+SPEED_DISTANCE = Page(
+    "speed_distance",
+    [_ODOMETER, Field("remaining_range", 4, size=2, bits=12), _SPEED],
+    number=0x02,
+)
+
+ALT_SPEED_DISTANCE = Page(
+    "alt_speed_distance",
+    [_ODOMETER, Field("fuel_consumption", 4, size=2, bits=12, scale=0.1), _SPEED],
+    number=0x22,
+)
+
+SYSTEM_SPEED_2 = Page(
+    "system_speed_2",
+    [
+        Field("battery_soc", 1, bits=7),
+        *_travel_mode(2),
+        *_system_state(3),
+        *_gear_state(4),
+        Field("assist", 5),
+        _SPEED,
+    ],
+    number=0x03,
+)
+
+BATTERY = Page(
+    "battery",
+    [
+        Field("battery_cycles", 2, size=2, bits=12),
+        # fuel consumption MSN is in the top of the byte before its LSB
+        Field("fuel_consumption_msn", 3, shift=4, bits=4),
+        Field("fuel_consumption_lsb", 4),
+        Field("battery_voltage", 5, scale=0.25),
+        Field("battery_distance_charge", 6, size=2),
+    ],
+    number=0x04,
+)
+
+CAPABILITIES = Page(
+    "capabilities",
+    [
+        Field("supported_assist_levels", 2, shift=3, bits=3),
+        Field("supported_regenerative_levels", 2, bits=3),
+        Field("wheel_circumference", 3, size=2, bits=12),
+    ],
+    number=0x05,
+)
+
+# the state bytes on their own
+TRAVEL_MODE = Page("travel_mode", _travel_mode(0), size=1)
+SYSTEM_STATE = Page("system_state", _system_state(0), size=1)
+GEAR_STATE = Page("gear_state", _gear_state(0), size=1)
+
+
 class Lev(AntPlusDevice):
     def __init__(
         self,
@@ -139,21 +241,13 @@ class Lev(AntPlusDevice):
         self.data = {**self.data, "lev": LevData()}
 
     def update_system_state(self, byte):
-        self.data["lev"].manual_throttle = (byte & 0x10) == 0x10
-        self.data["lev"].lights = (byte & 0x08) == 0x08
-        self.data["lev"].light_high_beam = (byte & 0x04) == 0x04
-        self.data["lev"].turn_signal_left = (byte & 0x02) == 0x02
-        self.data["lev"].turn_signal_right = (byte & 0x01) == 0x01
+        SYSTEM_STATE.update(self.data["lev"], bytes((byte,)))
 
     def update_travel_mode(self, byte):
-        self.data["lev"].current_assist_level = (byte >> 3) & 0x07
-        self.data["lev"].current_regenerative_level = byte & 0x07
+        TRAVEL_MODE.update(self.data["lev"], bytes((byte,)))
 
     def update_gear_state(self, byte):
-        self.data["lev"].gear_exist = (byte & 0x80) == 0x80
-        self.data["lev"].gear_manual = (byte & 0x40) == 0x40
-        self.data["lev"].gear_rear = (byte >> 2) & 0x07
-        self.data["lev"].gear_front = byte & 0x03
+        GEAR_STATE.update(self.data["lev"], bytes((byte,)))
 
     def on_data(self, data):
         page = data[0]
@@ -162,89 +256,49 @@ class Lev(AntPlusDevice):
 
         # main page
         if page == 0x01:
-            self.data["lev"].motor_temperature = TemperatureState((data[1] >> 4) & 0x07)
-            self.data["lev"].motor_alert = TemperatureAlert((data[1] >> 4) & 0x08)
-            self.data["lev"].battery_temperature = TemperatureState(data[1] & 0x07)
-            self.data["lev"].battery_alert = TemperatureAlert(data[1] & 0x08)
-            # travel mode
-            self.update_travel_mode(data[2])
-            # system state
-            self.update_system_state(data[3])
-            # gear state
-            self.update_gear_state(data[4])
-
-            self.data["lev"].error_message = LevErrorMessage(data[5])
-            # only first 4 bits of byte 7 for speed
-            self.data["lev"].speed = (
-                data[6] + ((data[7] & 0x0F) << 8)
-            ) * 0.1  # 0.1 km/h units
+            SPEED_SYSTEM.update(self.data["lev"], data)
 
             _logger.info(f"Lev {page} update {self}: {self.data['lev']}")
-            self.on_device_data(page, "speed_system", self.data["lev"])
+            self._on_device_data(page, "speed_system", self.data["lev"])
         # speed and distance
         elif page == 0x02:
-            self.data["lev"].odometer = (
-                int.from_bytes(data[1:4], byteorder="little") * 0.01
-            )  # 0.01 km units
-            self.data["lev"].remaining_range = data[4] + ((data[5] & 0x0F) << 8)
-            self.data["lev"].speed = (
-                data[6] + ((data[7] & 0x0F) << 8)
-            ) * 0.1  # 0.1 km/h units
+            SPEED_DISTANCE.update(self.data["lev"], data)
 
             _logger.info(f"Lev {page} update {self}: {self.data['lev']}")
-            self.on_device_data(page, "speed_distance", self.data["lev"])
+            self._on_device_data(page, "speed_distance", self.data["lev"])
         # alternative speed and distance
         elif page == 0x22:
-            self.data["lev"].odometer = (
-                int.from_bytes(data[1:4], byteorder="little") * 0.01
-            )  # 0.01 km units
-            self.data["lev"].fuel_consumption = (
-                data[4] + ((data[5] & 0x0F) << 8)
-            ) * 0.1
-            self.data["lev"].speed = (
-                data[6] + ((data[7] & 0x0F) << 8)
-            ) * 0.1  # 0.1 km/h units
+            ALT_SPEED_DISTANCE.update(self.data["lev"], data)
 
             _logger.info(f"Lev {page} update {self}: {self.data['lev']}")
-            self.on_device_data(page, "alt_speed_distance", self.data["lev"])
+            self._on_device_data(page, "alt_speed_distance", self.data["lev"])
         # system and speed 2
         elif page == 0x03:
-            self.data["lev"].battery_soc = data[1] & 0x7F
-            # travel mode
-            self.update_travel_mode(data[2])
-            # system state
-            self.update_system_state(data[3])
-            # gear state
-            self.update_gear_state(data[4])
-
-            self.data["lev"].assist = data[5]
-            self.data["lev"].speed = (
-                data[6] + ((data[7] & 0x0F) << 8)
-            ) * 0.1  # 0.1 km/h units
+            SYSTEM_SPEED_2.update(self.data["lev"], data)
 
             _logger.info(f"Lev {page} update {self}: {self.data['lev']}")
-            self.on_device_data(page, "system_speed_2", self.data["lev"])
+            self._on_device_data(page, "system_speed_2", self.data["lev"])
         # battery information
         elif page == 0x04:
-            self.data["lev"].battery_cycles = data[2] + ((data[3] & 0x0F) << 8)
+            (
+                self.data["lev"].battery_cycles,
+                fuel_consumption_msn,
+                fuel_consumption_lsb,
+                self.data["lev"].battery_voltage,
+                self.data["lev"].battery_distance_charge,
+            ) = BATTERY.decode(data)
             self.data["lev"].fuel_consumption = (
-                data[4] + ((data[3] & 0xF0) << 4)
+                fuel_consumption_lsb + (fuel_consumption_msn << 8)
             ) * 0.1
-            self.data["lev"].battery_voltage = data[5] / 4
-            self.data["lev"].battery_distance_charge = int.from_bytes(
-                data[6:8], byteorder="little"
-            )
 
             _logger.info(f"Lev {page} update {self}: {self.data['lev']}")
-            self.on_device_data(page, "battery", self.data["lev"])
+            self._on_device_data(page, "battery", self.data["lev"])
         # capabilities information
         elif page == 0x05:
-            self.data["lev"].supported_assist_levels = (data[2] >> 3) & 0x07
-            self.data["lev"].supported_regenerative_levels = data[2] & 0x07
-            self.data["lev"].wheel_circumference = data[3] + ((data[4] & 0x0F) << 8)
+            CAPABILITIES.update(self.data["lev"], data)
 
             _logger.info(f"Lev {page} update {self}: {self.data['lev']}")
-            self.on_device_data(page, "capabilities", self.data["lev"])
+            self._on_device_data(page, "capabilities", self.data["lev"])
 
     def set_data(
         self,
@@ -0,0 +1,550 @@
+"""
+Synthetic ANT+ sensor traffic for load testing
+
+Page generators produce the page stream of a sensor in steady use for each
+profile in `device_profiles`, with manufacturer and product common pages
+interleaved as sensors do. `run_load` opens a profile device for each of
+`count` simulated sensors on an emulated stick and reports how many pages
+were decoded against how many were sent, the data dropped by the stick and
+the backlog waiting for decoding; `find_saturation` raises the rate until
+decoding falls behind. The emulator runs in the same process, so the rates
+found are a lower bound for a real stick.
+
+.. code-block:: python
+
+    result = run_load(DeviceType.PowerMeter, count=8, speed=4, duration=5)
+    print(result.offered_rate, result.decoded_rate, result.max_backlog)
+"""
+import abc
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Type, Union
+
+from ..base.emulator import EmulatorDriver, SimulatedDevice
+from ..easy.node import Node
+from . import ANTPLUS_NETWORK_KEY, device_profiles
+from .common import DeviceType
+
+_logger = logging.getLogger(__name__)
+
+# messages a stick buffers for the host
+STICK_BUFFER = 256
+
+
+class PageGenerator(abc.ABC):
+    """
+    Generates the pages of one sensor, called with the number of messages sent
+
+    Subclasses implement `main_page`; every 65th message is a manufacturer or
+    product information common page.
+    """
+
+    device_type: DeviceType = DeviceType.Unknown
+    period: int = 8192
+    # messages between common pages
+    common_interval = 65
+
+    def __init__(self, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        self.serial = self.random.randrange(1, 0xFFFFFFFF)
+
+    def __call__(self, n: int) -> List[int]:
+        if n % self.common_interval == self.common_interval - 1:
+            if (n // self.common_interval) % 2:
+                return self.product_page()
+            return self.manufacturer_page()
+        return self.main_page(n)
+
+    @property
+    def interval(self) -> float:
+        """Seconds between messages"""
+        return self.period / 32768
+
+    def manufacturer_page(self) -> List[int]:
+        # hardware rev 1, development manufacturer ID 255, model 1
+        return [80, 0xFF, 0xFF, 1, 0xFF, 0x00, 1, 0x00]
+
+    def product_page(self) -> List[int]:
+        return [81, 0xFF, 0xFF, 10] + list(self.serial.to_bytes(4, "little"))
+
+    @abc.abstractmethod
+    def main_page(self, n: int) -> List[int]:
+        """Profile specific page of message `n`"""
+
+    def noise(self, value: float, spread: float) -> float:
+        return value + self.random.uniform(-spread, spread)
+
+
+class PowerMeterPages(PageGenerator):
+    device_type = DeviceType.PowerMeter
+    period = 8182
+
+    def __init__(self, seed=None, power=220, cadence=90):
+        super().__init__(seed)
+        self.power = power
+        self.cadence = cadence
+        self.event_count = 0
+        self.accumulated_power = 0
+
+    def main_page(self, n):
+        power = int(self.noise(self.power, 25))
+        self.event_count = (self.event_count + 1) & 0xFF
+        self.accumulated_power = (self.accumulated_power + power) & 0xFFFF
+        return [
+            0x10,
+            self.event_count,
+            0x80 | 50,
+            int(self.noise(self.cadence, 3)),
+            self.accumulated_power & 0xFF,
+            self.accumulated_power >> 8,
+            power & 0xFF,
+            power >> 8,
+        ]
+
+
+class HeartRatePages(PageGenerator):
+    device_type = DeviceType.HeartRate
+    period = 8070
+
+    def __init__(self, seed=None, heart_rate=140):
+        super().__init__(seed)
+        self.heart_rate = heart_rate
+        self.beat_count = 0
+        self.beat_time = 0.0
+
+    def main_page(self, n):
+        heart_rate = int(self.noise(self.heart_rate, 3))
+        previous = int(self.beat_time * 1024) & 0xFFFF
+        beats = max(1, round(heart_rate / 60 * self.interval))
+        self.beat_count = (self.beat_count + beats) & 0xFF
+        self.beat_time += beats * 60 / heart_rate
+        beat_time = int(self.beat_time * 1024) & 0xFFFF
+        # page toggle bit changes every 4 messages
+        toggle = 0x80 if (n // 4) % 2 else 0x00
+        return [
+            toggle | 0x04,
+            0xFF,
+            previous & 0xFF,
+            previous >> 8,
+            beat_time & 0xFF,
+            beat_time >> 8,
+            self.beat_count,
+            heart_rate,
+        ]
+
+
+class FitnessEquipmentPages(PageGenerator):
+    device_type = DeviceType.FitnessEquipment
+    period = 8192
+
+    def __init__(self, seed=None, power=200, cadence=85, speed=9.0):
+        super().__init__(seed)
+        self.power = power
+        self.cadence = cadence
+        self.speed = speed
+        self.event_count = 0
+        self.accumulated_power = 0
+        self.elapsed = 0.0
+        self.distance = 0.0
+
+    def main_page(self, n):
+        self.elapsed += self.interval
+        self.distance += self.speed * self.interval
+        # in use
+        state = 3 << 4
+        # alternate general FE data and trainer data
+        if n % 2:
+            speed = int(self.noise(self.speed, 0.2) * 1000)
+            return [
+                0x10,
+                25,
+                int(self.elapsed * 4) & 0xFF,
+                int(self.distance) & 0xFF,
+                speed & 0xFF,
+                speed >> 8,
+                0xFF,
+                state,
+            ]
+        power = int(self.noise(self.power, 20))
+        self.event_count = (self.event_count + 1) & 0xFF
+        self.accumulated_power = (self.accumulated_power + power) & 0xFFFF
+        return [
+            0x19,
+            self.event_count,
+            int(self.noise(self.cadence, 3)),
+            self.accumulated_power & 0xFF,
+            self.accumulated_power >> 8,
+            power & 0xFF,
+            (power >> 8) & 0x0F,
+            state,
+        ]
+
+
+class _RevolutionPages(PageGenerator):
+    """Event time and cumulative revolutions of a rotating sensor"""
+
+    def __init__(self, seed=None, rpm=90.0):
+        super().__init__(seed)
+        self.rpm = rpm
+        self.time = 0.0
+        self.revolutions = 0
+        self.event_time = 0.0
+
+    def update(self) -> List[int]:
+        self.time += self.interval
+        rpm = self.noise(self.rpm, self.rpm * 0.02)
+        revolutions = int(self.time * rpm / 60)
+        if revolutions > self.revolutions:
+            self.event_time = self.time
+            self.revolutions = revolutions
+        event_time = int(self.event_time * 1024) & 0xFFFF
+        revolutions = self.revolutions & 0xFFFF
+        return [
+            event_time & 0xFF,
+            event_time >> 8,
+            revolutions & 0xFF,
+            revolutions >> 8,
+        ]
+
+
+class BikeSpeedPages(_RevolutionPages):
+    device_type = DeviceType.BikeSpeed
+    period = 8118
+
+    def __init__(self, seed=None, rpm=240.0):
+        super().__init__(seed, rpm)
+
+    def main_page(self, n):
+        toggle = 0x80 if (n // 4) % 2 else 0x00
+        return [toggle | 0x00, 0xFF, 0xFF, 0xFF] + self.update()
+
+
+class BikeCadencePages(_RevolutionPages):
+    device_type = DeviceType.BikeCadence
+    period = 8102
+
+    def main_page(self, n):
+        toggle = 0x80 if (n // 4) % 2 else 0x00
+        return [toggle | 0x00, 0xFF, 0xFF, 0xFF] + self.update()
+
+
+class BikeSpeedCadencePages(PageGenerator):
+    device_type = DeviceType.BikeSpeedCadence
+    period = 8086
+    # combined sensor has no common pages
+    common_interval = math.inf
+
+    def __init__(self, seed=None, cadence=90.0, wheel_rpm=240.0):
+        super().__init__(seed)
+        self.cadence = BikeCadencePages(seed, cadence)
+        self.speed = BikeSpeedPages(seed, wheel_rpm)
+        self.cadence.period = self.speed.period = self.period
+
+    def __call__(self, n):
+        return self.main_page(n)
+
+    def main_page(self, n):
+        return self.cadence.update() + self.speed.update()
+
+
+class TirePressurePages(PageGenerator):
+    device_type = DeviceType.TirePressureMonitor
+    period = 8192
+
+    def __init__(self, seed=None, pressure=4500, position=1):
+        super().__init__(seed)
+        # mbar, changes slowly
+        self.pressure = pressure
+        self.position = position
+
+    def main_page(self, n):
+        if n % 40 == 0:
+            self.pressure += self.random.choice((-1, 0, 1))
+        return [
+            0x01,
+            self.position,
+            0x00,
+            0xFF,
+            0xFF,
+            0xFF,
+            self.pressure & 0xFF,
+            self.pressure >> 8,
+        ]
+
+
+class ShiftingPages(PageGenerator):
+    device_type = DeviceType.Shifting
+    period = 8192
+
+    def __init__(self, seed=None, shifts_per_minute=2.0):
+        super().__init__(seed)
+        self.shifts_per_minute = shifts_per_minute
+        self.event_count = 0
+        self.rear = 6
+        self.front = 1
+
+    def main_page(self, n):
+        if self.random.random() < self.shifts_per_minute / 60 * self.interval:
+            self.event_count = (self.event_count + 1) & 0xFF
+            self.rear = min(11, max(1, self.rear + self.random.choice((-1, 1))))
+        return [
+            0x01,
+            self.event_count,
+            0xFF,
+            self.rear | (self.front << 5),
+            11 | (2 << 5),
+            0x00,
+            0x00,
+            0x00,
+        ]
+
+
+class LevPages(PageGenerator):
+    device_type = DeviceType.Lev
+    period = 8192
+
+    def __init__(self, seed=None, speed=25.0):
+        super().__init__(seed)
+        self.speed = speed
+        self.odometer = 0.0
+        self.soc = 90
+
+    def main_page(self, n):
+        self.odometer += self.speed / 3600 * self.interval
+        speed = int(self.noise(self.speed, 0.5) * 10)
+        odometer = int(self.odometer * 100)
+        speed_bytes = [speed & 0xFF, (speed >> 8) & 0x0F]
+        page = n % 3
+        if page == 0:
+            # warm motor and battery, assist level 2, lights on, no error
+            return [0x01, 0x33, 2 << 3, 0x08, 0x00, 0x00] + speed_bytes
+        if page == 1:
+            return [0x02] + list(odometer.to_bytes(3, "little")) + [40, 0] + speed_bytes
+        return [0x03, self.soc, 2 << 3, 0x08, 0x00, 2] + speed_bytes
+
+
+class EnvironmentPages(PageGenerator):
+    device_type = DeviceType.Environment
+    period = 8070
+
+    def __init__(self, seed=None, temperature=21.5):
+        super().__init__(seed)
+        self.temperature = temperature
+
+    def main_page(self, n):
+        temperature = int(self.noise(self.temperature, 0.1) * 100)
+        low, high = 180, 240
+        return [
+            0x01,
+            0xFF,
+            0x00,
+            low & 0xFF,
+            ((low >> 8) & 0x0F) | ((high & 0x0F) << 4),
+            high >> 4,
+            temperature & 0xFF,
+            (temperature >> 8) & 0xFF,
+        ]
+
+
+class DropperSeatpostPages(PageGenerator):
+    device_type = DeviceType.DropperSeatpost
+    period = 8192
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.event_count = 0
+
+    def main_page(self, n):
+        if n % 80 == 0:
+            self.event_count = (self.event_count + 1) & 0xFFFF
+        return [
+            0x01,
+            0xFF,
+            0xFF,
+            0xFF,
+            self.event_count & 0xFF,
+            self.event_count >> 8,
+            5,
+            0x00,
+        ]
+
+
+page_generators: Dict[DeviceType, Type[PageGenerator]] = {
+    g.device_type: g
+    for g in (
+        PowerMeterPages,
+        HeartRatePages,
+        FitnessEquipmentPages,
+        BikeSpeedPages,
+        BikeCadencePages,
+        BikeSpeedCadencePages,
+        TirePressurePages,
+        ShiftingPages,
+        LevPages,
+        EnvironmentPages,
+        DropperSeatpostPages,
+    )
+}
+
+
+def simulated_devices(
+    device_type: DeviceType,
+    count: int,
+    first_device_number: int = 1,
+    period: Optional[int] = None,
+    seed: int = 0,
+) -> List[SimulatedDevice]:
+    """`count` simulated sensors of `device_type`, at profile period unless `period` given"""
+    generator = page_generators[device_type]
+    return [
+        SimulatedDevice(
+            first_device_number + i,
+            device_type.value,
+            trans_type=1,
+            period=period if period is not None else generator.period,
+            pages=generator(seed + i),
+        )
+        for i in range(count)
+    ]
+
+
+@dataclass
+class LoadResult:
+    device_type: DeviceType
+    count: int
+    speed: float
+    duration: float
+    # pages sent by simulated sensors and decoded by the profiles
+    offered: int
+    decoded: int
+    # pages lost as the stick buffer was full
+    dropped: int
+    # data waiting in the Node dispatch queue, most seen and at the end
+    max_backlog: int
+    final_backlog: int
+
+    @property
+    def offered_rate(self) -> float:
+        return self.offered / self.duration
+
+    @property
+    def decoded_rate(self) -> float:
+        return self.decoded / self.duration
+
+    @property
+    def keeping_up(self) -> bool:
+        """Nothing dropped and no more than a period of data left waiting"""
+        return self.dropped == 0 and self.final_backlog <= self.count * 2
+
+
+def run_load(
+    device_type: Union[DeviceType, int],
+    count: int = 8,
+    speed: float = 1.0,
+    duration: float = 5.0,
+    period: Optional[int] = None,
+    driver_wrapper=None,
+) -> LoadResult:
+    """
+    Decode `count` sensors of `device_type`, each on a profile channel, for `duration` seconds
+
+    :param speed float: emulator time compression, sensors send `speed` times faster
+    :param driver_wrapper: called with the emulator to wrap it, e.g. to record it with `RecordingDriver`
+    """
+    device_type = DeviceType(device_type)
+    sensors = simulated_devices(device_type, count, period=period)
+    emulator = EmulatorDriver(
+        sensors, max_channels=count, speed=speed, buffer_size=STICK_BUFFER
+    )
+    node = Node(driver_wrapper(emulator) if driver_wrapper else emulator)
+    node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+
+    profile = device_profiles[device_type]
+    devices = [
+        profile(node, device_id=s.device_number, trans_type=s.trans_type)
+        for s in sensors
+    ]
+    if period is not None:
+        for device in devices:
+            device.channel.set_period(period)
+
+    decoded = 0
+    lock = threading.Lock()
+
+    def count_page(on_data):
+        def wrapper(data):
+            nonlocal decoded
+            on_data(data)
+            with lock:
+                decoded += 1
+
+        return wrapper
+
+    for device in devices:
+        device.channel.on_broadcast_data = count_page(device.channel.on_broadcast_data)
+
+    thread = threading.Thread(target=node.start, name="openant.loadgen")
+    thread.start()
+    try:
+        # measure once every channel has found its sensor
+        deadline = time.monotonic() + 5
+        while not all(d._found for d in devices) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        max_backlog = 0
+        with lock:
+            decoded = 0
+        offered_start = sum(s.count for s in sensors)
+        dropped_start = emulator.dropped
+        begin = time.monotonic()
+        while time.monotonic() - begin < duration:
+            max_backlog = max(max_backlog, node._datas.qsize())
+            time.sleep(0.01)
+        offered = sum(s.count for s in sensors) - offered_start
+        dropped = emulator.dropped - dropped_start
+        final_backlog = node._datas.qsize()
+        with lock:
+            result_decoded = decoded
+        elapsed = time.monotonic() - begin
+    finally:
+        for device in devices:
+            device.close_channel()
+        node.stop()
+        thread.join()
+
+    return LoadResult(
+        device_type,
+        count,
+        speed,
+        elapsed,
+        offered,
+        result_decoded,
+        dropped,
+        max_backlog,
+        final_backlog,
+    )
+
+
+def find_saturation(
+    device_type: Union[DeviceType, int],
+    count: int = 8,
+    duration: float = 3.0,
+    max_speed: float = 256.0,
+) -> List[LoadResult]:
+    """Run loads doubling the speed until decoding falls behind, returning each result"""
+    results = []
+    speed = 1.0
+    while speed <= max_speed:
+        result = run_load(device_type, count, speed, duration)
+        _logger.info(
+            f"{count} x {result.device_type.name} @ {speed}x: offered {result.offered_rate:.0f} pages/s, decoded {result.decoded_rate:.0f} pages/s, dropped {result.dropped}, backlog {result.final_backlog}"
+        )
+        results.append(result)
+        if not result.keeping_up:
+            break
+        speed *= 2
+    return results
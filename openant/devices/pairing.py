@@ -0,0 +1,101 @@
+"""
+Cache of the devices paired with, to open on them directly after a restart
+
+A device opened with device_id 0 attaches to the first of its type found:
+the channel is closed, set to the channel ID received and opened again to
+search for that device alone. A `PairingCache` keeps the channel ID
+attached to by device type and a tag naming the location or use of the
+device, e.g. "left" and "right" pedals, so the next time its channel is
+opened on the device and transmission type straight away:
+
+.. code-block:: python
+
+    pairing = PairingCache("pairing.json")
+    # searches for any power meter the first time, the one paired after
+    left = auto_create_device(node, 0, "PowerMeter", pairing=pairing, tag="left")
+
+A paired device is searched for until found; `forget` it to pair with another.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class PairingCache:
+    """
+    Channel IDs paired by (device_type, tag), in JSON file `path` or only in memory if None
+
+    The file is read when created and replaced whenever a pairing changes.
+
+    >>> pairing = PairingCache()
+    >>> pairing.pair(120, "chest", 1234, 1)
+    True
+    >>> pairing.pair(120, "chest", 1234, 1)
+    False
+    >>> pairing.get(120, "chest")
+    (1234, 120, 1)
+    >>> pairing.get(120, "spare") is None
+    True
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pairings: Dict[str, dict] = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "r") as fh:
+                self._pairings = json.load(fh)
+
+    def __repr__(self):
+        return f"PairingCache({self.path!r})"
+
+    @staticmethod
+    def _key(device_type: int, tag: str) -> str:
+        return f"{device_type}:{tag}"
+
+    def get(self, device_type: int, tag: str = "") -> Optional[Tuple[int, int, int]]:
+        """(device_id, device_type, trans_type) paired as `tag`, None if not paired"""
+        pairing = self._pairings.get(self._key(device_type, tag))
+        if pairing is None:
+            return None
+        return (pairing["device_id"], device_type, pairing["trans_type"])
+
+    def pair(self, device_type: int, tag: str, device_id: int, trans_type: int) -> bool:
+        """Pair `device_id` as `tag`, returning True if changed and so saved"""
+        key = self._key(device_type, tag)
+        with self._lock:
+            pairing = self._pairings.get(key)
+            if pairing is not None and (
+                pairing["device_id"],
+                pairing["trans_type"],
+            ) == (device_id, trans_type):
+                return False
+            self._pairings[key] = {
+                "device_id": device_id,
+                "trans_type": trans_type,
+                "paired": time.time(),
+            }
+            self._save()
+        return True
+
+    def forget(self, device_type: int, tag: str = "") -> bool:
+        """Remove the device paired as `tag`, returning True if there was one"""
+        with self._lock:
+            if self._pairings.pop(self._key(device_type, tag), None) is None:
+                return False
+            self._save()
+        return True
+
+    def _save(self):
+        if self.path is None:
+            return
+        # written whole then renamed, so a crash leaves the file as was
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as fh:
+            json.dump(self._pairings, fh, indent=4, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def __len__(self) -> int:
+        return len(self._pairings)
@@ -5,6 +5,7 @@ from dataclasses import dataclass, field
 
 from ..easy.node import Node
 from .common import DeviceData, AntPlusDevice, DeviceType
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -22,6 +23,31 @@ class PowerData(DeviceData):
     cadence: int = field(default=255, metadata={"unit": "rpm"})
 
 
+STANDARD_POWER = Page(
+    "standard_power",
+    [
+        Field("event_count", 1, rollover=True),
+        Field("pedal_power", 2),
+        Field("cadence", 3),
+        Field("accumulated_power", 4, size=2, rollover=True),
+        Field("instantaneous_power", 6, size=2),
+    ],
+    number=0x10,
+)
+
+STANDARD_TORQUE = Page(
+    "standard_torque",
+    [
+        Field("event_count", 1, rollover=True),
+        Field("crank_ticks", 2, rollover=True),
+        Field("cadence", 3),
+        Field("crank_period", 4, size=2, rollover=True),
+        Field("accumulated_torque", 6, size=2, rollover=True),
+    ],
+    number=0x12,
+)
+
+
 class PowerMeter(AntPlusDevice):
     def __init__(
         self,
@@ -57,18 +83,23 @@ class PowerMeter(AntPlusDevice):
 
         # standard power
         if page == 0x10:
+            (
+                event_count,
+                pedal_power,
+                self.data["power"].cadence,
+                accumulated_power,
+                self.data["power"].instantaneous_power,
+            ) = STANDARD_POWER.decode(data)
+
             self._power_update_event_count[0] = self._power_update_event_count[1]
-            self._power_update_event_count[1] = data[1]
+            self._power_update_event_count[1] = event_count
 
             self._accumulated_power[0] = self._accumulated_power[1]
-            self._accumulated_power[1] = data[4] + (data[5] << 8)
-
-            self.data["power"].cadence = data[3]
-            self.data["power"].instantaneous_power = data[6] + (data[7] << 8)
+            self._accumulated_power[1] = accumulated_power
 
             # pedal power bit 7 tells us if dual sided and that the percent is the RH
-            if data[2] & (1 << 7) and data[2] != 0xFF:
-                percent = data[2] ^ (1 << 7)
+            if pedal_power & (1 << 7) and pedal_power != 0xFF:
+                percent = pedal_power ^ (1 << 7)
                 self.data["power"].right_power = int(
                     (self.data["power"].instantaneous_power * percent) / 100
                 )
@@ -100,23 +131,29 @@ class PowerMeter(AntPlusDevice):
                     f"Standard power update {self}: {self.data['power'].instantaneous_power} W; Average Power: {self.data['power'].average_power} W; Cadence {self.data['power'].cadence} rpm"
                 )
 
-                self.on_device_data(page, "standard_power", self.data["power"])
+                self._on_device_data(page, "standard_power", self.data["power"])
 
         # standard torque
         elif page == 0x12:
+            (
+                event_count,
+                crank_ticks,
+                self.data["power"].cadence,
+                crank_period,
+                accumulated_torque,
+            ) = STANDARD_TORQUE.decode(data)
+
             self._torque_update_event_count[0] = self._torque_update_event_count[1]
-            self._torque_update_event_count[1] = data[1]
+            self._torque_update_event_count[1] = event_count
 
             self._crank_ticks[0] = self._crank_ticks[1]
-            self._crank_ticks[1] = data[2]
+            self._crank_ticks[1] = crank_ticks
 
             self._crank_period[0] = self._crank_period[1]
-            self._crank_period[1] = data[4] + (data[5] << 8)
+            self._crank_period[1] = crank_period
 
             self._accumulated_torque[0] = self._accumulated_torque[1]
-            self._accumulated_torque[1] = data[6] + (data[7] << 8)
-
-            self.data["power"].cadence = data[3]
+            self._accumulated_torque[1] = accumulated_torque
 
             # do the maths on new data
             delta_update_count = (
@@ -153,4 +190,4 @@ class PowerMeter(AntPlusDevice):
                     f"Standard torque update {self}: {self.data['power'].average_power} W; Angular Velocity {self.data['power'].angular_velocity} rad/s; Average Torque: {self.data['power'].torque} Nm"
                 )
 
-                self.on_device_data(page, "standard_torque", self.data["power"])
+                self._on_device_data(page, "standard_torque", self.data["power"])
@@ -0,0 +1,163 @@
+"""
+Registry of devices seen while scanning
+
+A `Scanner` keeps a `DeviceRegistry` of every device it has received from,
+by (device_id, device_type, trans_type), with when each was first and last
+seen and its rate of messages. Devices are kept least recently seen first,
+so those not seen for `max_age` seconds, or the least recently seen beyond
+`max_devices`, are evicted without searching, keeping long scans bounded:
+
+.. code-block:: python
+
+    # forget devices not seen for 10 minutes
+    scanner = Scanner(node, max_age=600)
+    scanner.on_lost = lambda device: print(f"Lost {device}")
+
+    for device in scanner.registry.values():
+        print(device.device, device.last_seen, device.rate)
+
+Times are `time.monotonic` seconds.
+"""
+import collections
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# (device_id, device_type, trans_type)
+DeviceTuple = Tuple[int, int, int]
+
+
+@dataclass
+class SeenDevice:
+    """A device seen by a scanner"""
+
+    device: DeviceTuple
+    first_seen: float
+    last_seen: float
+    # messages received
+    messages: int = 1
+    # messages a second over the last `DeviceRegistry.rate_window`
+    rate: float = 0.0
+    # payload of pages last received by page number, to ignore those unchanged
+    pages: Dict[int, bytes] = field(default_factory=dict, repr=False)
+    # time and `messages` the rate window started at
+    _window_start: float = field(default=0.0, repr=False)
+    _window_messages: int = field(default=1, repr=False)
+
+    @property
+    def key(self) -> str:
+        """Key of the device in `Scanner.common`, "device_id:device_type" """
+        return f"{self.device[0]}:{self.device[1]}"
+
+
+class DeviceRegistry:
+    """
+    `SeenDevice` by device tuple, least recently seen first
+
+    `evict` removes devices not seen for `max_age` seconds and the least
+    recently seen of over `max_devices`, None for no limit.
+
+    >>> registry = DeviceRegistry(max_age=60)
+    >>> registry.seen((1234, 120, 1), now=0.0)[1]
+    True
+    >>> registry.seen((1234, 120, 1), now=30.0)[0].messages
+    2
+    >>> [d.device for d in registry.evict(now=95.0)]
+    [(1234, 120, 1)]
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        max_devices: Optional[int] = None,
+        rate_window: float = 10.0,
+    ):
+        self.max_age = max_age
+        self.max_devices = max_devices
+        self.rate_window = rate_window
+        self._devices: "collections.OrderedDict[DeviceTuple, SeenDevice]" = (
+            collections.OrderedDict()
+        )
+        # devices by `SeenDevice.key`, which transmission types share
+        self._keys: "collections.Counter[str]" = collections.Counter()
+
+    def __repr__(self):
+        return f"DeviceRegistry({len(self)} devices)"
+
+    def seen(
+        self, device: DeviceTuple, now: Optional[float] = None
+    ) -> Tuple[SeenDevice, bool]:
+        """Record a message from `device`, (its `SeenDevice`, True if new)"""
+        if now is None:
+            now = time.monotonic()
+        seen = self._devices.get(device)
+        if seen is None:
+            seen = self._devices[device] = SeenDevice(
+                device, now, now, _window_start=now
+            )
+            self._keys[seen.key] += 1
+            return seen, True
+
+        self._devices.move_to_end(device)
+        seen.last_seen = now
+        seen.messages += 1
+        elapsed = now - seen._window_start
+        if elapsed >= self.rate_window:
+            seen.rate = (seen.messages - seen._window_messages) / elapsed
+            seen._window_start = now
+            seen._window_messages = seen.messages
+        return seen, False
+
+    def evict(self, now: Optional[float] = None) -> List[SeenDevice]:
+        """Remove devices over the limits, returning those removed"""
+        devices = self._devices
+        evicted = []
+        if self.max_devices is not None:
+            while len(devices) > self.max_devices:
+                evicted.append(devices.popitem(last=False)[1])
+        if self.max_age is not None:
+            if now is None:
+                now = time.monotonic()
+            cutoff = now - self.max_age
+            # least recently seen first, so stop at the first seen since
+            while devices and next(iter(devices.values())).last_seen < cutoff:
+                evicted.append(devices.popitem(last=False)[1])
+        for seen in evicted:
+            self._forget_key(seen.key)
+        return evicted
+
+    def remove(self, device: DeviceTuple) -> Optional[SeenDevice]:
+        seen = self._devices.pop(device, None)
+        if seen is not None:
+            self._forget_key(seen.key)
+        return seen
+
+    def _forget_key(self, key: str):
+        self._keys[key] -= 1
+        if not self._keys[key]:
+            del self._keys[key]
+
+    def has_key(self, key: str) -> bool:
+        """True if a device with `SeenDevice.key` `key` is kept, of any transmission type"""
+        return key in self._keys
+
+    def get(self, device: DeviceTuple) -> Optional[SeenDevice]:
+        return self._devices.get(device)
+
+    def keys(self):
+        return self._devices.keys()
+
+    def values(self):
+        return self._devices.values()
+
+    def __getitem__(self, device: DeviceTuple) -> SeenDevice:
+        return self._devices[device]
+
+    def __contains__(self, device) -> bool:
+        return device in self._devices
+
+    def __iter__(self) -> Iterator[DeviceTuple]:
+        return iter(self._devices)
+
+    def __len__(self) -> int:
+        return len(self._devices)
@@ -1,19 +1,59 @@
 import dataclasses
 import logging
 import json
-from typing import Tuple
+import time
+from typing import Dict, List, Optional, Tuple
 
 from ..easy.node import Node
-from .common import AntPlusDevice, CommonData, DeviceType
+from .common import (
+    MANUFACTURER_INFO,
+    PRODUCT_INFO,
+    AntPlusDevice,
+    CommonData,
+    DeviceType,
+)
+from .fleet import FleetStore
+from .inventory import DeviceInventory
+from .registry import DeviceRegistry, SeenDevice
 from .utilities import read_json
 
 _logger = logging.getLogger(__name__)
 
+# seconds between writes of last seen times to the inventory
+_INVENTORY_INTERVAL = 10.0
+
 
 class Scanner(AntPlusDevice):
+    """
+    Scans for all devices in range, keeping the common data of each found in `common` by "device_id:device_type"
+
+    Devices seen are kept in `registry`, a `DeviceRegistry` with when each was last seen and its message rate. Set `max_age` (seconds) or `max_devices` to forget devices not seen for that long or the least recently seen, calling `on_lost`.
+
+    Pass a `FleetStore` of `CommonData` as `store` to keep the common data of many devices compactly; `common` is then the store.
+
+    Pass a `DeviceInventory` as `inventory` to persist devices as they are found and their common data changes. Last seen times are written every few seconds and by `flush`.
+    """
+
     def __init__(
-        self, node: Node, device_id=0, device_type=0, period=8070, trans_type=0
+        self,
+        node: Node,
+        device_id=0,
+        device_type=0,
+        period=8070,
+        trans_type=0,
+        store: Optional[FleetStore] = None,
+        max_age: Optional[float] = None,
+        max_devices: Optional[int] = None,
+        inventory: Optional[DeviceInventory] = None,
     ):
+        # before opening channel as data may arrive straight away
+        self.registry = DeviceRegistry(max_age, max_devices)
+        self.common = {} if store is None else store
+        self.inventory = inventory
+        self._next_maintenance = 0.0
+        # monotonic time last seen times were written to the inventory
+        self._flushed = time.monotonic()
+
         super().__init__(
             node,
             device_type=device_type,
@@ -22,69 +62,136 @@ class Scanner(AntPlusDevice):
             trans_type=trans_type,
         )
 
-        self.found = set()
-        self.common = {}
+    @property
+    def found(self):
+        """(device_id, device_type, trans_type) of devices seen, a set-like view of `registry`"""
+        return self.registry.keys()
 
     def _on_data(self, data):
         """Overloads _on_data for scanning of devices. Will not attach to single device but keep track of all devices found in the area."""
 
         # extended (> 8) has the device number and id beyond page
         if len(data) > 8:
-            device_id = data[9] + (data[10] << 8)
-            device_type = data[11]
-            trans_type = data[12]
-            tuple_device = (device_id, device_type, trans_type)
+            tuple_device = (data[9] + (data[10] << 8), data[11], data[12])
+            now = time.monotonic()
+            seen, new = self.registry.seen(tuple_device, now)
 
-            if tuple_device not in self.found:
-                info = {f"{device_id}:{device_type}": CommonData()}
-                self.common.update(info)
-                self.found.add(tuple_device)
+            if new:
+                if isinstance(self.common, FleetStore):
+                    self.common.slot(seen.key)
+                elif seen.key not in self.common:
+                    self.common[seen.key] = CommonData()
 
-                _logger.info(f"Found new device {info}")
+                _logger.info(f"Found new device {seen.key}")
+                if self.inventory is not None:
+                    self.inventory.found(tuple_device, time.time())
 
-                self.on_found(tuple_device)
+                self._callback("on_found", tuple_device)
+                if self.registry.max_devices is not None:
+                    self._maintain(now)
+            elif now >= self._next_maintenance:
+                self._maintain(now)
+
+            page = data[0]
+            if page != 80 and page != 81:
+                return
+            # only decoded when changed
+            payload = bytes(data[1:8])
+            if seen.pages.get(page) == payload:
+                return
+            seen.pages[page] = payload
 
             common = {}
-            device_key = f"{device_id}:{device_type}"
+            device_key = seen.key
+            device_id = tuple_device[0]
 
             # manufacturer info
-            if data[0] == 80:
-                common["hardware_rev"] = data[3]
-                common["manufacturer_id"] = data[4] + (data[5] << 8)
-                common["model_no"] = data[6] + (data[7] << 8)
-
-                # make an updated dataclass using current and new dict data
-                updated = dataclasses.replace(self.common[device_key], **common)
+            if page == 80:
+                (
+                    common["hardware_rev"],
+                    common["manufacturer_id"],
+                    common["model_no"],
+                ) = MANUFACTURER_INFO.decode(data)
 
-                # only fire callback if the dataclass has changed
-                if updated != self.common[device_key]:
-                    self.common[device_key] = updated
+                # only fire callback if the data has changed
+                if self._update_common(tuple_device, device_key, common):
                     _logger.info(
                         f"Manufacturer info {device_id}: HW Rev: {self.common[device_key].hardware_rev}; ID: {self.common[device_key].manufacturer_id}; Model: {self.common[device_key].model_no}"
                     )
-                    self.on_update(tuple_device, self.common[device_key])
+                    self._callback("on_update", tuple_device, self.common[device_key])
             # product info
-            elif data[0] == 81:
-                sw_rev = data[2]
-                sw_main = data[3]
+            else:
+                sw_rev, sw_main, common["serial_no"] = PRODUCT_INFO.decode(data)
 
                 if sw_rev == 0xFF:
                     common["software_ver"] = str(sw_main / 10)
                 else:
                     common["software_ver"] = str((sw_main * 100 + sw_rev) / 1000)
 
-                common["serial_no"] = int.from_bytes(data[4:8], byteorder="little")
-
-                # make an updated dataclass using current and new dict data
-                updated = dataclasses.replace(self.common[device_key], **common)
-
-                # only fire callback if the dataclass has changed
-                if updated != self.common[device_key]:
-                    self.common[device_key] = updated
+                # only fire callback if the data has changed
+                if self._update_common(tuple_device, device_key, common):
                     _logger.info(
-                        f"Product info {device_id}: Software: {updated.software_ver}; Serial Number: {updated.serial_no}"
+                        f"Product info {device_id}: Software: {self.common[device_key].software_ver}; Serial Number: {self.common[device_key].serial_no}"
                     )
-                    self.on_update(tuple_device, self.common[device_key])
+                    self._callback("on_update", tuple_device, self.common[device_key])
+
+    def _maintain(self, now: float):
+        """Forget devices over the registry limits and write last seen times, at most once a second"""
+        self._next_maintenance = now + 1.0
+        evicted = self.registry.evict(now)
+        if self.inventory is not None:
+            if evicted:
+                self.inventory.seen(self._last_seen(evicted, now))
+            if now >= self._flushed + _INVENTORY_INTERVAL:
+                self.flush(now)
+
+        for seen in evicted:
+            # common data is by id and type, maybe shared with another transmission type
+            if not self.registry.has_key(seen.key):
+                self.common.pop(seen.key, None)
+            _logger.info(f"Lost device {seen.key}")
+            self._callback("on_lost", seen.device)
+
+    def _update_common(
+        self, tuple_device: Tuple[int, int, int], device_key: str, common: Dict
+    ) -> bool:
+        """Set `common` fields of the device, True if any changed"""
+        current = self.common[device_key]
+        if all(getattr(current, name) == value for name, value in common.items()):
+            return False
+        if isinstance(self.common, FleetStore):
+            for name, value in common.items():
+                setattr(current, name, value)
+        else:
+            # a new dataclass, so those passed to callbacks are unchanged
+            self.common[device_key] = dataclasses.replace(current, **common)
+        if self.inventory is not None:
+            self.inventory.update_common(tuple_device, self.common[device_key])
+        return True
+
+    def _last_seen(self, seens, now: float):
+        """(device, last seen time since the epoch) of `seens` seen since the last flush"""
+        epoch = time.time() - now
+        return [
+            (seen.device, seen.last_seen + epoch)
+            for seen in seens
+            if seen.last_seen > self._flushed
+        ]
+
+    def flush(self, now: Optional[float] = None):
+        """Write last seen times of devices seen since the last flush to `inventory`"""
+        if self.inventory is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        # most recently seen last, so stop at the first not seen since
+        seens: List[SeenDevice] = []
+        for seen in reversed(self.registry.values()):
+            if seen.last_seen <= self._flushed:
+                break
+            seens.append(seen)
+        self.inventory.seen(self._last_seen(seens, now))
+        self._flushed = now
 
     def save(self, file_path: str):
         """
@@ -132,6 +239,16 @@ class Scanner(AntPlusDevice):
         assert device_tuple  # type: ignore
         pass
 
+    @staticmethod
+    def on_lost(device_tuple: Tuple[int, int, int]):
+        """
+        Callback when a device is forgotten, not seen for `max_age` or over `max_devices`
+
+        :param _ Tuple[int, int, int]: (device_id, device_type, transmission_type) of lost device
+        """
+        assert device_tuple  # type: ignore
+        pass
+
     @staticmethod
     def on_update(device_tuple: Tuple[int, int, int], common: CommonData):
         """
@@ -0,0 +1,223 @@
+"""
+Declarative ANT+ page schemas compiled to struct based decoders
+
+Each data page is described once as a `Page` of `Field`: where the value is
+in the page, how it scales, which raw value means invalid and what type it
+maps to. A `Page` compiles its fields into `struct.Struct` unpackers, lookup
+tables for mapped types and a generated decoder, so decoding a page is one
+or two unpacks and some integer arithmetic:
+
+.. code-block:: python
+
+    STANDARD_POWER = Page(
+        "standard_power",
+        [
+            Field("event_count", 1),
+            Field("cadence", 3, invalid=0xFF),
+            Field("instantaneous_power", 6, size=2),
+        ],
+    )
+    event_count, cadence, power = STANDARD_POWER.decode(data)
+    # or set the fields as attributes of a `DeviceData`
+    STANDARD_POWER.update(power_data, data)
+"""
+import keyword
+import struct
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_CODES = {1: "B", 2: "H", 4: "I"}
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    Little-endian integer of `size` bytes starting at `byte` of the page
+
+    Only `bits` bits from bit `shift` are the value if set. The raw value is
+    signed two's complement if `signed`; if it is `invalid` the field decodes
+    to None. Otherwise the value is `enum(raw)` if `enum` is set, else
+    `raw * scale + offset`, rounded to `digits` if set. `scale` and `offset`
+    keep the raw int when left at 1 and 0. `rollover` marks a counter that
+    wraps, unwrapped into a running total when decoded in batches.
+    """
+
+    name: str
+    byte: int
+    size: int = 1
+    shift: int = 0
+    bits: Optional[int] = None
+    signed: bool = False
+    scale: float = 1
+    offset: float = 0
+    invalid: Optional[int] = None
+    enum: Optional[Callable[[int], Any]] = None
+    digits: Optional[int] = None
+    rollover: bool = False
+
+    @property
+    def width(self) -> int:
+        """Bits of the value"""
+        return self.size * 8 - self.shift if self.bits is None else self.bits
+
+
+class SchemaException(Exception):
+    pass
+
+
+class Page:
+    """
+    Decoder for a data page of `fields`, compiled when created
+
+    `decode` returns the field values as a tuple in the order of `fields`,
+    `update` sets them as attributes of a target, skipping invalid values.
+    `size` is the bytes fields may occupy, 8 for a page without extended
+    data.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fields: Sequence[Field],
+        number: Optional[int] = None,
+        size: int = 8,
+    ):
+        self.name = name
+        self.number = number
+        self.fields = tuple(fields)
+        self.size = size
+        self.names = tuple(f.name for f in self.fields)
+        self._check()
+        self.decode, self.update = self._compile()
+
+    def __repr__(self):
+        return f"Page({self.name!r}, {list(self.names)})"
+
+    def as_dict(self, data) -> Dict[str, Any]:
+        """Field values of `data` by name"""
+        return dict(zip(self.names, self.decode(data)))
+
+    def _check(self):
+        if len(set(self.names)) != len(self.names):
+            raise SchemaException(f"{self.name}: duplicate field names")
+        for f in self.fields:
+            if not f.name.isidentifier() or keyword.iskeyword(f.name):
+                raise SchemaException(f"{self.name}: invalid field name {f.name!r}")
+            if f.size not in (1, 2, 3, 4):
+                raise SchemaException(f"{self.name}.{f.name}: size must be 1 to 4")
+            if f.byte < 0 or f.byte + f.size > self.size:
+                raise SchemaException(f"{self.name}.{f.name}: beyond page")
+            if f.width < 1 or f.shift + f.width > f.size * 8:
+                raise SchemaException(f"{self.name}.{f.name}: bits beyond field")
+
+    def _layers(self) -> List[List[Tuple[int, int]]]:
+        """Byte spans of fields, into as few non-overlapping layers as fit"""
+        spans = []
+        for f in self.fields:
+            if f.size == 3:
+                # no 3 byte struct code, read as 2 and 1
+                parts = [(f.byte, 2), (f.byte + 2, 1)]
+            else:
+                parts = [(f.byte, f.size)]
+            for part in parts:
+                if part not in spans:
+                    spans.append(part)
+
+        layers: List[List[Tuple[int, int]]] = []
+        for span in sorted(spans):
+            for layer in layers:
+                if all(span[0] >= b + s or span[0] + span[1] <= b for b, s in layer):
+                    layer.append(span)
+                    break
+            else:
+                layers.append([span])
+        for layer in layers:
+            layer.sort()
+        return layers
+
+    def _compile(self):
+        namespace: Dict[str, Any] = {}
+        lines = []
+
+        # unpack every span into a variable
+        variables = {}
+        for i, layer in enumerate(self._layers()):
+            fmt, position, names = "<", 0, []
+            for byte, size in layer:
+                fmt += "x" * (byte - position) + _CODES[size]
+                position = byte + size
+                variables[(byte, size)] = f"r{len(variables)}"
+                names.append(variables[(byte, size)])
+            namespace[f"_unpack{i}"] = struct.Struct(fmt).unpack_from
+            lines.append(f"    {', '.join(names)}, = _unpack{i}(data)")
+
+        values = []
+        for i, f in enumerate(self.fields):
+            if f.size == 3:
+                raw = f"({variables[(f.byte, 2)]} | {variables[(f.byte + 2, 1)]} << 16)"
+            else:
+                raw = variables[(f.byte, f.size)]
+            if f.shift:
+                raw = f"({raw} >> {f.shift})"
+            if f.width < f.size * 8 - f.shift:
+                raw = f"({raw} & {(1 << f.width) - 1:#x})"
+            if f.signed:
+                sign = 1 << (f.width - 1)
+                raw = f"(({raw} ^ {sign:#x}) - {sign:#x})"
+            lines.append(f"    f{i} = {raw}")
+
+            value = f"f{i}"
+            if f.enum is not None:
+                table = _table(f.enum, f.width, f.signed)
+                if table is None:
+                    namespace[f"_enum{i}"] = f.enum
+                    value = f"_enum{i}({value})"
+                else:
+                    namespace[f"_table{i}"] = table
+                    value = f"_table{i}[{value}]"
+            else:
+                if f.scale != 1:
+                    value = f"{value} * {f.scale!r}"
+                if f.offset:
+                    value = f"{value} + {f.offset!r}"
+                if f.digits is not None:
+                    value = f"round({value}, {f.digits})"
+            values.append(value)
+
+        decode = list(lines)
+        decode.append(
+            "    return ("
+            + "".join(
+                (
+                    value + ", "
+                    if f.invalid is None
+                    else f"None if f{i} == {f.invalid:#x} else {value}, "
+                )
+                for i, (f, value) in enumerate(zip(self.fields, values))
+            )
+            + ")"
+        )
+
+        update = list(lines)
+        for i, (f, value) in enumerate(zip(self.fields, values)):
+            if f.invalid is None:
+                update.append(f"    target.{f.name} = {value}")
+            else:
+                update.append(f"    if f{i} != {f.invalid:#x}:")
+                update.append(f"        target.{f.name} = {value}")
+
+        source = "\n".join(
+            ["def decode(data):"] + decode + ["", "def update(target, data):"] + update
+        )
+        exec(compile(source, f"<page {self.name}>", "exec"), namespace)
+        return namespace["decode"], namespace["update"]
+
+
+def _table(enum: Callable[[int], Any], width: int, signed: bool) -> Optional[tuple]:
+    """Lookup table of `enum` by raw value, None if too wide or `enum` raises"""
+    if width > 8 or signed:
+        return None
+    try:
+        return tuple(enum(raw) for raw in range(1 << width))
+    except Exception:
+        return None
@@ -0,0 +1,275 @@
+"""
+Serializers of `DeviceData` dataclasses generated once per class
+
+A `Serializer` looks at the fields and type hints of a dataclass when it is
+created and generates code reading each field directly, so serializing an
+instance does no reflection. Fields hinted as numbers or enums are checked
+with a single type comparison; any value not of its hinted type takes the
+generic path, so results are the same whatever the hints say:
+
+.. code-block:: python
+
+    serializer = Serializer.of(PowerData)
+    serializer.fields(data)  # {"instantaneous_power": 0, ...}
+    serializer.line(data, {"device": "pm"})  # Influx line protocol
+    serializer.values(data)  # (0, 0, -1, ...) in order of `columns`
+
+Enums are serialized as their value and only int, float (and bool) values
+are kept, other fields such as lists and strings are dropped.
+"""
+import dataclasses
+import enum
+import functools
+import math
+import typing
+from typing import Any, Dict, Optional, Tuple
+
+_NUMBERS = frozenset((int, float, bool))
+# no value, as opposed to a value of None
+_SKIP = object()
+
+
+def _convert(value):
+    """Serialized `value`, `_SKIP` if it is not serialized"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (int, float)):
+        return value
+    return _SKIP
+
+
+def _put(fields: dict, name: str, value):
+    value = _convert(value)
+    if value is not _SKIP:
+        fields[name] = value
+
+
+def _put_line(parts: list, key: str, value):
+    value = _convert(value)
+    if value is not _SKIP:
+        value = _line_value(value)
+        if value is not None:
+            parts.append(key + value)
+
+
+def _kind(hint) -> Tuple[str, Any]:
+    """How a field hinted `hint` is read: "number", "enum", "skip" or "any" """
+    if typing.get_origin(hint) is typing.Union:
+        args = [a for a in typing.get_args(hint) if a is not type(None)]
+        if len(args) == 1:
+            # None takes the generic path and is dropped
+            hint = args[0]
+    if isinstance(hint, type):
+        if issubclass(hint, enum.Enum):
+            return "enum", hint
+        if hint in _NUMBERS:
+            return "number", hint
+        if not issubclass(hint, (int, float)):
+            return "skip", hint
+    elif typing.get_origin(hint) in (list, set, dict, tuple, frozenset):
+        return "skip", typing.get_origin(hint)
+    return "any", None
+
+
+@functools.lru_cache(maxsize=1024)
+def _escape(value: str, chars: str = ", =") -> str:
+    """
+    `value` with `chars` escaped for line protocol
+
+    >>> _escape("heart rate,1")
+    'heart\\\\ rate\\\\,1'
+    """
+    value = value.replace("\\", "\\\\")
+    for char in chars:
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def _line_value(value) -> Optional[str]:
+    """`value` as a line protocol field value, None if it is not written"""
+    kind = value.__class__
+    if kind is int:
+        return f"{value}i"
+    if kind is float:
+        return repr(value) if math.isfinite(value) else None
+    if kind is bool:
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    if isinstance(value, float):
+        return repr(float(value)) if math.isfinite(value) else None
+    if isinstance(value, int):
+        return f"{int(value)}i"
+    return None
+
+
+class Serializer:
+    """
+    Serializer for instances of dataclass `cls`, see `Serializer.of`
+
+    `columns` are the names of fields that can have a serialized value, the
+    order of `values`.
+    """
+
+    _cache: Dict[type, "Serializer"] = {}
+
+    def __init__(self, cls: type):
+        self.cls = cls
+        self.measurement = cls.__name__
+        try:
+            hints = typing.get_type_hints(cls)
+        except Exception:
+            hints = {}
+
+        self.kinds = {
+            f.name: _kind(hints.get(f.name, Any)) for f in dataclasses.fields(cls)
+        }
+        self.columns = tuple(
+            name for name, (kind, _) in self.kinds.items() if kind != "skip"
+        )
+        self.fields, self.values, self._line_fields = self._compile()
+        self._tag_sets: Dict[tuple, str] = {}
+
+    @classmethod
+    def of(cls, data_class: type) -> "Serializer":
+        """Serializer of `data_class`, created on first use"""
+        serializer = cls._cache.get(data_class)
+        if serializer is None:
+            serializer = cls._cache[data_class] = cls(data_class)
+        return serializer
+
+    def _compile(self):
+        namespace: Dict[str, Any] = {
+            "_NUMBERS": _NUMBERS,
+            "_SKIP": _SKIP,
+            "_put": _put,
+            "_put_line": _put_line,
+            "_convert": _convert,
+        }
+        fields = ["def fields(self):", "    d = {}"]
+        values = ["def values(self):"]
+        line = ["def line_fields(self):", "    p = []"]
+        for i, (name, (kind, hint)) in enumerate(self.kinds.items()):
+            namespace[f"_t{i}"] = hint
+            key = f"{_escape(name)}="
+            for code in (fields, line):
+                code.append(f"    v = self.{name}")
+
+            # fast path for values of the hinted type, the rest are generic
+            if kind == "skip":
+                for code in (fields, line):
+                    code.append(f"    if v.__class__ is not _t{i}:")
+            elif kind == "any":
+                for code in (fields, line):
+                    code.append("    if True:")
+            elif kind == "number":
+                fields.append("    if v.__class__ in _NUMBERS:")
+                fields.append(f"        d[{name!r}] = v")
+                if hint is int:
+                    line.append("    if v.__class__ is int:")
+                    line.append(f"        p.append(f{key + '{v}i'!r})")
+                elif hint is float:
+                    # v - v is nan for inf and nan, not written
+                    line.append("    if v.__class__ is float and v - v == 0:")
+                    line.append(f"        p.append(f{key + '{v!r}'!r})")
+                else:
+                    line.append("    if v.__class__ is bool:")
+                    line.append(
+                        f"        p.append({key + 'true'!r} if v else {key + 'false'!r})"
+                    )
+            else:
+                fields.append(f"    if v.__class__ is _t{i}:")
+                fields.append(f"        d[{name!r}] = v._value_")
+                # line of each member, None for values not written
+                namespace[f"_l{i}"] = {
+                    m: (
+                        None
+                        if _line_value(m.value) is None
+                        else key + _line_value(m.value)
+                    )
+                    for m in hint
+                }
+                line.append(f"    if v.__class__ is _t{i}:")
+                line.append(f"        v = _l{i}[v]")
+                line.append("        if v is not None:")
+                line.append("            p.append(v)")
+            if kind in ("number", "enum"):
+                for code in (fields, line):
+                    code.append("    else:")
+            fields.append(f"        _put(d, {name!r}, v)")
+            line.append(f"        _put_line(p, {key!r}, v)")
+
+            if kind == "skip":
+                continue
+            values.append(f"    v = self.{name}")
+            if kind == "number":
+                values.append("    if v.__class__ not in _NUMBERS:")
+            elif kind == "enum":
+                values.append(f"    if v.__class__ is _t{i}:")
+                values.append("        v = v._value_")
+                values.append("    else:")
+            else:
+                values.append("    if True:")
+            values.append("        v = _convert(v)")
+            values.append("        if v is _SKIP:")
+            values.append("            v = None")
+            values.append(f"    v{i} = v")
+
+        fields.append("    return d")
+        line.append('    return ",".join(p)')
+        values.append(
+            "    return ("
+            + "".join(
+                f"v{i}, "
+                for i, (kind, _) in enumerate(self.kinds.values())
+                if kind != "skip"
+            )
+            + ")"
+        )
+        source = "\n".join(fields + [""] + values + [""] + line)
+        exec(compile(source, f"<serializer {self.measurement}>", "exec"), namespace)
+        return namespace["fields"], namespace["values"], namespace["line_fields"]
+
+    def __repr__(self):
+        return f"Serializer({self.measurement})"
+
+    def influx_json(self, data, tags: dict, time: int) -> dict:
+        """`data` as a point dict for InfluxDB `write_points` / `Point.from_dict`"""
+        return {
+            "measurement": self.measurement,
+            "tags": tags,
+            "time": time,
+            "fields": self.fields(data),
+        }
+
+    def tag_set(self, tags: dict) -> str:
+        """Measurement and `tags` as the start of a line, cached by `tags`"""
+        key = tuple(tags.items())
+        head = self._tag_sets.get(key)
+        if head is None:
+            # sorted as InfluxDB prefers, empty tag values are not allowed
+            head = ",".join(
+                [_escape(self.measurement, ", ")]
+                + [
+                    f"{_escape(str(k))}={_escape(str(v))}"
+                    for k, v in sorted(tags.items())
+                    if str(v) != ""
+                ]
+            )
+            if len(self._tag_sets) >= 1024:
+                self._tag_sets.clear()
+            self._tag_sets[key] = head
+        return head
+
+    def line(self, data, tags: dict, time: Optional[int] = None) -> Optional[str]:
+        """
+        `data` as a line of InfluxDB line protocol, None if it has no fields
+
+        Non finite floats are dropped, as InfluxDB can not store them.
+        """
+        fields = self._line_fields(data)
+        if not fields:
+            return None
+        if time is None:
+            return f"{self.tag_set(tags)} {fields}"
+        return f"{self.tag_set(tags)} {fields} {time}"
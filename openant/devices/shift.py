@@ -5,6 +5,7 @@ from dataclasses import dataclass, field
 
 from ..easy.node import Node
 from .common import BatteryData, DeviceData, AntPlusDevice, DeviceType
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ class ShiftingSystemID(Enum):
         assert value
         return ShiftingSystemID.Unknown
 
+
 class FunctionSetEventType(Enum):
     Single = 0
     Double = 1
@@ -45,7 +47,10 @@ class FunctionSetEventType(Enum):
 @dataclass
 class FunctionSetEvent:
     function_set_id: int = field(default=0)
-    function_set_event_type: FunctionSetEventType = field(default=FunctionSetEventType.Unknown)
+    function_set_event_type: FunctionSetEventType = field(
+        default=FunctionSetEventType.Unknown
+    )
+
 
 @dataclass
 class FunctionSetConfiguration:
@@ -68,14 +73,30 @@ class ShiftData(DeviceData):
     invalid_outboard_front: int = field(default=0)
     shift_failure_rear: int = field(default=0)
     shift_failure_front: int = field(default=0)
-    function_set_1_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_2_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_3_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_4_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_5_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_6_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_7_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
-    function_set_8_configuration: FunctionSetConfiguration = field(default_factory=FunctionSetConfiguration)
+    function_set_1_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_2_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_3_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_4_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_5_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_6_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_7_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
+    function_set_8_configuration: FunctionSetConfiguration = field(
+        default_factory=FunctionSetConfiguration
+    )
     event_count: int = field(default=0)
     event_1: FunctionSetEvent = field(default_factory=FunctionSetEvent)
     event_2: FunctionSetEvent = field(default_factory=FunctionSetEvent)
@@ -89,6 +110,75 @@ class ShiftData(DeviceData):
     current_trim_front: int = field(default=0)
 
 
+SYSTEM_STATUS = Page(
+    "shift_system_status",
+    [
+        Field("gear_rear", 3, bits=5),
+        Field("gear_front", 3, shift=5, bits=3),
+        Field("total_rear", 4, bits=5),
+        Field("total_front", 4, shift=5, bits=3),
+        Field("invalid_inboard_rear", 5, bits=4),
+        Field("invalid_outboard_rear", 5, shift=4, bits=4),
+        Field("invalid_inboard_front", 6, bits=4),
+        Field("invalid_outboard_front", 6, shift=4, bits=4),
+        Field("shift_failure_rear", 7, bits=4),
+        Field("shift_failure_front", 7, shift=4, bits=4),
+    ],
+    number=0x01,
+)
+
+FUNCTION_SET_EVENTS = Page(
+    "function_set_events",
+    [Field("event_count", 1)]
+    + [
+        field
+        for event in range(1, 6)
+        for field in (
+            Field(f"event_{event}_id", event + 1, bits=4),
+            Field(
+                f"event_{event}_type",
+                event + 1,
+                shift=4,
+                bits=2,
+                enum=FunctionSetEventType,
+            ),
+        )
+    ],
+    number=0x02,
+)
+
+# function sets 1 to 7 in bytes 1 to 7, the page has no room for set 8
+FUNCTION_SET_CONFIGURATION = Page(
+    "function_set_configuration",
+    [
+        field
+        for function_set in range(1, 8)
+        for field in (
+            Field(
+                f"set_{function_set}_short", function_set, shift=1, bits=1, enum=bool
+            ),
+            Field(
+                f"set_{function_set}_double", function_set, shift=2, bits=1, enum=bool
+            ),
+            Field(f"set_{function_set}_long", function_set, shift=3, bits=1, enum=bool),
+        )
+    ],
+    number=0x03,
+)
+
+TRIM = Page(
+    "trim",
+    [
+        Field("event_count", 1),
+        Field("max_trim_rear", 2),
+        Field("max_trim_front", 3),
+        Field("current_trim_rear", 4),
+        Field("current_trim_front", 5),
+    ],
+    number=0x04,
+)
+
+
 class Shifting(AntPlusDevice):
     def __init__(
         self,
@@ -106,7 +196,7 @@ class Shifting(AntPlusDevice):
             trans_type=trans_type,
         )
 
-        self._event_count = [[0, 0], [0, 0], [0,0]] # For pages 0x01, 0x02, 0x04
+        self._event_count = [[0, 0], [0, 0], [0, 0]]  # For pages 0x01, 0x02, 0x04
 
         self.data = {**self.data, "shift": ShiftData()}
 
@@ -119,7 +209,7 @@ class Shifting(AntPlusDevice):
                 f"Battery info {self}: ID: {self.data['common'].last_battery_id}; Fractional V: {self.data['common'].last_battery_data.voltage_fractional} V; Coarse V: {self.data['common'].last_battery_data.voltage_coarse} V; Status: {self.data['common'].last_battery_data.status}"
             )
 
-        self.on_battery(data)
+        self._callback("on_battery", data)
 
     def on_data(self, data):
         page = data[0]
@@ -130,16 +220,7 @@ class Shifting(AntPlusDevice):
             self._event_count[0][0] = self._event_count[0][1]
             self._event_count[0][1] = data[1]
 
-            self.data["shift"].gear_rear = data[3] & 0x1F
-            self.data["shift"].gear_front = (data[3] & 0xE0) >> 5
-            self.data["shift"].total_rear = data[4] & 0x1F
-            self.data["shift"].total_front = (data[4] & 0xE0) >> 5
-            self.data["shift"].invalid_inboard_rear = data[5] & 0x0F
-            self.data["shift"].invalid_outboard_rear = (data[5] & 0xF0) >> 4
-            self.data["shift"].invalid_inboard_front = data[6] & 0x0F
-            self.data["shift"].invalid_outboard_front = (data[6] & 0xF0) >> 4
-            self.data["shift"].shift_failure_rear = data[7] & 0x0F
-            self.data["shift"].shift_failure_front = (data[7] & 0xF0) >> 4
+            SYSTEM_STATUS.update(self.data["shift"], data)
 
             delta_update_count = (
                 self._event_count[0][1] + 256 - self._event_count[0][0]
@@ -148,18 +229,19 @@ class Shifting(AntPlusDevice):
             # if it's a new event (count change)
             if delta_update_count:
                 _logger.info(f"Shifting status update {self}: {self.data['shift']}")
-                self.on_device_data(page, "shift_system_status", self.data["shift"])
+                self._on_device_data(page, "shift_system_status", self.data["shift"])
         elif page == 0x02:
+            event_count, *events = FUNCTION_SET_EVENTS.decode(data)
             self._event_count[1][0] = self._event_count[1][1]
-            self._event_count[1][1] = data[1]
+            self._event_count[1][1] = event_count
 
-            self.data["shift"].event_count = data[1]
+            self.data["shift"].event_count = event_count
 
-            self.data["shift"].event_1 = FunctionSetEvent(data[2] & 0x0F, FunctionSetEventType((data[2] & 0x03) >> 4))
-            self.data["shift"].event_2 = FunctionSetEvent(data[3] & 0x0F, FunctionSetEventType((data[3] & 0x03) >> 4))
-            self.data["shift"].event_3 = FunctionSetEvent(data[4] & 0x0F, FunctionSetEventType((data[4] & 0x03) >> 4))
-            self.data["shift"].event_4 = FunctionSetEvent(data[5] & 0x0F, FunctionSetEventType((data[5] & 0x03) >> 4))
-            self.data["shift"].event_5 = FunctionSetEvent(data[6] & 0x0F, FunctionSetEventType((data[6] & 0x03) >> 4))
+            self.data["shift"].event_1 = FunctionSetEvent(*events[0:2])
+            self.data["shift"].event_2 = FunctionSetEvent(*events[2:4])
+            self.data["shift"].event_3 = FunctionSetEvent(*events[4:6])
+            self.data["shift"].event_4 = FunctionSetEvent(*events[6:8])
+            self.data["shift"].event_5 = FunctionSetEvent(*events[8:10])
 
             delta_update_count = (
                 self._event_count[1][1] + 256 - self._event_count[1][0]
@@ -168,27 +250,43 @@ class Shifting(AntPlusDevice):
             # if it's a new event (count change)
             if delta_update_count:
                 _logger.info(f"Shifting status update {self}: {self.data['shift']}")
-                self.on_device_data(page, "shift_system_status", self.data["shift"])
+                self._on_device_data(page, "shift_system_status", self.data["shift"])
         elif page == 0x03:
-            self.data["shift"].function_set_1_configuration = FunctionSetConfiguration(bool(data[1] & 0x02), bool(data[1] & 0x04), bool(data[1] & 0x08))
-            self.data["shift"].function_set_2_configuration = FunctionSetConfiguration(bool(data[2] & 0x02), bool(data[2] & 0x04), bool(data[2] & 0x08))
-            self.data["shift"].function_set_3_configuration = FunctionSetConfiguration(bool(data[3] & 0x02), bool(data[3] & 0x04), bool(data[3] & 0x08))
-            self.data["shift"].function_set_4_configuration = FunctionSetConfiguration(bool(data[4] & 0x02), bool(data[4] & 0x04), bool(data[4] & 0x08))
-            self.data["shift"].function_set_5_configuration = FunctionSetConfiguration(bool(data[5] & 0x02), bool(data[5] & 0x04), bool(data[5] & 0x08))
-            self.data["shift"].function_set_6_configuration = FunctionSetConfiguration(bool(data[6] & 0x02), bool(data[6] & 0x04), bool(data[6] & 0x08))
-            self.data["shift"].function_set_7_configuration = FunctionSetConfiguration(bool(data[7] & 0x02), bool(data[7] & 0x04), bool(data[7] & 0x08))
-            self.data["shift"].function_set_8_configuration = FunctionSetConfiguration(bool(data[8] & 0x02), bool(data[8] & 0x04), bool(data[8] & 0x08))
+            sets = FUNCTION_SET_CONFIGURATION.decode(data)
+            self.data["shift"].function_set_1_configuration = FunctionSetConfiguration(
+                *sets[0:3]
+            )
+            self.data["shift"].function_set_2_configuration = FunctionSetConfiguration(
+                *sets[3:6]
+            )
+            self.data["shift"].function_set_3_configuration = FunctionSetConfiguration(
+                *sets[6:9]
+            )
+            self.data["shift"].function_set_4_configuration = FunctionSetConfiguration(
+                *sets[9:12]
+            )
+            self.data["shift"].function_set_5_configuration = FunctionSetConfiguration(
+                *sets[12:15]
+            )
+            self.data["shift"].function_set_6_configuration = FunctionSetConfiguration(
+                *sets[15:18]
+            )
+            self.data["shift"].function_set_7_configuration = FunctionSetConfiguration(
+                *sets[18:21]
+            )
 
         elif page == 0x04:
             self._event_count[2][0] = self._event_count[2][1]
-            self._event_count[2][1] = data[1]
 
             self.data["shift"] = ShiftData()
 
-            self.data["shift"].max_trim_rear = data[2]
-            self.data["shift"].max_trim_front = data[3]
-            self.data["shift"].current_trim_rear = data[4]
-            self.data["shift"].current_trim_front = data[5]
+            (
+                self._event_count[2][1],
+                self.data["shift"].max_trim_rear,
+                self.data["shift"].max_trim_front,
+                self.data["shift"].current_trim_rear,
+                self.data["shift"].current_trim_front,
+            ) = TRIM.decode(data)
 
             delta_update_count = (
                 self._event_count[2][1] + 16 - self._event_count[2][0]
@@ -197,5 +295,5 @@ class Shifting(AntPlusDevice):
             # if it's a new event (count change)
             if delta_update_count:
                 _logger.info(f"Shifting status update {self}: {self.data['shift']}")
-                self.on_device_data(page, "shift_system_status", self.data["shift"])
+                self._on_device_data(page, "shift_system_status", self.data["shift"])
             pass
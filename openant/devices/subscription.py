@@ -0,0 +1,147 @@
+"""
+Subscriptions to device data that only fire on meaningful changes
+
+`AntPlusDevice.on_device_data` is called for every decoded page, even when
+nothing changed. A `Subscription` made with `AntPlusDevice.subscribe` is
+only called when selected fields change by more than a deadband, at most
+once per `min_interval` seconds and, if `max_interval` is set, at least
+that often while pages arrive:
+
+.. code-block:: python
+
+    def write(page, page_name, data):
+        client.write(data.to_line_protocol(tags))
+
+    # pressure changed by over 2 mbar, at most once a second, every minute regardless
+    device.subscribe(
+        write, fields=["pressure"], deadband=2, min_interval=1, max_interval=60
+    )
+
+Changes are found from `DeviceData.to_tuple` so are compared as the values
+that would be serialized, enums by value. A change held back by
+`min_interval` is delivered with the first page after the interval if it
+still exceeds the deadband when compared with what was last delivered.
+"""
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Collection, Dict, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from .common import DeviceData
+
+# (page, page_name, data) as for `AntPlusDevice.on_device_data`
+SubscriptionCallback = Callable[[int, str, "DeviceData"], None]
+
+
+class Subscription:
+    """
+    `callback` for changes of `fields` (all if None) of pages in `pages` (all if None)
+
+    `deadband` is the change of a field that is ignored, for all fields or
+    by name. Fields that are not numbers are changed whenever not equal.
+    """
+
+    def __init__(
+        self,
+        callback: SubscriptionCallback,
+        fields: Optional[Collection[str]] = None,
+        deadband: Union[float, Dict[str, float]] = 0,
+        min_interval: float = 0.0,
+        max_interval: Optional[float] = None,
+        pages: Optional[Collection[str]] = None,
+    ):
+        self.callback = callback
+        self.fields = None if fields is None else tuple(fields)
+        self.deadband = deadband
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.pages = None if pages is None else frozenset(pages)
+        # pages offered and delivered to `callback`
+        self.offered = 0
+        self.delivered = 0
+        # by data class: (column index, deadband) of each field watched
+        self._watch: Dict[type, Tuple[Tuple[int, float], ...]] = {}
+        # by data class: values and monotonic time last delivered
+        self._last: Dict[type, Tuple[tuple, float]] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"Subscription({getattr(self.callback, '__qualname__', self.callback)}, "
+            f"fields={self.fields}, delivered {self.delivered} of {self.offered})"
+        )
+
+    def _watched(self, cls: type) -> Tuple[Tuple[int, float], ...]:
+        watch = self._watch.get(cls)
+        if watch is None:
+            columns = cls.serializer().columns
+            names = columns if self.fields is None else self.fields
+            watch = tuple(
+                (
+                    columns.index(name),
+                    (
+                        self.deadband.get(name, 0)
+                        if isinstance(self.deadband, dict)
+                        else self.deadband
+                    ),
+                )
+                for name in names
+                if name in columns
+            )
+            self._watch[cls] = watch
+        return watch
+
+    @staticmethod
+    def _changed(watch, values: tuple, last: tuple) -> bool:
+        for index, band in watch:
+            new = values[index]
+            old = last[index]
+            if new == old:
+                continue
+            if not band:
+                return True
+            try:
+                if abs(new - old) > band:
+                    return True
+            except TypeError:
+                # None or a value that is not a number
+                return True
+        return False
+
+    def offer(
+        self, page: int, page_name: str, data: "DeviceData", now: Optional[float] = None
+    ) -> bool:
+        """Call `callback` with the page if it is a meaningful change, True if called"""
+        if self.pages is not None and page_name not in self.pages:
+            return False
+        cls = type(data)
+        watch = self._watched(cls)
+        if not watch:
+            return False
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            self.offered += 1
+            values = data.to_tuple()
+            last = self._last.get(cls)
+            if last is not None:
+                last_values, last_time = last
+                elapsed = now - last_time
+                if elapsed < self.min_interval:
+                    return False
+                if not (
+                    self._changed(watch, values, last_values)
+                    or (self.max_interval is not None and elapsed >= self.max_interval)
+                ):
+                    return False
+            self._last[cls] = (values, now)
+            self.delivered += 1
+
+        self.callback(page, page_name, data)
+        return True
+
+    def reset(self):
+        """Forget values delivered, so the next page of each class is"""
+        with self._lock:
+            self._last.clear()
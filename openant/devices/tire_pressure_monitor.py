@@ -5,6 +5,7 @@ from dataclasses import dataclass, field
 
 from ..easy.node import Node
 from .common import DeviceData, AntPlusDevice, DeviceType
+from .schema import Field, Page
 
 _logger = logging.getLogger(__name__)
 
@@ -45,6 +46,33 @@ class TirePressureData(DeviceData):
     high_pressure_alarm: int = field(default=0x8000, metadata={"unit": "Millibar"})
 
 
+_POSITION = Field("position", 1, bits=4, enum=PressureSensorPosition)
+_ALARM_STATE = Field("alarm_state", 1, shift=4, bits=4, enum=PressureSensorAlarm)
+
+TIRE_PRESSURE = Page(
+    "tire_pressure",
+    [
+        _POSITION,
+        _ALARM_STATE,
+        Field("capabilities", 2),
+        Field("pressure", 6, size=2),
+    ],
+    number=0x01,
+)
+
+GET_SET = Page(
+    "get_set",
+    [
+        _POSITION,
+        _ALARM_STATE,
+        Field("barometric_pressure", 2, size=2),
+        Field("low_pressure_alarm", 4, size=2),
+        Field("high_pressure_alarm", 6, size=2),
+    ],
+    number=0x10,
+)
+
+
 class TirePressureMonitor(AntPlusDevice):
     def __init__(
         self,
@@ -72,30 +100,16 @@ class TirePressureMonitor(AntPlusDevice):
 
         # main page
         if page == 0x01:
-            self.data["tpms"].position = PressureSensorPosition(data[1] & 0x0F)
-            self.data["tpms"].alarm_state = PressureSensorAlarm((data[1] & 0xF0) >> 4)
-            self.data["tpms"].capabilities = data[2]
-
-            self.data["tpms"].pressure = int.from_bytes(data[6:8], byteorder="little")
+            TIRE_PRESSURE.update(self.data["tpms"], data)
 
             _logger.info(f"Tire pressure main update {self}: {self.data['tpms']}")
 
-            self.on_device_data(page, "tire_pressure", self.data["tpms"])
+            self._on_device_data(page, "tire_pressure", self.data["tpms"])
         # get/set parameters
         if page == 0x10:
-            self.data["tpms"].position = PressureSensorPosition(data[1] & 0x0F)
-            self.data["tpms"].alarm_state = PressureSensorAlarm((data[1] & 0xF0) >> 4)
-            self.data["tpms"].barometric_pressure = int.from_bytes(
-                data[2:4], byteorder="little"
-            )
-            self.data["tpms"].low_pressure_alarm = int.from_bytes(
-                data[4:6], byteorder="little"
-            )
-            self.data["tpms"].high_pressure_alarm = int.from_bytes(
-                data[6:8], byteorder="little"
-            )
+            GET_SET.update(self.data["tpms"], data)
 
-            self.on_device_data(page, "get_set", self.data["tpms"])
+            self._on_device_data(page, "get_set", self.data["tpms"])
 
     def set_data(
         self,
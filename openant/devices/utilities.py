@@ -2,9 +2,11 @@
 Non specific device helper functions
 """
 import json
-from typing import Union
+from typing import Optional, Union
 from ..devices import device_profiles
 from ..devices.common import DeviceType, Node
+from ..devices.inventory import DeviceInventory
+from ..devices.pairing import PairingCache
 
 
 def auto_create_device(
@@ -12,6 +14,9 @@ def auto_create_device(
     device_id: int,
     device_type: Union[DeviceType, int, str],
     trans_type: int = 0,
+    inventory: Optional[DeviceInventory] = None,
+    pairing: Optional[PairingCache] = None,
+    tag: str = "",
 ):
     """
     Auto instantiates ANT+ device object based on supplied parameters
@@ -20,6 +25,9 @@ def auto_create_device(
     :param device_id int: device ID or 0 for first found
     :param device_type Union[DeviceType, int, str]: device type as a DeviceType, device type int or DeviceType.name
     :param trans_type int: transmission type
+    :param inventory DeviceInventory: if device_id is 0, use the device of the type last seen in the inventory if any
+    :param pairing PairingCache: if device_id is 0, use the device paired as `tag` if any, before the inventory; the device attached to is paired as `tag`
+    :param tag str: location or use of the device in `pairing`
     :raises ValueError: profile object for device does not exist - needs creating
     """
     if isinstance(device_type, int):
@@ -32,8 +40,21 @@ def auto_create_device(
     if dt not in device_profiles:
         raise ValueError(f"{dt} not in device profiles {list(device_profiles.keys())}")
 
+    if device_id == 0 and pairing is not None:
+        paired = pairing.get(dt.value, tag)
+        if paired:
+            device_id, _, trans_type = paired
+
+    if device_id == 0 and inventory is not None:
+        known = inventory.devices(dt)
+        if known:
+            device_id, trans_type = known[0].device_id, known[0].trans_type
+
     profile = device_profiles[dt]
-    return profile(node, device_id=device_id, trans_type=trans_type)
+    device = profile(node, device_id=device_id, trans_type=trans_type)
+    if pairing is not None:
+        device.use_pairing(pairing, tag)
+    return device
 
 
 def read_json(json_file):
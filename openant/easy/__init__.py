@@ -21,5 +21,6 @@
 # DEALINGS IN THE SOFTWARE.
 from . import node
 from . import channel
+from . import pool
 
-__all__ = ["node", "channel"]
+__all__ = ["node", "channel", "pool"]
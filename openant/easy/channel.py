@@ -21,8 +21,9 @@
 # DEALINGS IN THE SOFTWARE.
 
 
+import collections
 import logging
-from typing import List
+from typing import List, Optional, Tuple
 
 from ..base.message import Message
 from ..easy.exception import TransferFailedException
@@ -42,10 +43,28 @@ class Channel:
         UNIDIRECTIONAL_RECEIVE_ONLY = 0x40
         UNIDIRECTIONAL_TRANSMIT_ONLY = 0x50
 
+    class ExtAssign:
+        BACKGROUND_SCANNING = 0x01
+        FREQUENCY_AGILITY = 0x04
+        FAST_CHANNEL_INITIATION = 0x10
+        ASYNCHRONOUS_TRANSMISSION = 0x20
+
+    # entries in inclusion/exclusion list
+    MAX_ID_LIST = 4
+
     def __init__(self, id, node, ant):
         self.id = id
         self._node = node
         self._ant = ant
+        # (device number, device type, transmission type) last set
+        self.channel_id: Optional[Tuple[int, int, int]] = None
+        self.ext_assign: Optional[int] = None
+        self.rf_freq: Optional[int] = None
+        self.agility_frequencies: Optional[Tuple[int, int, int]] = None
+        # channel event codes received, updated by the Node
+        self.event_counts = collections.Counter()
+        # acknowledged and burst transfers sent again after failing
+        self.tx_retries = 0
 
     def on_broadcast_data(self, data):
         assert data
@@ -63,20 +82,29 @@ class Channel:
         assert data
 
     def wait_for_event(self, ok_codes):
-        return wait_for_event(ok_codes, self._node._events, self._node._event_cond)
+        return wait_for_event(
+            ok_codes, self._node._events, self._node._event_cond, self._node._stopped
+        )
 
     def wait_for_response(self, event_id):
         return wait_for_response(
-            event_id, self._node._responses, self._node._responses_cond
+            event_id,
+            self._node._responses,
+            self._node._responses_cond,
+            self._node._stopped,
         )
 
     def wait_for_special(self, event_id):
         return wait_for_special(
-            event_id, self._node._responses, self._node._responses_cond
+            event_id,
+            self._node._responses,
+            self._node._responses_cond,
+            self._node._stopped,
         )
 
     def _assign(self, channelType, networkNumber, ext_assign):
         self._ant.assign_channel(self.id, channelType, networkNumber, ext_assign)
+        self.ext_assign = ext_assign
         return self.wait_for_response(Message.ID.ASSIGN_CHANNEL)
 
     def _unassign(self):
@@ -101,8 +129,32 @@ class Channel:
 
     def set_id(self, deviceNum, deviceType, transmissionType):
         self._ant.set_channel_id(self.id, deviceNum, deviceType, transmissionType)
+        self.channel_id = (deviceNum, deviceType, transmissionType)
         return self.wait_for_response(Message.ID.SET_CHANNEL_ID)
 
+    def set_id_list(self, ids: List[Tuple[int, int, int]], exclude: bool = False):
+        """
+        Filter a wildcard search against a list of channel IDs
+
+        :param ids List[Tuple[int, int, int]]: (device number, device type, transmission type) entries, 0 is a wildcard
+        :param exclude bool: ignore devices in list rather than only accept those in it
+        """
+        if len(ids) > self.MAX_ID_LIST:
+            raise ValueError(
+                f"ID list of {len(ids)} exceeds maximum of {self.MAX_ID_LIST} entries"
+            )
+        for index, (deviceNum, deviceType, transmissionType) in enumerate(ids):
+            self._ant.add_channel_id(
+                self.id, deviceNum, deviceType, transmissionType, index
+            )
+            self.wait_for_response(Message.ID.ADD_CHANNEL_ID)
+        self._ant.config_list(self.id, len(ids), exclude)
+        return self.wait_for_response(Message.ID.CONFIG_LIST)
+
+    def clear_id_list(self):
+        self._ant.config_list(self.id, 0, False)
+        return self.wait_for_response(Message.ID.CONFIG_LIST)
+
     def set_period(self, messagePeriod):
         self._ant.set_channel_period(self.id, messagePeriod)
         return self.wait_for_response(Message.ID.SET_CHANNEL_PERIOD)
@@ -113,8 +165,53 @@ class Channel:
 
     def set_rf_freq(self, rfFreq):
         self._ant.set_channel_rf_freq(self.id, rfFreq)
+        self.rf_freq = rfFreq
         return self.wait_for_response(Message.ID.SET_CHANNEL_RF_FREQ)
 
+    def set_frequency_agility(self, freq1: int, freq2: int, freq3: int):
+        """
+        Configure frequency agility; the channel must be assigned with
+        `Channel.ExtAssign.FREQUENCY_AGILITY` and is not for use on ANT+ channels.
+        """
+        if not (self.ext_assign or 0) & Channel.ExtAssign.FREQUENCY_AGILITY:
+            _logger.warning(
+                "channel %s not assigned with frequency agility, it will have no effect",
+                self.id,
+            )
+        self._ant.set_frequency_agility(self.id, freq1, freq2, freq3)
+        self.agility_frequencies = (freq1, freq2, freq3)
+        return self.wait_for_response(Message.ID.FREQUENCY_AGILITY)
+
+    def get_frequency_status(self) -> dict:
+        """
+        Frequencies configured on the channel and the RF events that cause an
+        agile channel to change frequency.
+
+        The stick does not report which of the agile frequencies is currently
+        in use, a rising collision/RX fail count shows congestion.
+        """
+        return {
+            "rf_freq": self.rf_freq,
+            "agility_frequencies": self.agility_frequencies,
+            "collisions": self.event_counts[Message.Code.EVENT_CHANNEL_COLLISION],
+            "rx_fail": self.event_counts[Message.Code.EVENT_RX_FAIL],
+            "rx_fail_go_to_search": self.event_counts[
+                Message.Code.EVENT_RX_FAIL_GO_TO_SEARCH
+            ],
+        }
+
+    def set_low_priority_search_timeout(self, timeout):
+        self._ant.set_low_priority_channel_search_timeout(self.id, timeout)
+        return self.wait_for_response(Message.ID.LOW_PRIORITY_CHANNEL_SEARCH_TIMEOUT)
+
+    def set_search_priority(self, priority: int):
+        self._ant.set_channel_search_priority(self.id, priority)
+        return self.wait_for_response(Message.ID.CHANNEL_SEARCH_PRIORITY)
+
+    def set_search_sharing(self, cycles: int):
+        self._ant.set_channel_search_sharing(self.id, cycles)
+        return self.wait_for_response(Message.ID.CHANNEL_SEARCH_SHARING)
+
     def enable_extended_messages(self, enable):
         self._ant.enable_extended_messages(self.id, enable)
         return self.wait_for_response(Message.ID.ENABLE_EXT_RX_MESGS)
@@ -141,6 +238,7 @@ class Channel:
             _logger.debug("done sending acknowledged data %s", self.id)
         except TransferFailedException:
             _logger.warning("failed to send acknowledged data %s, retrying", self.id)
+            self.tx_retries += 1
             self.send_acknowledged_data(data)
 
     def send_burst_transfer_packet(self, channelSeq, data: List[int], first):
@@ -156,4 +254,5 @@ class Channel:
             _logger.debug("done sending burst transfer %s", self.id)
         except TransferFailedException:
             _logger.warning("failed to send burst transfer %s, retrying", self.id)
+            self.tx_retries += 1
             self.send_burst_transfer(data)
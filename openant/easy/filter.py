@@ -22,6 +22,7 @@
 
 
 import logging
+import time
 
 from ..base.message import Message
 from ..easy.exception import AntException, TransferFailedException
@@ -29,16 +30,20 @@ from ..easy.exception import AntException, TransferFailedException
 _logger = logging.getLogger("openant.easy.filter")
 
 
-def wait_for_message(match, process, queue, condition):
+def wait_for_message(match, process, queue, condition, stopped=None, timeout=10.0):
     """
     Wait for a specific message in the *queue* guarded by the *condition*
     matching the function *match* (which is a function that takes a
     message as a parameter and returns a boolean). The messages is
     processed by the *process* function before returning it.
+
+    Gives up after *timeout* seconds, or once the optional *stopped* event is
+    set and the *condition* notified.
     """
     _logger.debug("wait for message matching %r", match)
+    deadline = time.monotonic() + timeout
     condition.acquire()
-    for _ in range(10):
+    while True:
         _logger.debug("looking for matching message in %r", queue)
         # _logger.debug("wait for response to %#02x, checking", mId)
         for message in queue:
@@ -57,12 +62,17 @@ def wait_for_message(match, process, queue, condition):
                 condition.release()
                 raise TransferFailedException()
         _logger.debug(" - could not find response matching %r", match)
-        condition.wait(1.0)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or (stopped is not None and stopped.is_set()):
+            break
+        condition.wait(remaining)
     condition.release()
+    if stopped is not None and stopped.is_set():
+        raise AntException("Stopped while waiting for message")
     raise AntException("Timed out while waiting for message")
 
 
-def wait_for_event(ok_codes, queue, condition):
+def wait_for_event(ok_codes, queue, condition, stopped=None):
     def match(params):
         _, _, data = params
         return data[0] in ok_codes
@@ -70,10 +80,10 @@ def wait_for_event(ok_codes, queue, condition):
     def process(params):
         return params
 
-    return wait_for_message(match, process, queue, condition)
+    return wait_for_message(match, process, queue, condition, stopped)
 
 
-def wait_for_response(event_id, queue, condition):
+def wait_for_response(event_id, queue, condition, stopped=None):
     """
     Waits for a response to a specific message sent by the channel response
     message, 0x40. It's expected to return RESPONSE_NO_ERROR, 0x00.
@@ -92,10 +102,10 @@ def wait_for_response(event_id, queue, condition):
                 f"Responded with error {str(data[0])}: {Message.Code.lookup(data[0])}"
             )
 
-    return wait_for_message(match, process, queue, condition)
+    return wait_for_message(match, process, queue, condition, stopped)
 
 
-def wait_for_special(event_id, queue, condition):
+def wait_for_special(event_id, queue, condition, stopped=None):
     """
     Waits for special responses to messages such as Channel ID, ANT
     Version, etc. This does not throw any exceptions, besides timeouts.
@@ -108,4 +118,4 @@ def wait_for_special(event_id, queue, condition):
     def process(params):
         return params
 
-    return wait_for_message(match, process, queue, condition)
+    return wait_for_message(match, process, queue, condition, stopped)
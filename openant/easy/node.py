@@ -25,9 +25,11 @@ import collections
 import threading
 import logging
 import queue
-from typing import Optional, List
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Tuple
 
 from openant.base.driver import (
+    Driver,
     StandardOptions,
     AdvancedOptions,
     AdvancedOptionsTwo,
@@ -37,20 +39,90 @@ from openant.easy.exception import AntException
 
 from ..base.ant import Ant
 from ..base.message import Message
+from ..base.metrics import GAUGE, MetricsServer, Registry, Sample
+from ..base.trace import Stage, Tracer, stamp
 from ..easy.channel import Channel
 from ..easy.filter import wait_for_event, wait_for_response, wait_for_special
+from ..easy.profiling import CallbackMonitor, SamplingProfiler
 
 _logger = logging.getLogger("openant.easy.node")
 
+# channel callback for each type of data dispatched
+_DATA_CALLBACKS = {
+    "broadcast": "on_broadcast_data",
+    "burst": "on_burst_data",
+    "broadcast_tx": "on_broadcast_tx_data",
+    "acknowledge": "on_acknowledge_data",
+}
+
+
+@dataclass
+class SearchPolicy:
+    """
+    Search configuration applied to receive channels opened by ANT+ devices.
+
+    When many channels are searching at once they compete for the radio. A
+    higher `priority` makes a channel search first, `sharing_cycles` makes
+    searching channels take turns, and searching only in low priority mode
+    (`search_timeout` 0 with a `low_priority_search_timeout`) means a search
+    never interrupts channels that are already tracking. With
+    `exclude_tracked`, wildcard channels ignore devices already set on another
+    channel of the same device type.
+
+    >>> policy = SearchPolicy(priority=1, device_priorities={120: 10})
+    >>> policy.priority_for(120), policy.priority_for(11)
+    (10, 1)
+    """
+
+    priority: Optional[int] = None
+    device_priorities: Dict[int, int] = field(default_factory=dict)
+    sharing_cycles: Optional[int] = None
+    search_timeout: int = 0xFF
+    low_priority_search_timeout: Optional[int] = None
+    exclude_tracked: bool = False
+
+    def priority_for(self, device_type: int) -> Optional[int]:
+        return self.device_priorities.get(device_type, self.priority)
+
+    def apply(self, channel: Channel, device_type: int):
+        """Configure search of `channel` for a device of `device_type`"""
+        channel.set_search_timeout(self.search_timeout)
+
+        # optional messages are not supported by all sticks, so don't fail the open
+        # or skip the others when one is rejected
+        priority = self.priority_for(device_type)
+        for name, setter, value in (
+            (
+                "low priority search timeout",
+                channel.set_low_priority_search_timeout,
+                self.low_priority_search_timeout,
+            ),
+            ("search priority", channel.set_search_priority, priority),
+            ("search sharing", channel.set_search_sharing, self.sharing_cycles),
+        ):
+            if value is None:
+                continue
+            try:
+                setter(value)
+            except Exception as e:
+                _logger.warning(f"Failed to set {name} on #{channel.id}: {e}")
+
 
 class Node:
-    def __init__(self):
+    def __init__(
+        self, driver: Optional[Driver] = None, datas: Optional[queue.Queue] = None
+    ):
+        """
+        :param driver Driver: driver of the stick, the first found if None
+        :param datas queue.Queue: queue of data to dispatch, shared by nodes dispatched by
+            one thread as in `NodePool`; a queue of its own if None
+        """
         self._responses_cond = threading.Condition()
         self._responses = collections.deque()
         self._event_cond = threading.Condition()
         self._events = collections.deque()
 
-        self._datas = queue.Queue()
+        self._datas = queue.Queue() if datas is None else datas
 
         # will replace with response from node at open
         self.serial: Optional[int] = None
@@ -63,10 +135,24 @@ class Node:
         self.advanced_options_two = set()
         self.advanced_options_three = set()
         self.max_sensorcore_channels = 0
-
-        self.ant = Ant()
+        self.search_policy = SearchPolicy()
+        # latency tracing, see `enable_tracing`
+        self.tracer: Optional[Tracer] = None
+        # callback timing and profiling, see `enable_callback_monitor` and `start_profiling`
+        self.callback_monitor: Optional[CallbackMonitor] = None
+        self.profiler: Optional[SamplingProfiler] = None
+        self._dispatch_thread: Optional[threading.Thread] = None
+
+        self.ant = Ant(driver)
+
+        # metrics of the node, its channels and devices opened on it
+        self.metrics = Registry()
+        self.metrics.register(self.ant.collect_metrics)
+        self.metrics.register(self.collect_metrics)
+        self._metrics_server: Optional[MetricsServer] = None
 
         self._running = True
+        self._stopped = threading.Event()
 
         self._worker_thread = threading.Thread(target=self._worker, name="openant.easy")
         self._worker_thread.start()
@@ -108,6 +194,60 @@ class Node:
             if self.channels[i].id == channel_id:
                 self.remove_channel(self.channels[i])
 
+    def tracked_ids(self, device_type: int) -> List[Tuple[int, int, int]]:
+        """Channel IDs of `device_type` set on channels with a specific device number"""
+        return [
+            c.channel_id
+            for c in self.channels
+            if c.channel_id is not None
+            and c.channel_id[0] != 0
+            and c.channel_id[1] == device_type
+        ]
+
+    def collect_metrics(self) -> List[Sample]:
+        """`_datas` depth and channel events and retries as metrics `Sample`"""
+        samples = [
+            Sample(
+                "openant_node_datas_queue_depth",
+                self._datas.qsize(),
+                kind=GAUGE,
+                help="Data waiting for dispatch to channel callbacks",
+            )
+        ]
+        for channel in list(self.channels):
+            labels = {"channel": str(channel.id)}
+            samples.extend(
+                Sample(
+                    "openant_channel_events_total",
+                    count,
+                    {**labels, "code": Message.Code.lookup(code) or f"0x{code:02x}"},
+                    help="Channel events by event code",
+                )
+                for code, count in sorted(dict(channel.event_counts).items())
+            )
+            samples.append(
+                Sample(
+                    "openant_channel_tx_retries_total",
+                    channel.tx_retries,
+                    labels,
+                    help="Acknowledged and burst transfers sent again after failing",
+                )
+            )
+        return samples
+
+    def start_metrics_server(
+        self, port: int = 0, host: str = "127.0.0.1"
+    ) -> MetricsServer:
+        """
+        Serve `metrics` in the Prometheus text format at http://`host`:`port`/metrics until stopped
+
+        :param port int: port to listen on, 0 for any free port
+        """
+        if self._metrics_server is None:
+            self._metrics_server = MetricsServer([self.metrics], port, host)
+            self._metrics_server.start()
+        return self._metrics_server
+
     def request_message(self, messageId: int):
         _logger.debug("requesting message %#02x", messageId)
         self.ant.request_message(0, messageId)
@@ -134,13 +274,17 @@ class Node:
         return self.wait_for_special(Message.ID.ENABLE_LED)
 
     def wait_for_event(self, ok_codes):
-        return wait_for_event(ok_codes, self._events, self._event_cond)
+        return wait_for_event(ok_codes, self._events, self._event_cond, self._stopped)
 
     def wait_for_response(self, event_id):
-        return wait_for_response(event_id, self._responses, self._responses_cond)
+        return wait_for_response(
+            event_id, self._responses, self._responses_cond, self._stopped
+        )
 
     def wait_for_special(self, event_id):
-        return wait_for_special(event_id, self._responses, self._responses_cond)
+        return wait_for_special(
+            event_id, self._responses, self._responses_cond, self._stopped
+        )
 
     def _worker_response(self, channel, event, data):
         _logger.debug(f"_worker_response {channel}, {event}, {data}")
@@ -153,7 +297,7 @@ class Node:
             self.advanced_options_two = AdvancedOptionsTwo.from_byte(data[4])
             self.max_sensorcore_channels = data[5]
             if len(data) >= 7:
-                self.advanced_options_three = AdvancedOptionsThree.from_byte(data[4])
+                self.advanced_options_three = AdvancedOptionsThree.from_byte(data[6])
             _logger.info(
                 f"capabilities max_channels: {self.max_channels}, max_networks {self.max_networks}, standard_options: {self.standard_options}, advanced_options: {self.advanced_options}; {self.advanced_options_two}"
             )
@@ -171,15 +315,19 @@ class Node:
 
     def _worker_event(self, channel, event, data):
         _logger.debug(f"_worker_event {channel}, {event}, {data}")
+        if self.tracer is not None:
+            stamp(data, Stage.DATAS_PUT)
         if event == Message.Code.EVENT_RX_BURST_PACKET:
-            self._datas.put(("burst", channel, data))
+            self._datas.put((self, "burst", channel, data))
         elif event == Message.Code.EVENT_RX_BROADCAST:
-            self._datas.put(("broadcast", channel, data))
+            self._datas.put((self, "broadcast", channel, data))
         elif event == Message.Code.EVENT_TX:
-            self._datas.put(("broadcast_tx", channel, data))
+            self._datas.put((self, "broadcast_tx", channel, data))
         elif event == Message.Code.EVENT_RX_ACKNOWLEDGED:
-            self._datas.put(("acknowledge", channel, data))
+            self._datas.put((self, "acknowledge", channel, data))
         else:
+            if channel is not None and channel < len(self.channels):
+                self.channels[channel].event_counts[event] += 1
             self._event_cond.acquire()
             self._events.append((channel, event, data))
             self._event_cond.notify()
@@ -195,23 +343,89 @@ class Node:
         self.ant.start()
 
     def _main(self):
+        self._dispatch_thread = threading.current_thread()
         while self._running:
-            try:
-                (data_type, channel, data) = self._datas.get(True, 1.0)
-                self._datas.task_done()
-
-                if data_type == "broadcast":
-                    self.channels[channel].on_broadcast_data(data)
-                elif data_type == "burst":
-                    self.channels[channel].on_burst_data(data)
-                elif data_type == "broadcast_tx":
-                    self.channels[channel].on_broadcast_tx_data(data)
-                elif data_type == "acknowledge":
-                    self.channels[channel].on_acknowledge_data(data)
-                else:
-                    _logger.warning("Unknown data type '%s': %r", data_type, data)
-            except queue.Empty as _:
-                pass
+            item = self._datas.get()
+            self._datas.task_done()
+            # None is put by stop
+            if item is None:
+                break
+            # node that queued the data, as the queue may be shared
+            node, data_type, channel, data = item
+            node._dispatch(data_type, channel, data)
+
+    def _dispatch(self, data_type: str, channel: int, data):
+        if self.tracer is not None:
+            stamp(data, Stage.DATAS_GET)
+
+        # channel removed whilst its data was still queued
+        if channel >= len(self.channels):
+            _logger.debug("Data for removed channel %d dropped", channel)
+            return
+
+        hook = _DATA_CALLBACKS.get(data_type)
+        if hook is None:
+            _logger.warning("Unknown data type '%s': %r", data_type, data)
+            return
+
+        callback = getattr(self.channels[channel], hook)
+        if self.callback_monitor is None:
+            callback(data)
+        else:
+            self.callback_monitor.call(f"channel_{channel}", hook, callback, data)
+
+        if self.tracer is not None:
+            self.tracer.finish(channel, data)
+
+    def enable_tracing(self, sample_interval: int = 1) -> Tracer:
+        """
+        Trace latency of one in `sample_interval` data messages from driver read to channel callback
+
+        :returns Tracer: histograms of latency per stage and channel
+        """
+        tracer = Tracer(sample_interval)
+        self.tracer = tracer
+        self.ant.tracer = tracer
+        return tracer
+
+    def disable_tracing(self):
+        self.ant.tracer = None
+        self.tracer = None
+
+    def enable_callback_monitor(
+        self, threshold: float = 0.005, report_interval: float = 10.0
+    ) -> CallbackMonitor:
+        """
+        Time channel and ANT+ device callbacks, logging those taking over `threshold` seconds
+
+        :returns CallbackMonitor: statistics of each callback
+        """
+        monitor = CallbackMonitor(threshold, report_interval)
+        self.callback_monitor = monitor
+        return monitor
+
+    def disable_callback_monitor(self):
+        self.callback_monitor = None
+
+    def start_profiling(self, interval: float = 0.005) -> SamplingProfiler:
+        """
+        Sample the stack of the thread dispatching data to callbacks every `interval` seconds
+
+        The node must have been started. Starting again after `stop_profiling` adds to the
+        same samples.
+        """
+        if self._dispatch_thread is None:
+            raise RuntimeError("Node must be started to profile dispatch")
+        if self.profiler is None or self.profiler.thread is not self._dispatch_thread:
+            self.profiler = SamplingProfiler(self._dispatch_thread, interval)
+        self.profiler.interval = interval
+        self.profiler.start()
+        return self.profiler
+
+    def stop_profiling(self) -> Optional[SamplingProfiler]:
+        if self.profiler is not None:
+            self.profiler.stop()
+        return self.profiler
 
     def start(self):
         self._main()
@@ -220,5 +434,15 @@ class Node:
         if self._running:
             _logger.debug("Stoping openant.easy")
             self._running = False
+            self._stopped.set()
+            # wake up anything waiting for a response or event, and _main
+            for cond in (self._responses_cond, self._event_cond):
+                with cond:
+                    cond.notify_all()
+            self._datas.put(None)
             self.ant.stop()
+            if self._metrics_server is not None:
+                self._metrics_server.stop()
+                self._metrics_server = None
+            self.stop_profiling()
             self._worker_thread.join()
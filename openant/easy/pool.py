@@ -0,0 +1,100 @@
+"""
+Pool of `Node` objects, one for each ANT stick, used as if a single `Node`.
+
+The pool can be passed in place of a `Node` to `AntPlusDevice` profiles; each
+new channel is placed on the stick with the most free channels. Data of all
+nodes is put on one queue and dispatched by the thread calling `start`, so the
+callbacks of channels on all sticks run one at a time on that thread, as with
+a single `Node`.
+
+.. code-block:: python
+
+    pool = NodePool()
+    pool.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+    devices = [PowerMeter(pool) for _ in range(20)]
+    pool.start()
+"""
+
+import logging
+import queue
+import threading
+from typing import List, Optional, Tuple
+
+from ..base.driver import Driver, DriverNotFound, find_drivers
+from ..easy.channel import Channel
+from ..easy.node import Node, SearchPolicy
+
+_logger = logging.getLogger("openant.easy.pool")
+
+
+class NodePool:
+    def __init__(self, drivers: Optional[List[Driver]] = None):
+        """
+        :param drivers List[Driver]: drivers of sticks to use, all sticks found if None
+        :raises DriverNotFound: no sticks available
+        """
+        if drivers is None:
+            drivers = find_drivers()
+        if not drivers:
+            raise DriverNotFound
+
+        self.search_policy = SearchPolicy()
+        self.nodes: List[Node] = []
+        # data of all nodes, dispatched by `start`
+        self._datas = queue.Queue()
+
+        try:
+            for driver in drivers:
+                node = Node(driver, self._datas)
+                node.search_policy = self.search_policy
+                self.nodes.append(node)
+        except Exception:
+            self.stop()
+            raise
+
+        _logger.info(f"Node pool of {len(self.nodes)} nodes")
+
+    @property
+    def channels(self) -> List[Channel]:
+        return [channel for node in self.nodes for channel in node.channels]
+
+    @property
+    def max_channels(self) -> int:
+        return sum(node.max_channels for node in self.nodes)
+
+    def least_loaded(self) -> Node:
+        """Node with the lowest proportion of its channels in use"""
+        return min(self.nodes, key=lambda n: len(n.channels) / n.max_channels)
+
+    def new_channel(
+        self, ctype: int, network_number: int = 0x00, ext_assign: Optional[int] = None
+    ):
+        node = self.least_loaded()
+        if len(node.channels) >= node.max_channels:
+            raise RuntimeError(
+                f"Cannot create new channel: all {self.max_channels} channels in pool in use"
+            )
+        _logger.debug(f"placing channel on node {self.nodes.index(node)}")
+        return node.new_channel(ctype, network_number, ext_assign)
+
+    def remove_channel(self, channel: Channel):
+        channel._node.remove_channel(channel)
+
+    def tracked_ids(self, device_type: int) -> List[Tuple[int, int, int]]:
+        return [i for node in self.nodes for i in node.tracked_ids(device_type)]
+
+    def set_network_key(self, network: int, key: List[int]):
+        for node in self.nodes:
+            node.set_network_key(network, key)
+
+    def start(self):
+        """Dispatch data of all nodes on the calling thread, blocks like `Node.start`"""
+        thread = threading.current_thread()
+        # for profiling of the dispatch thread of any node
+        for node in self.nodes[1:]:
+            node._dispatch_thread = thread
+        self.nodes[0].start()
+
+    def stop(self):
+        for node in self.nodes:
+            node.stop()
@@ -0,0 +1,234 @@
+"""
+Callback timing and sampling profiling of the dispatch thread
+
+Every channel and ANT+ device callback runs on the thread dispatching data
+for all channels, so a slow callback delays the others. With a
+`CallbackMonitor` set on a `Node` each callback invocation is timed into
+`CallbackStats` and those over `threshold` are logged with where the
+callback is defined. A `SamplingProfiler` periodically samples the stack of
+the dispatch thread to show where its time goes, started and stopped at
+runtime:
+
+.. code-block:: python
+
+    monitor = node.enable_callback_monitor(threshold=0.005)
+    profiler = node.start_profiling()
+    # later
+    node.stop_profiling()
+    print(monitor.slowest(), profiler.top())
+"""
+# Ant
+#
+# Copyright (c) 2012, Gustav Tiger <gustav@tiger.name>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import collections
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+_logger = logging.getLogger("openant.easy.profiling")
+
+
+def callback_site(callback: Callable) -> str:
+    """
+    Qualified name and file:line `callback` is defined at, as far as can be told
+
+    >>> callback_site(callback_site).startswith("openant.easy.profiling.callback_site (")
+    True
+    """
+    func = getattr(callback, "__func__", callback)
+    func = getattr(func, "func", func)  # functools.partial
+    code = getattr(func, "__code__", None)
+    name = getattr(func, "__qualname__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    if module:
+        name = f"{module}.{name}"
+    if code is None:
+        return name
+    return f"{name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+@dataclass
+class CallbackStats:
+    # where the callback last timed is defined
+    site: str
+    calls: int = 0
+    # seconds
+    total: float = 0.0
+    max: float = 0.0
+    slow: int = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class CallbackMonitor:
+    """
+    Times callbacks, keeping `CallbackStats` by (owner, hook)
+
+    Calls over `threshold` seconds are counted as slow and logged, at most
+    once per `report_interval` seconds for each callback. Times exclude
+    those of callbacks timed within, so the channel callback of a device is
+    not charged for the user callbacks it calls.
+    """
+
+    def __init__(self, threshold: float = 0.005, report_interval: float = 10.0):
+        self.threshold = threshold
+        self.report_interval = report_interval
+        self.stats: Dict[Tuple[str, str], CallbackStats] = {}
+        self._reported: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        # by thread: seconds of timed callbacks within each call in progress
+        self._nested = threading.local()
+
+    def call(self, owner: str, hook: str, callback: Callable, *args):
+        """Call `callback` with `args` as `hook` of `owner`, timing it"""
+        nested = getattr(self._nested, "calls", None)
+        if nested is None:
+            nested = self._nested.calls = []
+        nested.append(0.0)
+        begin = time.perf_counter()
+        try:
+            return callback(*args)
+        finally:
+            elapsed = time.perf_counter() - begin
+            within = nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            self._record(owner, hook, callback, elapsed - within)
+
+    def _record(self, owner: str, hook: str, callback: Callable, elapsed: float):
+        key = (owner, hook)
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = CallbackStats(callback_site(callback))
+            stats.calls += 1
+            stats.total += elapsed
+            if elapsed > stats.max:
+                stats.max = elapsed
+            if elapsed <= self.threshold:
+                return
+            stats.slow += 1
+            now = time.monotonic()
+            if (
+                now - self._reported.get(key, -self.report_interval)
+                < self.report_interval
+            ):
+                return
+            self._reported[key] = now
+            # site can change if a callback is replaced
+            stats.site = callback_site(callback)
+            slow = stats.slow
+
+        _logger.warning(
+            f"Slow callback {owner}.{hook} took {elapsed * 1000:.1f} ms "
+            f"(> {self.threshold * 1000:.1f} ms, {slow} slow of {stats.calls}): {stats.site}"
+        )
+
+    def slowest(self, count: int = 10) -> List[Tuple[Tuple[str, str], CallbackStats]]:
+        """`count` callbacks taking the most time in total"""
+        with self._lock:
+            items = list(self.stats.items())
+        return sorted(items, key=lambda i: i[1].total, reverse=True)[:count]
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self._reported.clear()
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of `thread` every `interval` seconds from its own thread
+
+    Samples are counted by the function on top of the stack in `functions`
+    and by the whole stack in `stacks`, collapsed as "outer;...;inner" for
+    flame graph tools.
+    """
+
+    # frames of each stack kept, innermost
+    MAX_DEPTH = 64
+
+    def __init__(self, thread: threading.Thread, interval: float = 0.005):
+        self.thread = thread
+        self.interval = interval
+        self.samples = 0
+        self.functions: collections.Counter = collections.Counter()
+        self.stacks: collections.Counter = collections.Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._sampler is not None
+
+    def start(self):
+        if self._sampler is None:
+            self._stop.clear()
+            self._sampler = threading.Thread(
+                target=self._run, name="openant.profiler", daemon=True
+            )
+            self._sampler.start()
+
+    def stop(self):
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+
+    @staticmethod
+    def _describe(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread.ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.MAX_DEPTH:
+                stack.append(self._describe(frame))
+                frame = frame.f_back
+            self.samples += 1
+            self.functions[stack[0]] += 1
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def top(self, count: int = 10) -> List[Tuple[str, float]]:
+        """`count` functions most often on top of the stack with their share of samples"""
+        if not self.samples:
+            return []
+        return [
+            (function, samples / self.samples)
+            for function, samples in collections.Counter(
+                dict(self.functions)
+            ).most_common(count)
+        ]
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format, a line of "stack count" per stack"""
+        stacks = dict(self.stacks)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.items())
@@ -33,15 +33,16 @@ def write_device_data_influx(
             "host": host,
         }
 
-        json = data.to_influx_json(tags=influx_tags)
+        line = data.to_line_protocol(tags=influx_tags)
 
         if verbose:
-            print(f"Writing: {json}")
+            print(f"Writing: {line}")
 
-        point = point = idb.Point.from_dict(json)
+        if line is None:
+            return
 
         with client.write_api(write_options=SYNCHRONOUS) as c:
-            c.write(bucket=bucket, record=point)
+            c.write(bucket=bucket, record=line)
 
     except Exception as e:
         print(f"Exception during influx write: {e}")
@@ -68,15 +69,15 @@ def write_all_device_data_influx(
         data = device.data.copy()
         data.pop("common")
 
-        json = [v.to_influx_json(tags=influx_tags) for v in data.values()]
+        # one write of all pages
+        lines = [v.to_line_protocol(tags=influx_tags) for v in data.values()]
+        lines = [line for line in lines if line is not None]
 
         if verbose:
-            print(f"Writing: {json}")
+            print(f"Writing: {lines}")
 
         with client.write_api(write_options=SYNCHRONOUS) as c:
-            for j in json:
-                point = point = idb.Point.from_dict(j)
-                c.write(bucket=bucket, record=point)
+            c.write(bucket=bucket, record=lines)
 
     except Exception as e:
         print(f"Exception during influx write: {e}")
@@ -90,6 +91,9 @@ def device_data_influx_importer(
     session_uuid: str = str(uuid.uuid4()),
     verbose: bool = False,
     workouts: Optional[List[Workout]] = None,
+    changes_only: bool = False,
+    min_interval: float = 0.0,
+    max_interval: Optional[float] = None,
 ):
     print(f"Starting device data importer UUID {session_uuid} for {devices}")
 
@@ -114,9 +118,21 @@ def device_data_influx_importer(
 
     for dev in devices:
         dev.on_found = lambda dev=dev: on_found(dev)
-        dev.on_device_data = lambda page, page_name, data, dev=dev: write_device_data(
-            dev, page_name, data
-        )
+        if changes_only:
+            # only write pages that changed, at most every min_interval
+            dev.subscribe(
+                lambda page, page_name, data, dev=dev: write_device_data(
+                    dev, page_name, data
+                ),
+                min_interval=min_interval,
+                max_interval=max_interval,
+            )
+        else:
+            dev.on_device_data = (
+                lambda page, page_name, data, dev=dev: write_device_data(
+                    dev, page_name, data
+                )
+            )
 
     try:
         print(f"Starting {devices}, press Ctrl-C to finish")
@@ -143,6 +159,10 @@ def _run(args):
 
     node = Node()
     node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+    if args.metrics_port is not None:
+        server = node.start_metrics_server(args.metrics_port)
+        if args.verbose:
+            print(f"Serving metrics on http://{server.host}:{server.port}/metrics")
 
     devices = []
     workouts = None
@@ -175,21 +195,23 @@ def _run(args):
                 if "workouts" in config:
                     try:
                         workouts = [
-                            Workout.from_arrays(
-                                x["powers"],
-                                x["periods"],
-                                cycles=x["cycles"],
-                                loop=x["loop"],
-                            )
-                            if x["type"] == "arrays"
-                            else Workout.from_ramp(
-                                start=x["start"],
-                                stop=x["stop"],
-                                step=x["step"],
-                                period=x["period"],
-                                peak=(x["peak"] if "peak" in x else None),
-                                cycles=x["cycles"],
-                                loop=x["loop"],
+                            (
+                                Workout.from_arrays(
+                                    x["powers"],
+                                    x["periods"],
+                                    cycles=x["cycles"],
+                                    loop=x["loop"],
+                                )
+                                if x["type"] == "arrays"
+                                else Workout.from_ramp(
+                                    start=x["start"],
+                                    stop=x["stop"],
+                                    step=x["step"],
+                                    period=x["period"],
+                                    peak=(x["peak"] if "peak" in x else None),
+                                    cycles=x["cycles"],
+                                    loop=x["loop"],
+                                )
                             )
                             for x in config["workouts"]
                         ]
@@ -220,6 +242,9 @@ def _run(args):
         devices=devices,
         verbose=args.verbose,
         workouts=workouts,
+        changes_only=args.changes_only,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
     )
 
 
@@ -275,6 +300,27 @@ def add_subparser(subparsers, name="influx"):
         default=0,
         help="Transmission type, default zero will attach to first found",
     )
+    antinflux.add_argument(
+        "--changes-only",
+        action="store_true",
+        help="Only write pages that changed rather than every page received",
+    )
+    antinflux.add_argument(
+        "--min-interval",
+        type=float,
+        default=0.0,
+        help="With --changes-only, least seconds between writes of each page, changes in between are written after",
+    )
+    antinflux.add_argument(
+        "--max-interval",
+        type=float,
+        help="With --changes-only, write each page at least this often in seconds even if unchanged",
+    )
+    antinflux.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this localhost port",
+    )
     antinflux.add_argument(
         "-V", "--verbose", action="store_true", help="verbose output"
     )
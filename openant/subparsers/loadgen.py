@@ -0,0 +1,104 @@
+from ..base.capture import RecordingDriver
+from ..devices.common import DeviceType
+from ..devices.loadgen import find_saturation, page_generators, run_load
+
+
+def _print_result(result):
+    print(
+        f"{result.count} x {result.device_type.name} @ {result.speed:g}x: "
+        f"offered {result.offered_rate:.0f} pages/s, decoded {result.decoded_rate:.0f} pages/s, "
+        f"dropped {result.dropped}, backlog max {result.max_backlog} end {result.final_backlog}"
+    )
+
+
+def _run(args):
+    device_types = (
+        [DeviceType[args.device_type]] if args.device_type else list(page_generators)
+    )
+
+    for device_type in device_types:
+        if args.saturate:
+            results = find_saturation(
+                device_type, args.count, args.duration, max_speed=args.speed
+            )
+            for result in results:
+                _print_result(result)
+            sustained = [r for r in results if r.keeping_up]
+            if sustained:
+                print(
+                    f"{device_type.name} sustained {sustained[-1].decoded_rate:.0f} pages/s"
+                )
+            else:
+                print(f"{device_type.name} fell behind at 1x")
+        else:
+            wrapper = (
+                (lambda driver: RecordingDriver(driver, args.capture))
+                if args.capture
+                else None
+            )
+            _print_result(
+                run_load(
+                    device_type,
+                    args.count,
+                    args.speed,
+                    args.duration,
+                    period=args.period,
+                    driver_wrapper=wrapper,
+                )
+            )
+
+
+def add_subparser(subparsers, name="loadgen"):
+    parser = subparsers.add_parser(
+        name=name,
+        description="Decode synthetic ANT+ sensors on an emulated stick and report throughput",
+    )
+    parser.add_argument(
+        "--logging",
+        dest="logLevel",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Set the logging level",
+    )
+    parser.add_argument(
+        "--device_type",
+        "-t",
+        type=str,
+        choices=[x.name for x in page_generators],
+        help="Device profile to simulate, default all",
+    )
+    parser.add_argument(
+        "--count",
+        "-n",
+        type=int,
+        default=8,
+        help="Number of simulated sensors",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Sensor time compression, or the highest tried with --saturate",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=5.0,
+        help="Seconds to measure each load for",
+    )
+    parser.add_argument(
+        "--period",
+        type=int,
+        help="Channel period in 1/32768 s, default the profile period",
+    )
+    parser.add_argument(
+        "--saturate",
+        action="store_true",
+        help="Double speed from 1x until decoding falls behind",
+    )
+    parser.add_argument(
+        "--capture",
+        type=str,
+        help="Append raw ANT traffic to capture file, for use with scan --replay",
+    )
+
+    parser.set_defaults(func=_run)
@@ -1,20 +1,59 @@
+import time
+
+from ..base.capture import RecordingDriver, ReplayDriver
+from ..base.driver import find_driver
 from ..easy.node import Node
 from ..devices import ANTPLUS_NETWORK_KEY
 from ..devices.common import DeviceType
+from ..devices.inventory import DeviceInventory
 from ..devices.scanner import Scanner
 from ..devices.utilities import auto_create_device
 
 
-def auto_scanner(file_path=None, device_id=0, device_type=0, auto_create=False):
+def auto_scanner(
+    file_path=None,
+    device_id=0,
+    device_type=0,
+    auto_create=False,
+    capture=None,
+    replay=None,
+    speed=1.0,
+    metrics_port=None,
+    max_age=None,
+    inventory=None,
+):
     # list of auto created devices
     devices = []
 
-    # ANT USB node
-    node = Node()
+    # ANT USB node, recording raw traffic if capture file passed or replaying a capture
+    if replay:
+        driver = ReplayDriver(replay, speed=speed or None)
+    elif capture:
+        driver = RecordingDriver(find_driver(), capture)
+    else:
+        driver = None
+    node = Node(driver)
     node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+    if metrics_port is not None:
+        server = node.start_metrics_server(metrics_port)
+        print(f"Serving metrics on http://{server.host}:{server.port}/metrics")
+
+    # devices found in previous scans, kept up to date as they are found
+    if inventory:
+        inventory = DeviceInventory(inventory)
+        for known in inventory.devices(device_type or None):
+            print(
+                f"Known device #{known.device_id} {DeviceType(known.device_type)}, serial {known.serial_no}, last seen {time.ctime(known.last_seen)}"
+            )
 
     # the scanner
-    scanner = Scanner(node, device_id=device_id, device_type=device_type)
+    scanner = Scanner(
+        node,
+        device_id=device_id,
+        device_type=device_type,
+        max_age=max_age,
+        inventory=inventory,
+    )
 
     # local function to call when device updates common data
     def on_update(device_tuple, common):
@@ -43,8 +82,13 @@ def auto_scanner(file_path=None, device_id=0, device_type=0, auto_create=False):
             except Exception as e:
                 print(f"Could not auto create device: {e}")
 
+    # local function to call when a device has not been seen for max_age
+    def on_lost(device_tuple):
+        print(f"Lost device #{device_tuple[0]}, not seen for {max_age} s")
+
     # add callback functions to scanner
     scanner.on_found = on_found
+    scanner.on_lost = on_lost
     scanner.on_update = on_update
 
     # start scanner, exit on keyboard and clean up USB device on exit
@@ -57,6 +101,9 @@ def auto_scanner(file_path=None, device_id=0, device_type=0, auto_create=False):
         print(f"Closing ANT+ node...")
     finally:
         scanner.close_channel()
+        if inventory:
+            scanner.flush()
+            inventory.close()
         if file_path:
             print(f"Saving/updating found devices to {file_path}")
             scanner.save(file_path)
@@ -78,6 +125,12 @@ def _run(args):
         device_id=args.device_id,
         device_type=device_type,
         auto_create=args.auto_create,
+        capture=args.capture,
+        replay=args.replay,
+        speed=args.speed,
+        metrics_port=args.metrics_port,
+        max_age=args.max_age * 60 if args.max_age else None,
+        inventory=args.inventory,
     )
 
 
@@ -120,4 +173,37 @@ def add_subparser(subparsers, name="scan"):
         help="Auto-create device profile object and print device page data updates",
     )
 
+    parser.add_argument(
+        "--capture",
+        type=str,
+        help="Append raw ANT traffic to capture file",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        help="Replay capture file instead of using an ANT stick",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed relative to real time, 0 for as fast as possible",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this localhost port",
+    )
+
+    parser.add_argument(
+        "--inventory",
+        type=str,
+        help="SQLite file of devices found, updated as they are found",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        help="Forget devices not seen for this many minutes, e.g. for multi-day scans",
+    )
+
     parser.set_defaults(func=_run)
@@ -0,0 +1,178 @@
+import array
+import errno
+import queue
+import time
+import unittest
+
+import usb.core
+
+from openant.base.ant import Ant
+from openant.base.driver import Driver, DriverException, DriverTimeoutException
+from openant.base.message import Message
+
+
+class LoopbackDriver(Driver):
+    """Answers configuration messages with no error and can be 'unplugged'"""
+
+    def __init__(self):
+        self.written = []
+        self.opened = 0
+        self.unplugged = False
+        self._pending = queue.Queue()
+
+    def open(self):
+        self.opened += 1
+        self.unplugged = False
+
+    def read(self):
+        if self.unplugged:
+            raise usb.core.USBError("No such device", errno=errno.ENODEV)
+        try:
+            return self._pending.get(timeout=0.01)
+        except queue.Empty:
+            raise usb.core.USBTimeoutError("Operation timed out")
+
+    def write(self, data):
+        message = Message.parse(data)
+        self.written.append(message._id)
+        if message._id == Message.ID.RESET_SYSTEM:
+            reply = Message(Message.ID.STARTUP_MESSAGE, [0x00])
+        else:
+            reply = Message(
+                Message.ID.RESPONSE_CHANNEL, [message._data[0], message._id, 0x00]
+            )
+        self._pending.put(reply.get())
+
+
+class TimeoutDriver(LoopbackDriver):
+    """Raises driver exceptions as serial and emulated sticks do, ignoring a reset"""
+
+    def __init__(self):
+        super().__init__()
+        self.ignore_reset = False
+
+    def read(self):
+        if self.unplugged:
+            raise DriverException("Device disconnected")
+        try:
+            return self._pending.get(timeout=0.01)
+        except queue.Empty:
+            raise DriverTimeoutException("Operation timed out")
+
+    def write(self, data):
+        if self.ignore_reset and Message.parse(data)._id == Message.ID.RESET_SYSTEM:
+            self.ignore_reset = False
+            self.written.append(Message.ID.RESET_SYSTEM)
+            return
+        super().write(data)
+
+
+class AntRecoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = LoopbackDriver()
+        self.ant = Ant(self.driver)
+
+    def tearDown(self):
+        self.ant.stop()
+
+    def test_replay_configuration_on_disconnect(self):
+        self.ant.set_network_key(0, [0] * 8)
+        self.ant.assign_channel(0, 0x00, 0, None)
+        self.ant.set_channel_id(0, 12345, 120, 0)
+        self.ant.open_channel(0)
+        self.ant.assign_channel(1, 0x00, 0, None)
+        self.ant.set_channel_period(1, 8070)
+        self.ant.unassign_channel(1)
+        del self.driver.written[:]
+
+        self.driver.unplugged = True
+        deadline = time.monotonic() + 5
+        while self.ant.recoveries == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.driver.opened, 2)
+        self.assertEqual(
+            self.driver.written,
+            [
+                Message.ID.RESET_SYSTEM,
+                Message.ID.SET_NETWORK_KEY,
+                Message.ID.ASSIGN_CHANNEL,
+                Message.ID.SET_CHANNEL_ID,
+                Message.ID.OPEN_CHANNEL,
+            ],
+        )
+
+    def test_recorded_configuration_latest_only(self):
+        self.ant.assign_channel(0, 0x00, 0, None)
+        self.ant.set_channel_id(0, 0, 120, 0)
+        self.ant.set_channel_id(0, 12345, 120, 1)
+        self.ant.open_channel(0)
+        self.ant.close_channel(0)
+
+        messages = self.ant._recorded_configuration()
+        self.assertEqual(
+            [m._id for m in messages],
+            [Message.ID.ASSIGN_CHANNEL, Message.ID.SET_CHANNEL_ID],
+        )
+        self.assertEqual(messages[1]._data, array.array("B", [0, 0x39, 0x30, 120, 1]))
+
+    def test_scan_mode_kept_until_its_channel_closed(self):
+        self.ant.assign_channel(0, 0x00, 0, None)
+        self.ant.open_rx_scan_mode(0)
+        self.ant.assign_channel(1, 0x00, 0, None)
+        self.ant.close_channel(1)
+        self.ant.unassign_channel(1)
+
+        messages = self.ant._recorded_configuration()
+        self.assertEqual(messages[-1]._id, Message.ID.OPEN_RX_SCAN_MODE)
+
+        self.ant.close_channel(0)
+        self.assertEqual(
+            [m._id for m in self.ant._recorded_configuration()],
+            [Message.ID.ASSIGN_CHANNEL],
+        )
+
+    def test_recovery_with_driver_timeouts(self):
+        self.ant.stop()
+        self.driver = TimeoutDriver()
+        self.ant = Ant(self.driver)
+        self.ant._REPLAY_TIMEOUT = 0.1
+        self.ant.set_network_key(0, [0] * 8)
+        self.ant.assign_channel(0, 0x00, 0, None)
+        self.ant.open_channel(0)
+        del self.driver.written[:]
+
+        # the reset replayed gets no reply, so the replay times out reading
+        self.driver.ignore_reset = True
+        self.driver.unplugged = True
+        deadline = time.monotonic() + 5
+        while self.ant.recoveries == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.ant.recoveries, 1)
+        self.assertTrue(self.ant._worker_thread.is_alive())
+        self.assertEqual(
+            self.driver.written,
+            [
+                Message.ID.RESET_SYSTEM,
+                Message.ID.SET_NETWORK_KEY,
+                Message.ID.ASSIGN_CHANNEL,
+                Message.ID.OPEN_CHANNEL,
+            ],
+        )
+
+
+class AntWithoutWorkerTest(unittest.TestCase):
+    def test_read_message_on_calling_thread(self):
+        driver = LoopbackDriver()
+        ant = Ant(driver, worker=False)
+        self.addCleanup(ant.stop)
+        # not reset, as nothing would read the start-up message
+        self.assertEqual((driver.opened, driver.written), (1, []))
+
+        data = Message(Message.ID.BROADCAST_DATA, list(range(9))).get()
+        driver._pending.put(data[:5])
+        driver._pending.put(data[5:])
+        message = ant.read_message()
+        self.assertEqual((message._id, list(message._data)), (0x4E, list(range(9))))
+        self.assertEqual(ant.bytes_read, len(data))
@@ -0,0 +1,290 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from openant.base.ant import Ant
+from openant.base.capture import (
+    MAGIC,
+    CaptureException,
+    CaptureReader,
+    IndexBuilder,
+    Kind,
+    RECORD,
+    RecordingDriver,
+    ReplayDriver,
+    build_index,
+    index_path,
+    load_index,
+    read_capture,
+)
+from openant.base.driver import DriverTimeoutException
+from openant.base.message import Message
+from openant.easy.channel import Channel
+from openant.easy.node import Node
+from openant.tests.base.test_ant import LoopbackDriver
+
+
+class RecordingDriverTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".antcap")
+        os.close(fd)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        for path in (self.path, index_path(self.path)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def test_records_reads_and_writes(self):
+        ant = Ant(RecordingDriver(LoopbackDriver(), self.path))
+        ant.set_channel_period(0, 8070)
+        ant.stop()
+
+        records = list(read_capture(self.path))
+        self.assertEqual(records[0][1:], (Kind.OPEN, b""))
+
+        written = [p for _, k, p in records if k == Kind.WRITE]
+        read = [p for _, k, p in records if k == Kind.READ]
+        self.assertEqual(Message.parse(written[-1])._id, Message.ID.SET_CHANNEL_PERIOD)
+        self.assertEqual(Message.parse(read[-1])._id, Message.ID.RESPONSE_CHANNEL)
+
+        timestamps = [t for t, _, _ in records]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_appends_sessions(self):
+        for _ in range(2):
+            driver = RecordingDriver(LoopbackDriver(), self.path)
+            driver.open()
+            driver.write(Message(Message.ID.RESET_SYSTEM, [0x00]).get())
+            driver.close()
+
+        kinds = [k for _, k, _ in read_capture(self.path)]
+        self.assertEqual(kinds, [Kind.OPEN, Kind.WRITE, Kind.OPEN, Kind.WRITE])
+
+    def test_truncated_record(self):
+        driver = RecordingDriver(LoopbackDriver(), self.path)
+        driver.open()
+        driver.write(Message(Message.ID.RESET_SYSTEM, [0x00]).get())
+        driver.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        self.assertEqual(len(list(read_capture(self.path))), 1)
+
+    def test_not_capture(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not" + MAGIC)
+
+        with self.assertRaises(CaptureException):
+            list(read_capture(self.path))
+        with self.assertRaises(CaptureException):
+            RecordingDriver(LoopbackDriver(), self.path).open()
+
+
+def broadcast(channel, value):
+    return Message(Message.ID.BROADCAST_DATA, [channel] + [value] * 8).get()
+
+
+def extended_broadcast(channel, value, device_number, device_type, trans_type):
+    data = [channel] + [value] * 8
+    data += [0x80, device_number & 0xFF, device_number >> 8, device_type, trans_type]
+    return Message(Message.ID.BROADCAST_DATA, data).get()
+
+
+class CaptureIndexTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".antcap")
+        os.close(fd)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        for path in (self.path, index_path(self.path)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def record(self):
+        """Paired device 111 on channel 1, device 222 seen with extended data on 0"""
+        loopback = LoopbackDriver()
+        driver = RecordingDriver(loopback, self.path)
+        driver.open()
+        driver.write(Message(Message.ID.SET_CHANNEL_ID, [1, 111, 0, 120, 1]).get())
+        driver.read()
+        for value in range(20):
+            if value < 10:
+                loopback._pending.put(broadcast(1, value))
+            else:
+                loopback._pending.put(extended_broadcast(0, value, 222, 11, 5))
+            driver.read()
+        # message split across reads
+        chunk = broadcast(1, 99)
+        loopback._pending.put(chunk[:4])
+        loopback._pending.put(chunk[4:])
+        driver.read()
+        driver.read()
+        driver.close()
+
+    @mock.patch.object(IndexBuilder, "BLOCK_BYTES", 64)
+    def test_index_while_recording(self):
+        self.record()
+        blocks = load_index(self.path)
+        self.assertGreater(len(blocks), 2)
+        self.assertEqual(blocks[-1].end, os.path.getsize(self.path))
+        # rebuilt from the capture alone the same
+        self.assertEqual(build_index(self.path), blocks)
+
+        with CaptureReader(self.path) as capture:
+            self.assertEqual(capture.blocks, blocks)
+            self.assertEqual(capture.devices(), [(111, 120, 1), (222, 11, 5)])
+            self.assertLess(len(capture.find(111)), len(blocks))
+
+            paired = [m._data[1] for _, m in capture.messages(device_number=111)]
+            self.assertEqual(paired, list(range(10)) + [99])
+            seen = [m._data[1] for _, m in capture.messages(222, 11, 5)]
+            self.assertEqual(seen, list(range(10, 20)))
+            self.assertEqual(list(capture.messages(222, 12)), [])
+
+            timestamps = [t for t, _ in capture.messages(111)]
+            late = [m._data[1] for _, m in capture.messages(111, start=timestamps[5])]
+            self.assertEqual(late, [5, 6, 7, 8, 9, 99])
+            self.assertEqual(
+                list(capture.records()),
+                [(t, k, p) for t, k, p in read_capture(self.path)],
+            )
+
+    @mock.patch.object(IndexBuilder, "BLOCK_BYTES", 64)
+    def test_indexed_off_read_thread(self):
+        threads = set()
+        add = IndexBuilder.add
+
+        def record_thread(builder, *args):
+            threads.add(threading.current_thread())
+            add(builder, *args)
+
+        loopback = LoopbackDriver()
+        driver = RecordingDriver(loopback, self.path)
+        driver.open()
+        with mock.patch.object(IndexBuilder, "add", record_thread):
+            for value in range(10):
+                loopback._pending.put(broadcast(1, value))
+                driver.read()
+            driver.flush()
+            # blocks closed so far written by flush, whilst still recording
+            self.assertGreater(len(load_index(self.path)), 0)
+            driver.close()
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(load_index(self.path)[-1].end, os.path.getsize(self.path))
+
+    def test_index_missing_or_incomplete(self):
+        self.record()
+        os.unlink(index_path(self.path))
+        with CaptureReader(self.path) as capture:
+            self.assertEqual(len(list(capture.messages(111))), 11)
+        self.assertTrue(os.path.exists(index_path(self.path)))
+
+        # crashed while recording, tail indexed in memory
+        with open(index_path(self.path), "r+b") as f:
+            f.truncate(os.path.getsize(index_path(self.path)) - 1)
+        with CaptureReader(self.path) as capture:
+            self.assertEqual(len(list(capture.messages(222))), 10)
+
+        # appending rebuilds the index first
+        driver = RecordingDriver(LoopbackDriver(), self.path)
+        driver.open()
+        driver.close()
+        self.assertEqual(load_index(self.path)[-1].end, os.path.getsize(self.path))
+
+
+class ReplayDriverTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".antcap")
+        os.close(fd)
+
+    def tearDown(self):
+        for path in (self.path, index_path(self.path)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def write_capture(self, records):
+        with open(self.path, "wb") as f:
+            f.write(MAGIC)
+            for timestamp, kind, payload in records:
+                f.write(RECORD.pack(timestamp, kind, len(payload)))
+                f.write(payload)
+
+    def read_all(self, driver):
+        driver.open()
+        data = []
+        while not driver.finished.is_set():
+            try:
+                data.append(driver.read())
+            except DriverTimeoutException:
+                pass
+        driver.close()
+        return data
+
+    def test_speed(self):
+        step = 50_000_000
+        self.write_capture([(i * step, Kind.READ, broadcast(0, i)) for i in range(5)])
+
+        for speed, low, high in [(1.0, 0.2, 0.6), (10.0, 0.0, 0.1), (None, 0.0, 0.1)]:
+            driver = ReplayDriver(self.path, speed=speed, sync_writes=False)
+            begin = time.monotonic()
+            data = self.read_all(driver)
+            elapsed = time.monotonic() - begin - driver.READ_TIMEOUT
+            self.assertEqual(len(data), 5)
+            self.assertGreaterEqual(elapsed, low, speed)
+            self.assertLess(elapsed, high, speed)
+            self.assertEqual(driver.now, 4 * step)
+
+    def test_sync_writes(self):
+        self.write_capture(
+            [
+                (0, Kind.OPEN, b""),
+                (1, Kind.WRITE, b"request"),
+                (2, Kind.READ, b"response"),
+            ]
+        )
+        driver = ReplayDriver(self.path, speed=None)
+        driver.open()
+        with self.assertRaises(DriverTimeoutException):
+            driver.read()
+        driver.write(b"request")
+        self.assertEqual(driver.read(), b"response")
+
+    def test_replay_through_node(self):
+        loopback = LoopbackDriver()
+        node = Node(RecordingDriver(loopback, self.path))
+        channel = node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        recorded = []
+        channel.on_broadcast_data = recorded.append
+        thread = threading.Thread(target=node.start)
+        thread.start()
+        for value in range(3):
+            loopback._pending.put(broadcast(0, value))
+        deadline = time.monotonic() + 5
+        while len(recorded) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        node.stop()
+        thread.join()
+
+        driver = ReplayDriver(self.path, speed=None)
+        node = Node(driver)
+        channel = node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        replayed = []
+        channel.on_broadcast_data = replayed.append
+        thread = threading.Thread(target=node.start)
+        thread.start()
+        self.assertTrue(driver.finished.wait(5))
+        deadline = time.monotonic() + 5
+        while len(replayed) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        node.stop()
+        thread.join()
+
+        self.assertEqual(len(recorded), 3)
+        self.assertEqual(replayed, recorded)
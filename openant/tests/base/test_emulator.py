@@ -0,0 +1,222 @@
+import threading
+import unittest
+
+from openant.base.emulator import EmulatorDriver, SimulatedDevice
+from openant.base.message import Message
+from openant.devices import ANTPLUS_NETWORK_KEY
+from openant.devices.heart_rate import HeartRate
+from openant.devices.scanner import Scanner
+from openant.easy.channel import Channel
+from openant.easy.node import Node
+from openant.tests.emulated import heart_rate_pages, wait_until
+
+
+class EmulatorTest(unittest.TestCase):
+    def start(self, devices=(), **kwargs):
+        self.driver = EmulatorDriver(devices, speed=20, **kwargs)
+        self.node = Node(self.driver)
+        self.node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+        self.thread = threading.Thread(target=self.node.start)
+        self.thread.start()
+
+    def open_channel(self, channel_type, channel_id):
+        channel = self.node.new_channel(channel_type)
+        channel.set_id(*channel_id)
+        channel.set_rf_freq(57)
+        channel.open()
+        return channel
+
+    def tearDown(self):
+        self.node.stop()
+        self.thread.join()
+
+    def test_node_information(self):
+        self.start(max_channels=16, serial=42)
+        _, _, version = self.node.request_message(Message.ID.RESPONSE_ANT_VERSION)
+        self.assertEqual(bytes(version), self.driver.version)
+        self.node.request_message(Message.ID.RESPONSE_CAPABILITIES)
+        self.assertEqual(self.node.max_channels, 16)
+        self.node.request_message(Message.ID.RESPONSE_SERIAL_NUMBER)
+        self.assertEqual(self.node.serial, 42)
+
+    def test_wildcard_device_attaches(self):
+        self.start(
+            [
+                SimulatedDevice(1234, 11, pages=heart_rate_pages(0)),
+                SimulatedDevice(4321, 120, 5, pages=heart_rate_pages(65)),
+            ]
+        )
+        hrm = HeartRate(self.node)
+        pages = []
+        hrm.on_device_data = lambda page, name, data: pages.append(data.heart_rate)
+
+        self.assertTrue(wait_until(lambda: len(pages) > 2))
+        self.assertEqual((hrm.device_id, hrm.trans_type), (4321, 5))
+        self.assertEqual(pages[-1], 65)
+        _, _, status = hrm.channel.request_message(Message.ID.RESPONSE_CHANNEL_STATUS)
+        self.assertEqual(status[0] & 0x03, 3)
+
+    def test_search_timeout(self):
+        self.start()
+        channel = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        channel.set_id(0, 120, 0)
+        channel.set_search_timeout(1)
+        channel.set_low_priority_search_timeout(0)
+        channel.open()
+
+        self.assertTrue(
+            wait_until(
+                lambda: channel.event_counts[Message.Code.EVENT_CHANNEL_CLOSED] == 1
+            )
+        )
+        self.assertEqual(channel.event_counts[Message.Code.EVENT_RX_SEARCH_TIMEOUT], 1)
+
+    def test_lost_device(self):
+        device = SimulatedDevice(1, 120)
+        self.start([device])
+        channel = self.open_channel(Channel.Type.BIDIRECTIONAL_RECEIVE, (1, 120, 0))
+        self.assertTrue(wait_until(lambda: device.count > 0))
+
+        device.in_range = False
+        self.assertTrue(
+            wait_until(
+                lambda: channel.event_counts[Message.Code.EVENT_RX_FAIL_GO_TO_SEARCH]
+            )
+        )
+        self.assertEqual(channel.event_counts[Message.Code.EVENT_RX_FAIL], 7)
+
+    def test_acknowledged_and_burst(self):
+        device = SimulatedDevice(1, 120)
+        self.start([device])
+        channel = self.open_channel(Channel.Type.BIDIRECTIONAL_RECEIVE, (1, 120, 0))
+
+        # blocks until the emulator reports the transfer completed
+        channel.send_acknowledged_data([1] * 8)
+        channel.send_burst_transfer(list(range(24)))
+
+        self.assertEqual(
+            device.received, [("acknowledged", [1] * 8), ("burst", list(range(24)))]
+        )
+
+    def test_acknowledged_from_device(self):
+        device = SimulatedDevice(1, 120)
+        self.start([device])
+        channel = self.open_channel(Channel.Type.BIDIRECTIONAL_RECEIVE, (1, 120, 0))
+        received = []
+        channel.on_acknowledge_data = received.append
+        device.send_acknowledged([7] * 8)
+
+        self.assertTrue(wait_until(lambda: received))
+        self.assertEqual(list(received[0]), [7] * 8)
+
+    def test_scanner_finds_all(self):
+        devices = [SimulatedDevice(i, 120 if i % 2 else 11) for i in range(1, 7)]
+        self.start(devices[:4])
+        scanner = Scanner(self.node)
+        self.driver.add_device(devices[4])
+        self.driver.add_device(devices[5])
+
+        self.assertTrue(wait_until(lambda: len(scanner.found) == 6))
+        self.assertEqual(scanner.found, {d.channel_id for d in devices})
+
+    def test_rx_scan_mode(self):
+        self.start([SimulatedDevice(1, 120), SimulatedDevice(2, 11)])
+        channel = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        seen = set()
+        channel.on_broadcast_data = lambda data: seen.add(data[9])
+        channel.enable_extended_messages(1)
+        channel.set_rf_freq(57)
+        channel.open_rx_scan_mode()
+
+        self.assertTrue(wait_until(lambda: seen == {1, 2}))
+
+    def test_id_list(self):
+        self.start([SimulatedDevice(number, 120) for number in (1, 2, 3)])
+        channel = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        emulated = self.driver.channels[channel.id]
+        channel.set_id(0, 120, 0)
+        channel.set_rf_freq(57)
+
+        # only devices listed, and all but those excluded, found by wildcard search
+        for ids, exclude, device_number in (
+            ([(3, 120, 0), (2, 0, 0)], False, 2),
+            ([(1, 120, 1)], True, 2),
+            ([(1, 0, 0), (2, 0, 0)], True, 3),
+        ):
+            with self.subTest(ids=ids, exclude=exclude):
+                channel.set_id_list(ids, exclude=exclude)
+                channel.open()
+                self.assertTrue(wait_until(lambda: emulated.device is not None))
+                self.assertEqual(emulated.device.device_number, device_number)
+                channel.close()
+
+        channel.clear_id_list()
+        channel.open()
+        self.assertTrue(wait_until(lambda: emulated.device is not None))
+        self.assertEqual(emulated.device.device_number, 1)
+
+    def test_id_list_too_long(self):
+        self.start()
+        channel = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        ids = [(number, 120, 0) for number in range(1, Channel.MAX_ID_LIST + 2)]
+        with self.assertRaisesRegex(ValueError, "exceeds maximum of 4"):
+            channel.set_id_list(ids)
+        self.assertEqual(self.driver.channels[channel.id].id_list, [])
+
+    def test_device_id_list_excludes_tracked(self):
+        devices = [SimulatedDevice(number, 120) for number in (1, 2)]
+        for device in devices:
+            device.in_range = False
+        self.start(devices)
+        tracking = HeartRate(self.node, device_id=1)
+        wildcard = HeartRate(self.node)
+        wildcard.set_id_list(self.node.tracked_ids(120), exclude=True)
+        for device in devices:
+            device.in_range = True
+
+        self.assertTrue(wait_until(lambda: wildcard.device_id != 0))
+        self.assertEqual(wildcard.device_id, 2)
+        self.assertTrue(wait_until(lambda: tracking._found))
+        self.assertEqual(tracking.device_id, 1)
+
+    def test_frequency_agility(self):
+        device = SimulatedDevice(1, 120, rf_freq=39)
+        self.start([device])
+        channel = self.node.new_channel(
+            Channel.Type.BIDIRECTIONAL_RECEIVE,
+            ext_assign=Channel.ExtAssign.FREQUENCY_AGILITY,
+        )
+        emulated = self.driver.channels[channel.id]
+        channel.set_frequency_agility(3, 39, 75)
+        channel.set_id(1, 120, 0)
+        channel.set_rf_freq(57)
+        channel.open()
+
+        # found on an agility frequency other than its own
+        self.assertEqual(emulated.agility_frequencies, (3, 39, 75))
+        self.assertTrue(wait_until(lambda: emulated.device is device))
+        device.in_range = False
+        self.assertTrue(
+            wait_until(lambda: channel.event_counts[Message.Code.EVENT_RX_FAIL])
+        )
+        status = channel.get_frequency_status()
+        self.assertEqual(
+            (status["rf_freq"], status["agility_frequencies"]), (57, (3, 39, 75))
+        )
+        self.assertGreater(status["rx_fail"], 0)
+
+    def test_frequency_agility_not_assigned(self):
+        self.start([SimulatedDevice(1, 120, rf_freq=39)])
+        channel = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+        with self.assertLogs("openant.easy.channel", "WARNING"):
+            channel.set_frequency_agility(3, 39, 75)
+        self.assertEqual(self.driver.channels[channel.id].frequencies, (66,))
+        self.assertEqual(channel.get_frequency_status()["rf_freq"], None)
+
+    def test_transmit_channel(self):
+        self.start()
+        channel = self.open_channel(Channel.Type.BIDIRECTIONAL_TRANSMIT, (99, 120, 1))
+        sent = []
+        channel.on_broadcast_tx_data = sent.append
+
+        self.assertTrue(wait_until(lambda: len(sent) > 2))
@@ -0,0 +1,66 @@
+import unittest
+import urllib.error
+import urllib.request
+
+from openant.base.message import Message
+from openant.base.metrics import GAUGE, MetricsServer, Registry, Sample
+from openant.devices.heart_rate import HeartRate
+from openant.tests.emulated import EmulatedNodeTestCase, wait_until
+
+
+class RegistryTest(unittest.TestCase):
+    def test_snapshot_skips_failing_collector(self):
+        registry = Registry()
+        registry.register(lambda: [Sample("a_total", 1)])
+        registry.register(lambda: 1 / 0)
+        gauge = registry.register(lambda: [Sample("b", 2.5, {"x": "y"}, GAUGE)])
+
+        self.assertEqual(registry.as_dict(), {"a_total": 1, 'b{x="y"}': 2.5})
+        registry.unregister(gauge)
+        self.assertEqual(registry.as_dict(), {"a_total": 1})
+
+
+class NodeMetricsTest(EmulatedNodeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hrm = HeartRate(self.node, device_id=1)
+        self.start()
+
+    def test_snapshot(self):
+        pages = 'openant_device_pages_total{device="heart_rate_00001",device_type="120",page="4"}'
+        self.assertTrue(wait_until(lambda: self.node.metrics.as_dict().get(pages)))
+
+        metrics = self.node.metrics.as_dict()
+        broadcasts = (
+            f'openant_messages_read_total{{id="0x{Message.ID.BROADCAST_DATA:02x}"}}'
+        )
+        self.assertGreaterEqual(metrics[broadcasts], metrics[pages])
+        self.assertEqual(
+            metrics[
+                f'openant_messages_written_total{{id="0x{Message.ID.OPEN_CHANNEL:02x}"}}'
+            ],
+            1,
+        )
+        self.assertGreater(
+            metrics['openant_driver_read_bytes_total{driver="EmulatorDriver"}'], 0
+        )
+        self.assertIn("openant_node_datas_queue_depth", metrics)
+        self.assertIn("openant_ant_events_queue_depth", metrics)
+        self.assertEqual(metrics['openant_channel_tx_retries_total{channel="0"}'], 0)
+
+    def test_close_unregisters_device(self):
+        self.hrm.close_channel()
+        names = {s.name for s in self.node.metrics.snapshot()}
+        self.assertNotIn("openant_device_pages_total", names)
+
+    def test_metrics_server(self):
+        server = self.node.start_metrics_server()
+        self.assertTrue(wait_until(lambda: self.hrm.page_counts))
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as r:
+            self.assertEqual(r.headers["Content-Type"], MetricsServer.CONTENT_TYPE)
+            body = r.read().decode()
+        self.assertIn("# TYPE openant_node_datas_queue_depth gauge\n", body)
+        self.assertIn('openant_device_pages_total{device="heart_rate_00001"', body)
+
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{server.port}/")
@@ -0,0 +1,67 @@
+import array
+import time
+import unittest
+
+from openant.base.trace import ALL, Histogram, Stage, Tracer, traced
+from openant.devices.heart_rate import HeartRate
+from openant.tests.emulated import EmulatedNodeTestCase, wait_until
+
+
+class HistogramTest(unittest.TestCase):
+    def test_percentiles_within_resolution(self):
+        histogram = Histogram()
+        for value in range(1, 100001):
+            histogram.record(value)
+        for percent in (50, 90, 99):
+            expected = percent * 1000
+            self.assertAlmostEqual(
+                histogram.percentile(percent), expected, delta=expected / 8
+            )
+        self.assertEqual(histogram.percentile(100), 100000)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().percentile(99), 0)
+
+
+class TracerTest(unittest.TestCase):
+    def test_sample_interval(self):
+        tracer = Tracer(sample_interval=3)
+        sampled = [tracer.start(0) is not None for _ in range(6)]
+        self.assertEqual(sampled, [True, False, False, True, False, False])
+
+    def test_finish_records_stages_stamped(self):
+        tracer = Tracer()
+        data = traced(array.array("B", [0] * 8), tracer.start(time.monotonic_ns()))
+        tracer.finish(2, data)
+        tracer.finish(2, array.array("B", [0] * 8))
+
+        self.assertEqual(tracer.histogram(None, 2).count, 1)
+        self.assertEqual(tracer.histogram(Stage.EVENTS_PUT, ALL).count, 1)
+        self.assertEqual(tracer.histogram(Stage.DECODE, 2).count, 0)
+        self.assertEqual(set(tracer.summary()), {"all", 2})
+
+
+class NodeTracingTest(EmulatedNodeTestCase):
+    def setUp(self):
+        super().setUp()
+        # devices are created before data is dispatched to them
+        self.hrm = HeartRate(self.node, device_id=1)
+
+    def test_every_stage_traced(self):
+        tracer = self.node.enable_tracing()
+        self.start()
+        self.assertTrue(wait_until(lambda: tracer.histogram().count > 2))
+
+        stages = self.node.tracer.summary()[self.hrm.channel.id]
+        self.assertEqual(
+            set(stages), {"total"} | {s.name.lower() for s in list(Stage)[1:]}
+        )
+        self.assertGreater(stages["total"]["p50"], 0)
+
+    def test_disabled_passes_plain_data(self):
+        types = []
+        self.hrm.on_update = lambda data: types.append(type(data))
+        self.start()
+        self.assertTrue(wait_until(lambda: types))
+        self.assertIs(types[0], array.array)
+        self.assertIsNone(self.node.ant.tracer)
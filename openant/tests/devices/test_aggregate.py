@@ -0,0 +1,141 @@
+import math
+import random
+import unittest
+
+from openant.base.emulator import SimulatedDevice
+from openant.devices.aggregate import (
+    Aggregation,
+    Ewma,
+    Metric,
+    NormalizedPower,
+    RollingMax,
+    RollingMean,
+    RollingMin,
+)
+from openant.devices.heart_rate import HeartRate
+from openant.devices.power_meter import PowerData
+from openant.tests.emulated import EmulatedNodeTestCase, wait_until
+
+
+class MetricTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(1)
+        # irregular pages around 4 Hz
+        self.samples = []
+        t = 0.0
+        for _ in range(2000):
+            t += rnd.uniform(0.1, 0.4)
+            self.samples.append((t, rnd.randrange(0, 1000)))
+
+    def window(self, end, seconds):
+        return [
+            v for t, v in self.samples[: end + 1] if t > self.samples[end][0] - seconds
+        ]
+
+    def test_rolling_against_brute_force(self):
+        metrics = {
+            "mean": (RollingMean(3), lambda w: sum(w) / len(w)),
+            "max": (RollingMax(10), max),
+            "min": (RollingMin(10), min),
+        }
+        for i, (t, v) in enumerate(self.samples):
+            for name, (metric, reference) in metrics.items():
+                metric.add(v, t)
+                window = self.window(i, metric.window)
+                self.assertAlmostEqual(metric.value, reference(window), msg=name)
+
+    def test_normalized_power(self):
+        np = NormalizedPower()
+        rolling = []
+        for i, (t, v) in enumerate(self.samples):
+            np.add(v, t)
+            window = self.window(i, 30)
+            rolling.append(sum(window) / len(window))
+        expected = (sum(r**4 for r in rolling) / len(rolling)) ** 0.25
+        self.assertAlmostEqual(np.value, expected)
+        np.reset()
+        self.assertIsNone(np.value)
+
+    def test_ewma(self):
+        ewma = Ewma(1.0)
+        self.assertIsNone(ewma.value)
+        ewma.add(100, 0)
+        ewma.add(200, 1)
+        self.assertAlmostEqual(ewma.value, 200 - 100 * math.exp(-1))
+        # time weighted, several pages at once count for nothing extra
+        ewma.add(1000, 1)
+        self.assertAlmostEqual(ewma.value, 200 - 100 * math.exp(-1))
+
+    def test_incomplete_metric(self):
+        class Count(Metric):
+            def add(self, value, now):
+                self.count += 1
+
+            def reset(self):
+                self.count = 0
+
+        with self.assertRaises(TypeError):
+            Count()
+
+
+class AggregationTest(unittest.TestCase):
+    def test_publishes_at_interval(self):
+        published = []
+        aggregation = Aggregation(
+            "instantaneous_power",
+            {"mean": RollingMean(10), "max": RollingMax(10)},
+            interval=1.0,
+            callback=published.append,
+            pages=["standard_power"],
+        )
+        data = PowerData()
+        for i in range(20):
+            data.instantaneous_power = 100 + i
+            aggregation.offer(0x10, "standard_power", data, now=i * 0.25)
+            aggregation.offer(0x12, "standard_torque", data, now=i * 0.25)
+        self.assertEqual(len(published), 4)
+        self.assertEqual(published[0], {"mean": 102.0, "max": 104})
+
+        # a gap without pages publishes once and keeps the cadence
+        aggregation.offer(0x10, "standard_power", data, now=12.5)
+        aggregation.offer(0x10, "standard_power", data, now=12.9)
+        aggregation.offer(0x10, "standard_power", data, now=13.0)
+        self.assertEqual(len(published), 6)
+
+    def test_skips_values_not_numbers(self):
+        aggregation = Aggregation("calculated_speed", {"mean": RollingMean(3)})
+        data = PowerData()
+        aggregation.offer(0x10, "standard_power", data, now=0)
+        self.assertEqual(aggregation.values(), {"mean": None})
+
+
+class DeviceAggregationTest(EmulatedNodeTestCase):
+    def devices(self):
+        return [
+            SimulatedDevice(
+                1,
+                120,
+                pages=lambda n: [4, 0xFF, 0, 0, n & 0xFF, 0, n & 0xFF, 60 + n % 2],
+            )
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.hrm = HeartRate(self.node, device_id=1)
+        self.published = []
+        self.aggregation = self.hrm.aggregate(
+            "heart_rate",
+            {"mean": RollingMean(30), "max": RollingMax(30)},
+            interval=0.05,
+            callback=self.published.append,
+        )
+        self.start()
+
+    def test_aggregates_field(self):
+        self.assertTrue(wait_until(lambda: len(self.published) >= 2))
+        values = self.published[-1]
+        self.assertEqual(values["max"], 61)
+        self.assertTrue(60 <= values["mean"] <= 61)
+
+        self.hrm.unsubscribe(self.aggregation)
+        self.assertEqual(self.hrm._subscriptions, ())
@@ -0,0 +1,151 @@
+import array
+import enum
+import math
+import os
+import tempfile
+import unittest
+
+from openant.base.capture import RecordingDriver, index_path
+from openant.base.message import Message
+from openant.devices import power_meter
+from openant.devices.batch import (
+    COMMON_PAGES,
+    BatchPage,
+    PROFILE_PAGES,
+    decode_page,
+    decode_pages,
+    load_capture,
+    np,
+    unwrap,
+)
+from openant.devices.common import DeviceType
+from openant.devices.loadgen import page_generators
+from openant.devices.schema import Field, Page
+from openant.tests.base.test_ant import LoopbackDriver
+
+
+class Mode(enum.Enum):
+    Off = 0
+    On = 1
+
+
+def expected(value):
+    """A value decoded by `Page.decode` as it is in a batch column"""
+    if value is None:
+        return math.nan
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class BatchDecodeTest(unittest.TestCase):
+    def test_matches_page_decode(self):
+        for device_type, generator in page_generators.items():
+            with self.subTest(device_type=device_type.name):
+                generate = generator(seed=3)
+                pages = [generate(n) for n in range(300)]
+                decoded = decode_pages(pages, device_type, rollover=False)
+                for batch_page in PROFILE_PAGES[device_type] + COMMON_PAGES:
+                    column = decoded[batch_page.key]
+                    selected = batch_page.select(np.array([p[0] for p in pages]))
+                    rows = [p for p, s in zip(pages, selected) if s]
+                    self.assertEqual(len(column), len(rows))
+                    for row, data in zip(column, rows):
+                        values = batch_page.page.decode(
+                            array.array("B", data[batch_page.offset :])
+                        )
+                        for field, value in zip(batch_page.page.fields, values):
+                            np.testing.assert_equal(
+                                row[field.name], expected(value), err_msg=field.name
+                            )
+
+    def test_unwrap_by_channel(self):
+        raw = np.array([250, 10, 254, 20, 2, 30, 5])
+        channels = np.array([1, 2, 1, 2, 1, 2, 1])
+        self.assertEqual(
+            unwrap(raw, 8, channels).tolist(), [250, 10, 254, 20, 258, 30, 261]
+        )
+        self.assertEqual(unwrap(raw[:0], 8, channels[:0]).tolist(), [])
+
+    def test_rollover(self):
+        # accumulated power wraps at 65536 W
+        pages = [
+            [0x10, 0xFF, 0xFF, 90, 0xF0, 0xFF, 100, 0],
+            [0x10, 0x00, 0xFF, 90, 0x54, 0x00, 100, 0],
+        ]
+        power = decode_page(
+            pages, PROFILE_PAGES[DeviceType.PowerMeter][0], times=[5, 6]
+        )
+        self.assertEqual(power["time"].tolist(), [5, 6])
+        self.assertEqual(power["event_count"].tolist(), [255, 256])
+        self.assertEqual(power["accumulated_power"].tolist(), [65520, 65620])
+        raw = decode_page(
+            pages, PROFILE_PAGES[DeviceType.PowerMeter][0], rollover=False
+        )
+        self.assertEqual(raw["accumulated_power"].tolist(), [65520, 84])
+
+    def test_invalid_and_scale(self):
+        page = Page(
+            "p",
+            [
+                Field("cadence", 1, invalid=0xFF),
+                Field("speed", 2, size=2, scale=0.001, digits=3),
+                Field("mode", 4, enum=Mode),
+            ],
+        )
+        decoded = decode_page([[0, 0xFF, 0xE8, 0x03, 1, 0, 0, 0]], BatchPage(page))
+        self.assertTrue(np.isnan(decoded["cadence"][0]))
+        self.assertEqual(decoded["speed"][0], 1.0)
+        self.assertEqual(decoded["mode"].dtype, np.int64)
+        self.assertEqual(decoded["mode"][0], Mode.On.value)
+
+    def test_not_pages(self):
+        with self.assertRaises(ValueError):
+            decode_pages(np.zeros((2, 4)), DeviceType.PowerMeter)
+        with self.assertRaises(ValueError):
+            decode_pages(np.zeros((2, 8)), DeviceType.Unknown)
+
+
+@unittest.skipIf(np is None, "NumPy not installed")
+class LoadCaptureTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".antcap")
+        os.close(fd)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        for path in (self.path, index_path(self.path)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def test_load_capture(self):
+        """Power pages from meters 1 and 2 interleaved on channel 0"""
+        loopback = LoopbackDriver()
+        driver = RecordingDriver(loopback, self.path)
+        driver.open()
+        for n in range(600):
+            number = 1 + n % 2
+            count = n // 2
+            power = count * 200
+            data = [0, 0x10, count & 0xFF, 0xFF, 90, power & 0xFF, power >> 8, 100, 0]
+            data += [0x80, number, 0, DeviceType.PowerMeter.value, 5]
+            loopback._pending.put(Message(Message.ID.BROADCAST_DATA, data).get())
+            driver.read()
+        driver.close()
+
+        pages, times, channels = load_capture(self.path, DeviceType.PowerMeter)
+        self.assertEqual(pages.shape, (600, 8))
+        self.assertEqual(channels.tolist(), [1] * 300 + [2] * 300)
+        self.assertTrue(np.all(np.diff(times[:300]) >= 0))
+
+        power = decode_pages(pages, DeviceType.PowerMeter, times, channels)[
+            power_meter.STANDARD_POWER.name
+        ]
+        # counts of each meter unwrapped past 255 separately
+        self.assertEqual(power["event_count"].tolist(), list(range(300)) * 2)
+        self.assertEqual(power["accumulated_power"][299], 299 * 200)
+
+        pages, _, channels = load_capture(self.path, DeviceType.PowerMeter, 2)
+        self.assertEqual(set(channels.tolist()), {2})
+        self.assertEqual(len(pages), 300)
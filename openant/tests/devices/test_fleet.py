@@ -0,0 +1,127 @@
+import array
+import dataclasses
+import unittest
+
+from openant.base.emulator import SimulatedDevice
+from openant.devices.common import BatteryData, CommonData
+from openant.devices.fleet import FleetStore
+from openant.devices.heart_rate import HEART_RATE, HeartRate, HeartRateData
+from openant.devices.power_meter import PowerData
+from openant.devices.scanner import Scanner
+from openant.tests.emulated import EmulatedNodeTestCase, wait_until
+
+
+class FleetStoreTest(unittest.TestCase):
+    def test_views_behave_as_dataclass(self):
+        store = FleetStore(PowerData)
+        view = store.view("1:11")
+        view.instantaneous_power = 250
+        view.torque = 12.5
+        plain = PowerData(instantaneous_power=250, torque=12.5)
+
+        self.assertIsInstance(view, PowerData)
+        self.assertEqual(repr(view), repr(plain))
+        self.assertEqual(view.to_tuple(), plain.to_tuple())
+        self.assertEqual(
+            view.to_line_protocol({"d": 1}, time=1),
+            plain.to_line_protocol({"d": 1}, time=1),
+        )
+        self.assertEqual(view, plain)
+        self.assertEqual(store.snapshot("1:11"), plain)
+        self.assertIs(type(store.snapshot("1:11")), PowerData)
+
+    def test_typed_columns(self):
+        store = FleetStore(CommonData)
+        for n in range(100):
+            store.view(n).serial_no = n
+        self.assertIsInstance(store.column("serial_no"), array.array)
+        self.assertEqual(list(store.column("serial_no")), list(range(100)))
+        # not numbers or with factories held in lists
+        self.assertIsInstance(store.column("software_ver"), list)
+        self.assertIsInstance(store[5].last_battery_data, BatteryData)
+        self.assertIsNot(store[5].last_battery_data, store[6].last_battery_data)
+
+    def test_values_of_other_types(self):
+        store = FleetStore(PowerData)
+        view = store.view("a")
+        view.cadence = 90.5
+        view.torque = 1
+        view.instantaneous_power = 1 << 70
+        self.assertEqual(
+            (view.cadence, view.torque, view.instantaneous_power), (90.5, 1, 1 << 70)
+        )
+        self.assertIs(type(view.torque), int)
+        self.assertIsInstance(store.column("cadence"), list)
+        self.assertIsInstance(store.column("average_power"), array.array)
+
+    def test_page_update_and_slot_reuse(self):
+        store = FleetStore(HeartRateData)
+        HEART_RATE.update(store.view(1), array.array("B", [4, 0xFF, 0, 4, 0, 5, 7, 72]))
+        self.assertEqual((store[1].heart_rate, store[1].beat_count), (72, 7))
+        self.assertEqual(store[1].beat_time, 1.25)
+
+        store.view(2)
+        del store[1]
+        self.assertNotIn(1, store)
+        self.assertEqual(store.slot(3), 0)
+        self.assertEqual(store[3], HeartRateData())
+        self.assertEqual(list(store), [2, 3])
+
+    def test_not_dataclass(self):
+        with self.assertRaises(TypeError):
+            FleetStore(dict)
+
+        @dataclasses.dataclass
+        class Required:
+            value: int
+
+        with self.assertRaises(TypeError):
+            FleetStore(Required)
+
+
+class FleetDeviceTest(EmulatedNodeTestCase):
+    def devices(self):
+        return [
+            SimulatedDevice(
+                number,
+                120,
+                pages=lambda n, number=number: (
+                    [0x50, 0xFF, 0xFF, 1, 0x0F, 0x00, number, 0]
+                    if n % 4 == 0
+                    else [0x04, 0xFF, 0, 0, n & 0xFF, 0, n & 0xFF, 60 + number]
+                ),
+            )
+            for number in range(1, 4)
+        ]
+
+    def test_scanner_and_devices(self):
+        common = FleetStore(CommonData)
+        scanner = Scanner(self.node, store=common)
+        heart_rates = FleetStore(HeartRateData)
+        hrm = HeartRate(self.node, device_id=2)
+        view = hrm.use_store(heart_rates)
+        self.assertIs(type(hrm.data["heart_rate"]), type(view))
+        self.start()
+
+        self.assertTrue(
+            wait_until(
+                lambda: len(common) == 3
+                and all(common[k].model_no for k in common)
+                and heart_rates["2:120"].heart_rate == 62
+            )
+        )
+        self.assertIs(scanner.common, common)
+        self.assertEqual(common["3:120"].manufacturer_id, 15)
+        self.assertEqual(sorted(common.column("model_no")), [1, 2, 3])
+
+    def test_batteries_added_as_reported(self):
+        hrm = HeartRate(self.node, device_id=1)
+        self.assertEqual(hrm.data["batteries"], {})
+        # battery 1 of 2 then battery 2, voltage 3.5
+        for identifier in (0x12, 0x22):
+            hrm._on_data(array.array("B", [82, 0xFF, identifier, 0, 0, 0, 128, 0x23]))
+
+        self.assertEqual(sorted(hrm.data["batteries"]), [1, 2])
+        battery = hrm.data["batteries"][2]
+        self.assertEqual((battery.battery_id, battery.voltage_coarse), (2, 3))
+        self.assertIsNot(battery, hrm.data["common"].last_battery_data)
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from openant.base.emulator import EmulatorDriver
+from openant.devices.common import CommonData, DeviceType
+from openant.devices.heart_rate import HeartRate
+from openant.devices.inventory import DeviceInventory
+from openant.devices.scanner import Scanner
+from openant.devices.utilities import auto_create_device
+from openant.easy.node import Node
+from openant.tests.devices.test_registry import MANUFACTURER, PRODUCT, extended
+
+
+class DeviceInventoryTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "devices.db")
+
+    def test_persisted(self):
+        with DeviceInventory(self.path) as inventory:
+            inventory.found((1, 120, 1), now=100.0)
+            inventory.found((2, 11, 5), now=200.0)
+            inventory.update_common((2, 11, 5), CommonData(serial_no=7, model_no=3))
+            inventory.found((1, 120, 1), now=300.0)
+
+        with DeviceInventory(self.path) as inventory:
+            self.assertEqual(len(inventory), 2)
+            devices = inventory.devices()
+            self.assertEqual([d.device for d in devices], [(1, 120, 1), (2, 11, 5)])
+            self.assertEqual((devices[0].first_seen, devices[0].last_seen), (100, 300))
+            # values not received left unset
+            self.assertEqual((devices[1].serial_no, devices[1].model_no), (7, 3))
+            self.assertIsNone(devices[1].manufacturer_id)
+            self.assertIsNone(devices[1].software_ver)
+
+            self.assertEqual(
+                [d.device_id for d in inventory.devices(DeviceType.PowerMeter)], [2]
+            )
+            self.assertEqual([d.device_id for d in inventory.devices(since=250)], [1])
+            self.assertIsNone(inventory.get((3, 120, 1)))
+
+    def test_seen_only_moves_forward(self):
+        with DeviceInventory(self.path) as inventory:
+            inventory.found((1, 120, 1), now=100.0)
+            inventory.seen([((1, 120, 1), 50.0), ((9, 120, 1), 500.0)])
+            self.assertEqual(inventory.get((1, 120, 1)).last_seen, 100.0)
+            inventory.seen([((1, 120, 1), 150.0)])
+            self.assertEqual(inventory.get((1, 120, 1)).last_seen, 150.0)
+            self.assertEqual(len(inventory), 1)
+
+
+class ScannerInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.node = Node(EmulatorDriver([]))
+        self.inventory = DeviceInventory(":memory:")
+        self.now = 1000.0
+        # the clock of the scanner, seconds since the epoch and monotonic the same
+        clock = mock.Mock(time=lambda: self.now, monotonic=lambda: self.now)
+        patcher = mock.patch("openant.devices.scanner.time", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.node.stop()
+        self.inventory.close()
+
+    def test_written_as_found(self):
+        scanner = Scanner(self.node, inventory=self.inventory)
+        scanner._on_data(extended(MANUFACTURER, 1))
+        scanner._on_data(extended(PRODUCT, 1))
+        scanner._on_data(extended(MANUFACTURER, 2, device_type=11, trans_type=5))
+
+        device = self.inventory.get((1, 120, 1))
+        self.assertEqual((device.model_no, device.serial_no), (0x1234, 0x12345678))
+        self.assertEqual(device.software_ver, "1.2")
+        self.assertEqual((device.first_seen, device.last_seen), (1000, 1000))
+
+        # last seen written in batches
+        for self.now in range(1001, 1030):
+            scanner._on_data(extended([0x04] + [0] * 7, 1))
+        self.assertEqual(self.inventory.get((1, 120, 1)).last_seen, 1020)
+        scanner.flush()
+        self.assertEqual(self.inventory.get((1, 120, 1)).last_seen, 1029)
+        self.assertEqual(self.inventory.get((2, 11, 5)).last_seen, 1000)
+
+    def test_evicted_last_seen(self):
+        scanner = Scanner(self.node, inventory=self.inventory, max_devices=1)
+        scanner._on_data(extended(MANUFACTURER, 1))
+        self.now += 3
+        scanner._on_data(extended(MANUFACTURER, 1))
+        scanner._on_data(extended(MANUFACTURER, 2))
+        self.assertEqual(list(scanner.found), [(2, 120, 1)])
+        self.assertEqual(self.inventory.get((1, 120, 1)).last_seen, 1003)
+
+    def test_auto_create_known_device(self):
+        self.inventory.found((1234, 120, 5), now=100.0)
+        self.inventory.found((99, 11, 5), now=200.0)
+        device = auto_create_device(self.node, 0, "HeartRate", inventory=self.inventory)
+        self.assertIsInstance(device, HeartRate)
+        self.assertEqual((device.device_id, device.trans_type), (1234, 5))
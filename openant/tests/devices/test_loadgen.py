@@ -0,0 +1,24 @@
+import unittest
+
+from openant.devices.common import DeviceType
+from openant.devices.loadgen import PageGenerator, page_generators, run_load
+
+
+class LoadGeneratorTest(unittest.TestCase):
+    def test_common_pages_interleaved(self):
+        generator = page_generators[DeviceType.PowerMeter](seed=1)
+        pages = [generator(n)[0] for n in range(130)]
+        self.assertEqual(pages[64], 0x50)
+        self.assertEqual(pages[129], 0x51)
+        self.assertEqual(pages.count(0x50) + pages.count(0x51), 2)
+
+    def test_main_page_required(self):
+        with self.assertRaises(TypeError):
+            PageGenerator(seed=1)
+
+    def test_every_profile_decodes(self):
+        for device_type in page_generators:
+            with self.subTest(device_type=device_type.name):
+                result = run_load(device_type, count=2, speed=4, duration=0.5)
+                self.assertGreater(result.decoded, 0)
+                self.assertTrue(result.keeping_up)
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from openant.base.emulator import SimulatedDevice
+from openant.devices.heart_rate import HeartRate
+from openant.devices.pairing import PairingCache
+from openant.devices.utilities import auto_create_device
+from openant.tests.emulated import EmulatedNodeTestCase, heart_rate_pages, wait_until
+
+
+class PairingCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(directory.name, "pairing.json")
+
+    def test_persisted(self):
+        pairing = PairingCache(self.path)
+        self.assertTrue(pairing.pair(11, "left", 1, 5))
+        self.assertTrue(pairing.pair(11, "right", 2, 5))
+        self.assertTrue(pairing.pair(120, "", 3, 1))
+        self.assertTrue(pairing.pair(11, "left", 4, 5))
+
+        pairing = PairingCache(self.path)
+        self.assertEqual(len(pairing), 3)
+        self.assertEqual(pairing.get(11, "left"), (4, 11, 5))
+        self.assertEqual(pairing.get(11, "right"), (2, 11, 5))
+        self.assertEqual(pairing.get(120), (3, 120, 1))
+        self.assertEqual(os.listdir(self.directory), ["pairing.json"])
+
+    def test_forget(self):
+        pairing = PairingCache(self.path)
+        pairing.pair(11, "left", 1, 5)
+        self.assertTrue(pairing.forget(11, "left"))
+        self.assertFalse(pairing.forget(11, "left"))
+        self.assertIsNone(PairingCache(self.path).get(11, "left"))
+
+    def test_in_memory(self):
+        pairing = PairingCache()
+        pairing.pair(120, "chest", 1, 1)
+        self.assertEqual(pairing.get(120, "chest"), (1, 120, 1))
+        self.assertFalse(os.path.exists(self.path))
+
+
+class PairedDeviceTest(EmulatedNodeTestCase):
+    def devices(self):
+        # first found by a wildcard search is device 1
+        return [
+            SimulatedDevice(
+                number,
+                120,
+                trans_type=trans_type,
+                pages=heart_rate_pages(60 + number),
+            )
+            for number, trans_type in ((1, 1), (2, 5))
+        ]
+
+    def setUp(self):
+        super().setUp()
+        self.pairing = PairingCache()
+
+    def test_attached_device_paired(self):
+        hrm = auto_create_device(
+            self.node, 0, "HeartRate", pairing=self.pairing, tag="chest"
+        )
+        self.assertEqual(hrm.channel.channel_id, (0, 120, 0))
+        self.start()
+
+        self.assertTrue(wait_until(lambda: self.pairing.get(120, "chest")))
+        self.assertEqual(self.pairing.get(120, "chest"), (1, 120, 1))
+        self.assertIsNone(self.pairing.get(120))
+
+    def test_opened_on_paired_device(self):
+        self.pairing.pair(120, "chest", 2, 5)
+        hrm = auto_create_device(
+            self.node, 0, "HeartRate", pairing=self.pairing, tag="chest"
+        )
+        self.assertEqual(hrm.channel.channel_id, (2, 120, 5))
+        self.start()
+
+        self.assertTrue(wait_until(lambda: hrm.data["heart_rate"].heart_rate == 62))
+        self.assertEqual((hrm.device_id, hrm.trans_type), (2, 5))
+
+    def test_transmission_type_received_paired(self):
+        hrm = HeartRate(self.node, device_id=2)
+        hrm.use_pairing(self.pairing, "chest")
+        self.start()
+
+        self.assertTrue(wait_until(lambda: self.pairing.get(120, "chest")))
+        self.assertEqual(self.pairing.get(120, "chest"), (2, 120, 5))
+        self.assertEqual(hrm.trans_type, 5)
+        # set on the channel when created
+        self.assertEqual(
+            HeartRate(self.node, 3, trans_type=1).channel.channel_id, (3, 120, 1)
+        )
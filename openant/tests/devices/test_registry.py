@@ -0,0 +1,129 @@
+import unittest
+from unittest import mock
+
+from openant.base.emulator import EmulatorDriver
+from openant.devices.common import CommonData
+from openant.devices.fleet import FleetStore
+from openant.devices.registry import DeviceRegistry
+from openant.devices.scanner import Scanner
+from openant.easy.node import Node
+
+
+def extended(page, device_id, device_type=120, trans_type=1):
+    return bytes(
+        page + [0x80, device_id & 0xFF, device_id >> 8, device_type, trans_type]
+    )
+
+
+MANUFACTURER = [0x50, 0xFF, 0xFF, 2, 0x0F, 0x00, 0x34, 0x12]
+PRODUCT = [0x51, 0xFF, 0xFF, 12, 0x78, 0x56, 0x34, 0x12]
+
+
+class DeviceRegistryTest(unittest.TestCase):
+    def test_least_recently_seen_first(self):
+        registry = DeviceRegistry(max_devices=2)
+        for n, device in enumerate([(1, 120, 1), (2, 120, 1), (1, 120, 1)]):
+            registry.seen(device, now=n)
+        self.assertEqual(list(registry), [(2, 120, 1), (1, 120, 1)])
+        registry.seen((3, 11, 5), now=3)
+        self.assertEqual([s.device for s in registry.evict()], [(2, 120, 1)])
+        self.assertEqual(list(registry), [(1, 120, 1), (3, 11, 5)])
+
+    def test_max_age(self):
+        registry = DeviceRegistry(max_age=10)
+        registry.seen((1, 120, 1), now=0)
+        registry.seen((2, 120, 1), now=5)
+        self.assertEqual(registry.evict(now=10), [])
+        self.assertEqual([s.device for s in registry.evict(now=12)], [(1, 120, 1)])
+        self.assertEqual([s.device for s in registry.evict(now=20)], [(2, 120, 1)])
+        self.assertEqual(len(registry), 0)
+
+    def test_keys_shared_by_transmission_types(self):
+        registry = DeviceRegistry(max_devices=2)
+        registry.seen((1, 120, 1), now=0)
+        registry.seen((1, 120, 5), now=1)
+        registry.seen((2, 120, 1), now=2)
+        registry.evict()
+        self.assertTrue(registry.has_key("1:120"))
+        registry.remove((1, 120, 5))
+        self.assertFalse(registry.has_key("1:120"))
+        self.assertTrue(registry.has_key("2:120"))
+
+    def test_rate(self):
+        registry = DeviceRegistry(rate_window=2)
+        for n in range(9):
+            seen, _ = registry.seen((1, 120, 1), now=n * 0.25)
+        self.assertEqual(seen.messages, 9)
+        self.assertEqual(seen.rate, 4.0)
+        self.assertEqual((seen.first_seen, seen.last_seen), (0, 2.0))
+        self.assertEqual(seen.key, "1:120")
+
+
+class ScannerRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.node = Node(EmulatorDriver([]))
+        self.now = 0.0
+        # the clock of the scanner, seconds since the epoch and monotonic the same
+        clock = mock.Mock(time=lambda: self.now, monotonic=lambda: self.now)
+        patcher = mock.patch("openant.devices.scanner.time", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.node.stop()
+
+    def scanner(self, **kwargs):
+        scanner = Scanner(self.node, **kwargs)
+        self.updates = []
+        self.lost = []
+        scanner.on_update = lambda device, common: self.updates.append((device, common))
+        scanner.on_lost = self.lost.append
+        return scanner
+
+    def test_common_pages_decoded_when_changed(self):
+        scanner = self.scanner()
+        for _ in range(3):
+            scanner._on_data(extended(MANUFACTURER, 1))
+            scanner._on_data(extended(PRODUCT, 1))
+        self.assertEqual(len(self.updates), 2)
+        common = scanner.common["1:120"]
+        self.assertEqual(
+            (common.hardware_rev, common.manufacturer_id, common.model_no),
+            (2, 15, 0x1234),
+        )
+        self.assertEqual((common.software_ver, common.serial_no), ("1.2", 0x12345678))
+        # updates replace the dataclass, those passed to callbacks are unchanged
+        self.assertEqual(self.updates[0][1].serial_no, CommonData().serial_no)
+        self.assertEqual(scanner.registry[(1, 120, 1)].messages, 6)
+        self.assertEqual(scanner.found, {(1, 120, 1)})
+
+    def test_evicts_devices_not_seen(self):
+        store = FleetStore(CommonData)
+        scanner = self.scanner(max_age=60, store=store)
+        scanner._on_data(extended(MANUFACTURER, 1))
+        scanner._on_data(extended(MANUFACTURER, 2))
+        self.assertEqual(store["2:120"].model_no, 0x1234)
+        for self.now in range(30, 100, 10):
+            scanner._on_data(extended([0x04] + [0] * 7, 2))
+        self.assertEqual(self.lost, [(1, 120, 1)])
+        self.assertEqual(list(store), ["2:120"])
+        self.assertEqual(scanner.found, {(2, 120, 1)})
+
+        # found again as new
+        scanner._on_data(extended(MANUFACTURER, 1))
+        self.assertEqual(store["1:120"].model_no, 0x1234)
+        self.assertEqual(len(scanner.found), 2)
+
+    def test_max_devices(self):
+        scanner = self.scanner(max_devices=2)
+        for device_id in range(5):
+            scanner._on_data(extended(MANUFACTURER, device_id))
+        self.assertEqual(self.lost, [(0, 120, 1), (1, 120, 1), (2, 120, 1)])
+        self.assertEqual(list(scanner.common), ["3:120", "4:120"])
+
+    def test_common_shared_by_transmission_types(self):
+        scanner = self.scanner(max_devices=1)
+        scanner._on_data(extended(MANUFACTURER, 1, trans_type=1))
+        scanner._on_data(extended(MANUFACTURER, 1, trans_type=5))
+        self.assertEqual(self.lost, [(1, 120, 1)])
+        self.assertIn("1:120", scanner.common)
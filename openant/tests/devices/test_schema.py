@@ -0,0 +1,154 @@
+import array
+import unittest
+from enum import Enum
+
+from openant.base.emulator import EmulatorDriver
+from openant.devices import dropper_seatpost, environment, fitness_equipment, lev, shift
+from openant.devices.schema import Field, Page, SchemaException
+from openant.easy.node import Node
+
+
+class Mode(Enum):
+    Off = 0
+    On = 1
+
+
+class Target:
+    pass
+
+
+def page(*data):
+    return array.array("B", data)
+
+
+class PageTest(unittest.TestCase):
+    def test_overlapping_fields(self):
+        p = Page(
+            "p",
+            [
+                Field("word", 2, size=2),
+                Field("low", 2),
+                Field("high_nibble", 3, shift=4),
+                Field("three", 4, size=3),
+            ],
+        )
+        self.assertEqual(len(p._layers()), 2)
+        self.assertEqual(
+            p.decode(page(0, 0, 0x34, 0x12, 0x01, 0x02, 0x03, 0)),
+            (0x1234, 0x34, 0x1, 0x030201),
+        )
+
+    def test_signed_scale_digits(self):
+        p = Page(
+            "p",
+            [
+                Field("temperature", 1, size=2, signed=True, scale=0.01),
+                Field("nibble", 3, bits=4, signed=True),
+                Field("speed", 4, size=2, scale=0.001, digits=3),
+                Field("offset", 6, offset=-40),
+            ],
+        )
+        self.assertEqual(
+            p.decode(page(0, 0x9C, 0xFF, 0x0F, 0xE8, 0x03, 20, 0)),
+            (-1.0, -1, 1.0, -20),
+        )
+
+    def test_invalid_and_update(self):
+        p = Page(
+            "p",
+            [Field("cadence", 1, invalid=0xFF), Field("power", 2, size=2)],
+        )
+        self.assertEqual(p.decode(page(0, 0xFF, 10, 0, 0, 0, 0, 0)), (None, 10))
+        self.assertEqual(
+            p.as_dict(page(0, 90, 10, 0, 0, 0, 0, 0)), {"cadence": 90, "power": 10}
+        )
+
+        target = Target()
+        target.cadence = 80
+        p.update(target, page(0, 0xFF, 10, 0, 0, 0, 0, 0))
+        self.assertEqual((target.cadence, target.power), (80, 10))
+
+    def test_enum(self):
+        p = Page(
+            "p",
+            [
+                Field("mode", 1, bits=1, enum=Mode),
+                Field("flag", 1, shift=1, bits=1, enum=bool),
+                # wide enum is called rather than tabled
+                Field("wide", 2, size=2, enum=lambda raw: raw * 2),
+            ],
+        )
+        self.assertEqual(
+            p.decode(page(0, 0x03, 2, 1, 0, 0, 0, 0)), (Mode.On, True, 0x204)
+        )
+
+        # raw values without a member are only an error when decoded
+        p = Page("p", [Field("mode", 1, bits=2, enum=Mode)])
+        with self.assertRaises(ValueError):
+            p.decode(page(0, 2, 0, 0, 0, 0, 0, 0))
+
+    def test_bad_schema(self):
+        for fields in (
+            [Field("a", 1), Field("a", 2)],
+            [Field("class", 1)],
+            [Field("a", 7, size=2)],
+            [Field("a", 1, size=5)],
+            [Field("a", 1, shift=4, bits=5)],
+        ):
+            with self.subTest(fields=fields), self.assertRaises(SchemaException):
+                Page("p", fields)
+
+
+class ProfilePagesTest(unittest.TestCase):
+    """Values the previous hand written decoders got wrong"""
+
+    def test_fe_state(self):
+        data = page(0x10, 25, 0, 0, 0xE8, 0x03, 0, 0x30)
+        self.assertEqual(
+            fitness_equipment.GENERAL_FE.decode(data)[-1],
+            fitness_equipment.FitnessEquipmentState.InUse,
+        )
+
+    def test_dropper_delay_indicator(self):
+        _, delay, indicator, _ = dropper_seatpost.STATUS.decode(
+            page(0x01, 0, 0, 0, 0, 0, 0x85, 0)
+        )
+        self.assertEqual(delay, 5)
+        self.assertEqual(indicator, dropper_seatpost.DelayIndicator(1))
+
+    def test_environment_signed(self):
+        # min -2.0 C, max 25.0 C, current -1.5 C
+        data = page(0x01, 0, 0, 0xEC, 0xAF, 0x0F, 0x6A, 0xFF)
+        low, high, current = environment.TEMPERATURE.decode(data)
+        self.assertAlmostEqual(low, -2.0)
+        self.assertAlmostEqual(high, 25.0)
+        self.assertAlmostEqual(current, -1.5)
+
+    def test_lev_alerts(self):
+        values = lev.SPEED_SYSTEM.as_dict(page(0x01, 0x88, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(values["motor_alert"], lev.TemperatureAlert.Overheating)
+        self.assertEqual(values["battery_alert"], lev.TemperatureAlert.Overheating)
+
+    def test_shift_event_type(self):
+        values = shift.FUNCTION_SET_EVENTS.as_dict(page(0x02, 1, 0x23, 0, 0, 0, 0, 0))
+        self.assertEqual(values["event_1_id"], 3)
+        self.assertEqual(values["event_1_type"], shift.FunctionSetEventType(2))
+
+    def test_shift_function_set_configuration(self):
+        data = page(0x03, 0x02, 0, 0, 0, 0, 0, 0x0C)
+        sets = shift.FUNCTION_SET_CONFIGURATION.decode(data)
+        self.assertEqual(len(sets), 21)
+        self.assertEqual(sets[0:3], (True, False, False))
+        self.assertEqual(sets[18:21], (False, True, True))
+        # flag byte and channel ID of extended data not decoded
+        extended = page(*data, 0x80, 0x39, 0x30, 34, 5)
+        self.assertEqual(shift.FUNCTION_SET_CONFIGURATION.decode(extended), sets)
+
+        node = Node(EmulatorDriver([]))
+        self.addCleanup(node.stop)
+        shifting = shift.Shifting(node)
+        shifting.on_data(data)
+        configuration = shifting.data["shift"].function_set_7_configuration
+        self.assertEqual(
+            configuration, shift.FunctionSetConfiguration(False, True, True)
+        )
@@ -0,0 +1,79 @@
+import enum
+import unittest
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from openant.devices.common import CommonData, DeviceData
+from openant.devices.serialize import Serializer
+
+
+class Gear(enum.Enum):
+    Low = 1
+    High = 2
+    Named = "named"
+
+
+@dataclass
+class SampleData(DeviceData):
+    count: int = 0
+    speed: float = 1.5
+    enabled: bool = True
+    gear: Gear = Gear.Low
+    name: str = "a b"
+    history: List[int] = field(default_factory=list)
+    estimate: Optional[float] = None
+
+
+def reference(data) -> dict:
+    """The generic conversion the generated serializers must match"""
+    fields = {}
+    for name in data.__dataclass_fields__:
+        value = getattr(data, name)
+        if isinstance(value, enum.Enum):
+            fields[name] = value.value
+        elif isinstance(value, (int, float)):
+            fields[name] = value
+    return fields
+
+
+class SerializerTest(unittest.TestCase):
+    def test_cached_per_class(self):
+        self.assertIs(SampleData.serializer(), Serializer.of(SampleData))
+        self.assertIsNot(SampleData.serializer(), CommonData.serializer())
+        self.assertEqual(
+            SampleData.serializer().columns,
+            ("count", "speed", "enabled", "gear", "estimate"),
+        )
+
+    def test_fields(self):
+        data = SampleData()
+        self.assertEqual(
+            data.to_influx_json({"t": "1"}, time=5),
+            {
+                "measurement": "SampleData",
+                "tags": {"t": "1"},
+                "time": 5,
+                "fields": {"count": 0, "speed": 1.5, "enabled": True, "gear": 1},
+            },
+        )
+        data.estimate = 2.0
+        data.gear = Gear.Named
+        self.assertEqual(data.serializer().fields(data), reference(data))
+
+    def test_values_not_of_hinted_type(self):
+        data = SampleData(count=None, speed=3, gear=2, name=7, estimate=Gear.High)
+        self.assertEqual(data.serializer().fields(data), reference(data))
+        self.assertEqual(data.to_tuple(), (None, 3, True, 2, 2))
+
+    def test_line_protocol(self):
+        data = SampleData(count=3, estimate=float("nan"), gear=Gear.Named)
+        self.assertEqual(
+            data.to_line_protocol({"z": 1, "device": "hr 1", "empty": ""}, time=9),
+            'SampleData,device=hr\\ 1,z=1 count=3i,speed=1.5,enabled=true,gear="named" 9',
+        )
+
+        @dataclass
+        class Empty(DeviceData):
+            name: str = ""
+
+        self.assertIsNone(Empty().to_line_protocol({}))
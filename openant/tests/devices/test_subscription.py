@@ -0,0 +1,104 @@
+import unittest
+
+from openant.devices.heart_rate import HeartRate, HeartRateData
+from openant.devices.subscription import Subscription
+from openant.devices.tire_pressure_monitor import TirePressureData
+from openant.tests.emulated import EmulatedNodeTestCase, wait_until
+
+
+class SubscriptionTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.data = TirePressureData()
+
+    def subscription(self, **kwargs):
+        return Subscription(lambda *args: self.calls.append(args), **kwargs)
+
+    def offer(self, subscription, now, **values):
+        for name, value in values.items():
+            setattr(self.data, name, value)
+        return subscription.offer(0x01, "tire_pressure", self.data, now=now)
+
+    def test_deadband(self):
+        s = self.subscription(fields=["pressure"], deadband=2)
+        self.assertTrue(self.offer(s, 0, pressure=100))
+        self.assertFalse(self.offer(s, 1, pressure=101))
+        # drift is compared with the value last delivered
+        self.assertFalse(self.offer(s, 2, pressure=102))
+        self.assertTrue(self.offer(s, 3, pressure=103))
+        self.assertEqual((s.offered, s.delivered), (4, 2))
+        self.assertEqual(self.calls[0], (0x01, "tire_pressure", self.data))
+
+    def test_unwatched_fields(self):
+        s = self.subscription(fields=["pressure"])
+        self.offer(s, 0, pressure=100, barometric_pressure=1000)
+        self.assertFalse(self.offer(s, 1, barometric_pressure=1010))
+        self.assertTrue(self.offer(s, 2, pressure=99))
+
+    def test_min_interval(self):
+        s = self.subscription(min_interval=1.0)
+        self.assertTrue(self.offer(s, 0.0, pressure=100))
+        self.assertFalse(self.offer(s, 0.5, pressure=110))
+        # held back change delivered with the next page after the interval
+        self.assertTrue(self.offer(s, 1.0))
+        self.assertFalse(self.offer(s, 2.5))
+
+    def test_max_interval(self):
+        s = self.subscription(fields=["pressure"], max_interval=10)
+        self.assertTrue(self.offer(s, 0, pressure=100))
+        self.assertFalse(self.offer(s, 5))
+        self.assertTrue(self.offer(s, 10))
+
+    def test_pages_and_missing_fields(self):
+        s = self.subscription(pages=["heart_rate"])
+        self.assertFalse(self.offer(s, 0, pressure=100))
+        s = self.subscription(fields=["heart_rate"])
+        self.assertFalse(self.offer(s, 0, pressure=100))
+        self.assertEqual(s.offered, 0)
+
+    def test_deadband_by_field(self):
+        data = HeartRateData(heart_rate=60)
+        s = self.subscription(
+            fields=["heart_rate", "beat_count"],
+            deadband={"heart_rate": 5, "beat_count": 1000},
+        )
+        self.assertTrue(s.offer(4, "heart_rate", data, now=0))
+        data.heart_rate, data.beat_count = 63, 200
+        self.assertFalse(s.offer(4, "heart_rate", data, now=1))
+        data.heart_rate = 66
+        self.assertTrue(s.offer(4, "heart_rate", data, now=2))
+
+
+class DeviceSubscriptionTest(EmulatedNodeTestCase):
+    def setUp(self):
+        # heart rate steady at 60 while beat time and count change every page
+        super().setUp()
+        self.hrm = HeartRate(self.node, device_id=1)
+        self.pages = 0
+        self.changes = []
+
+        def on_device_data(page, page_name, data):
+            self.pages += 1
+
+        self.hrm.on_device_data = on_device_data
+        self.subscription = self.hrm.subscribe(
+            lambda page, page_name, data: self.changes.append(data.heart_rate),
+            fields=["heart_rate"],
+        )
+        self.start()
+
+    def test_only_changes_delivered(self):
+        self.assertTrue(wait_until(lambda: self.pages >= 10))
+        self.assertEqual(self.changes, [60])
+
+        self.hrm.unsubscribe(self.subscription)
+        self.assertEqual(self.hrm._subscriptions, ())
+
+    def test_unknown_field(self):
+        with self.assertRaisesRegex(ValueError, "heartrate"):
+            self.hrm.subscribe(print, fields=["heartrate"])
+        with self.assertRaisesRegex(ValueError, "beat_counts"):
+            self.hrm.subscribe(print, deadband={"heart_rate": 2, "beat_counts": 1})
+        # fields of common data pages can be watched too
+        self.hrm.subscribe(print, fields=["heart_rate", "battery_number"])
+        self.assertEqual(len(self.hrm._subscriptions), 2)
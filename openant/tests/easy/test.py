@@ -25,13 +25,68 @@ import logging
 import os
 import sys
 import struct
+import threading
 import unittest
 
+from openant.base.emulator import EmulatorDriver, SimulatedDevice
 from openant.easy.node import Node, Message
 from openant.easy.channel import Channel
+from openant.tests.emulated import wait_until
+
+NETWORK_KEY = [0xA8, 0xA4, 0x23, 0xB9, 0xF5, 0x5E, 0x63, 0xC1]
 
 
 class AntEasyTests(unittest.TestCase):
+    def search(self, node):
+        """Print information of the stick of `node` and open a channel searching on it"""
+        print("Request basic information...")
+        m = node.request_message(Message.ID.RESPONSE_ANT_VERSION)
+        print("  ANT version:  ", struct.unpack("<10sx", m[2])[0])
+        m = node.request_message(Message.ID.RESPONSE_CAPABILITIES)
+        print("  Capabilities: ", m[2])
+        m = node.request_message(Message.ID.RESPONSE_SERIAL_NUMBER)
+        print("  Serial number:", struct.unpack("<I", m[2])[0])
+
+        print("Starting system...")
+
+        # node.reset_system()
+        node.set_network_key(0x00, NETWORK_KEY)
+
+        c = node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+
+        c.set_period(4096)
+        c.set_search_timeout(255)
+        c.set_rf_freq(50)
+        c.set_search_waveform([0x53, 0x00])
+        c.set_id(0, 0x01, 0)
+
+        print("Open channel...")
+        c.open()
+        c.request_message(Message.ID.RESPONSE_CHANNEL_STATUS)
+        return c
+
+    def test_search_emulated(self):
+        # a page that changes, as repeated broadcasts are dropped
+        device = SimulatedDevice(
+            7, 0x01, period=4096, rf_freq=50, pages=lambda n: [n & 0xFF] * 8
+        )
+        driver = EmulatorDriver([device], serial=1234, speed=20)
+        self.node = Node(driver)
+        thread = threading.Thread(target=self.node.start)
+        try:
+            c = self.search(self.node)
+            received = []
+            c.on_broadcast_data = received.append
+            print("Searching...")
+            thread.start()
+            self.assertTrue(wait_until(lambda: len(received) > 2))
+            self.assertEqual(self.node.serial, 1234)
+            self.assertEqual(self.node.ant_version, driver.version.decode("ascii"))
+        finally:
+            self.stop()
+            if thread.ident is not None:
+                thread.join()
+
     @unittest.skipIf(
         os.environ.get("ANT_TEST_USB_STICK", True), "Testing with USB stick not enabled"
     )
@@ -48,32 +103,7 @@ class AntEasyTests(unittest.TestCase):
             logger.addHandler(handler)
 
             self.node = Node()
-            print("Request basic information...")
-            m = self.node.request_message(Message.ID.RESPONSE_ANT_VERSION)
-            print("  ANT version:  ", struct.unpack("<10sx", m[2])[0])
-            m = self.node.request_message(Message.ID.RESPONSE_CAPABILITIES)
-            print("  Capabilities: ", m[2])
-            m = self.node.request_message(Message.ID.RESPONSE_SERIAL_NUMBER)
-            print("  Serial number:", struct.unpack("<I", m[2])[0])
-
-            print("Starting system...")
-
-            NETWORK_KEY = [0xA8, 0xA4, 0x23, 0xB9, 0xF5, 0x5E, 0x63, 0xC1]
-
-            # self.node.reset_system()
-            self.node.set_network_key(0x00, NETWORK_KEY)
-
-            c = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
-
-            c.set_period(4096)
-            c.set_search_timeout(255)
-            c.set_rf_freq(50)
-            c.set_search_waveform([0x53, 0x00])
-            c.set_id(0, 0x01, 0)
-
-            print("Open channel...")
-            c.open()
-            c.request_message(Message.ID.RESPONSE_CHANNEL_STATUS)
+            self.search(self.node)
 
             print("Searching...")
 
@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from openant.base.emulator import EmulatorDriver
+from openant.base.message import Message
+from openant.easy.channel import Channel
+from openant.easy.exception import AntException
+from openant.easy.node import Node, SearchPolicy
+from openant.tests.base.test_ant import LoopbackDriver
+
+
+class NodeStopTest(unittest.TestCase):
+    def test_start_stop_cycle(self):
+        cycles = 5
+        begin = time.monotonic()
+        for _ in range(cycles):
+            node = Node(LoopbackDriver())
+            thread = threading.Thread(target=node.start)
+            thread.start()
+            node.stop()
+            thread.join()
+        cycle_time = (time.monotonic() - begin) / cycles
+        # previously bounded by 1 s queue polling in both dispatch loops
+        self.assertLess(cycle_time, 0.5)
+
+    def test_stop_wakes_waiter(self):
+        node = Node(LoopbackDriver())
+        errors = []
+
+        def wait():
+            try:
+                node.wait_for_special(Message.ID.RESPONSE_SERIAL_NUMBER + 0x80)
+            except AntException as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        time.sleep(0.05)
+        begin = time.monotonic()
+        node.stop()
+        thread.join()
+        self.assertLess(time.monotonic() - begin, 0.5)
+        self.assertEqual(len(errors), 1)
+
+
+class SearchPolicyTest(unittest.TestCase):
+    def setUp(self):
+        self.driver = EmulatorDriver([])
+        self.node = Node(self.driver)
+        self.channel = self.node.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+
+    def tearDown(self):
+        self.node.stop()
+
+    def test_priority_for(self):
+        policy = SearchPolicy(priority=2, device_priorities={11: 7})
+        self.assertEqual(policy.priority_for(11), 7)
+        self.assertEqual(policy.priority_for(120), 2)
+        self.assertIsNone(SearchPolicy().priority_for(11))
+
+    def test_apply(self):
+        policy = SearchPolicy(
+            priority=3,
+            sharing_cycles=2,
+            search_timeout=4,
+            low_priority_search_timeout=6,
+        )
+        with mock.patch.object(
+            self.channel,
+            "set_search_priority",
+            wraps=self.channel.set_search_priority,
+        ) as set_search_priority:
+            policy.apply(self.channel, 120)
+        emulated = self.driver.channels[self.channel.id]
+        self.assertEqual(
+            (emulated.search_timeout, emulated.low_priority_search_timeout), (4, 6)
+        )
+        set_search_priority.assert_called_once_with(3)
+
+    def test_apply_continues_after_rejected(self):
+        policy = SearchPolicy(
+            priority=3, sharing_cycles=2, low_priority_search_timeout=6
+        )
+        rejected = mock.Mock(side_effect=Exception("Responded with error 40"))
+        with mock.patch.object(
+            self.channel, "set_low_priority_search_timeout", rejected
+        ), mock.patch.object(
+            self.channel, "set_search_priority"
+        ) as set_search_priority, mock.patch.object(
+            self.channel, "set_search_sharing"
+        ) as set_search_sharing, self.assertLogs(
+            "openant.easy.node", "WARNING"
+        ):
+            policy.apply(self.channel, 120)
+        set_search_priority.assert_called_once_with(3)
+        set_search_sharing.assert_called_once_with(2)
@@ -0,0 +1,126 @@
+import threading
+import unittest
+
+from openant.base.driver import DriverNotFound
+from openant.base.emulator import EmulatorDriver, SimulatedDevice
+from openant.base.trace import ALL, Stage
+from openant.devices import ANTPLUS_NETWORK_KEY
+from openant.devices.heart_rate import HeartRate, HeartRateData
+from openant.easy.channel import Channel
+from openant.easy.pool import NodePool
+from openant.tests.emulated import heart_rate_pages, wait_until
+
+
+class FailingDriver(EmulatorDriver):
+    def open(self):
+        raise OSError("stick unplugged")
+
+
+class NodePoolTest(unittest.TestCase):
+    def test_channels_placed_on_least_loaded(self):
+        drivers = [EmulatorDriver(max_channels=2), EmulatorDriver(max_channels=4)]
+        pool = NodePool(drivers)
+        self.addCleanup(pool.stop)
+        # as reported in capabilities, which may not have been received yet
+        for node, driver in zip(pool.nodes, drivers):
+            node.max_channels = driver.max_channels
+        self.assertEqual((len(pool.nodes), pool.max_channels), (2, 6))
+        self.assertIs(pool.nodes[1].search_policy, pool.search_policy)
+
+        channels = [
+            pool.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE) for _ in range(6)
+        ]
+        self.assertEqual(
+            [pool.nodes.index(c._node) for c in channels], [0, 1, 1, 0, 1, 1]
+        )
+        with self.assertRaises(RuntimeError):
+            pool.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)
+
+        channels[3].open()
+        pool.remove_channel(channels[3])
+        self.assertEqual(len(pool.channels), 5)
+        self.assertIs(
+            pool.new_channel(Channel.Type.BIDIRECTIONAL_RECEIVE)._node, pool.nodes[0]
+        )
+
+    def test_no_drivers(self):
+        with self.assertRaises(DriverNotFound):
+            NodePool([])
+
+    def test_driver_error_raised(self):
+        working = EmulatorDriver()
+        with self.assertRaisesRegex(OSError, "stick unplugged"):
+            NodePool([working, FailingDriver()])
+        # node of the working stick stopped
+        self.assertFalse(working._running)
+
+
+class NodePoolDeviceTest(unittest.TestCase):
+    def setUp(self):
+        drivers = [
+            EmulatorDriver(
+                [SimulatedDevice(number, 120, pages=heart_rate_pages(60 + number))],
+                speed=20,
+            )
+            for number in (1, 2)
+        ]
+        self.pool = NodePool(drivers)
+        self.pool.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+        self.thread = threading.Thread(target=self.pool.start)
+
+    def tearDown(self):
+        self.pool.stop()
+        if self.thread.ident is not None:
+            self.thread.join()
+
+    def labels(self, node):
+        return {s.labels.get("device") for s in node.metrics.snapshot()}
+
+    def test_device_metrics_on_channel_node(self):
+        devices = [HeartRate(self.pool), HeartRate(self.pool)]
+        self.assertEqual([d.channel._node for d in devices], self.pool.nodes)
+        for device, node in zip(devices, self.pool.nodes):
+            device.page_counts[4] += 1
+            self.assertIn(str(device), self.labels(node))
+        devices[0].close_channel()
+        self.assertNotIn(str(devices[0]), self.labels(self.pool.nodes[0]))
+
+    def test_callbacks_monitored_by_channel_node(self):
+        device = HeartRate(self.pool)
+        monitor = self.pool.nodes[0].enable_callback_monitor()
+        received = []
+        device.on_device_data = lambda *args: received.append("callback")
+        device.subscribe(lambda *args: received.append("subscription"))
+
+        device._on_device_data(4, "heart_rate", HeartRateData(heart_rate=60))
+        self.assertEqual(received, ["callback", "subscription"])
+        self.assertEqual(
+            {hook for _, hook in monitor.stats}, {"on_device_data", "subscription"}
+        )
+
+    def test_data_of_devices_on_nodes(self):
+        devices = [HeartRate(self.pool), HeartRate(self.pool)]
+        tracer = self.pool.nodes[1].enable_tracing()
+        self.thread.start()
+
+        self.assertTrue(
+            wait_until(
+                lambda: [d.data["heart_rate"].heart_rate for d in devices] == [61, 62]
+            )
+        )
+        # decode stamped by the device on the traced node
+        self.assertTrue(
+            wait_until(lambda: tracer.histogram(Stage.DECODE, ALL).count > 0)
+        )
+
+    def test_callbacks_on_one_thread(self):
+        devices = [HeartRate(self.pool), HeartRate(self.pool)]
+        threads = [set(), set()]
+        for device, dispatched in zip(devices, threads):
+            device.on_device_data = lambda *args, d=dispatched: d.add(
+                threading.current_thread()
+            )
+        self.thread.start()
+
+        self.assertTrue(wait_until(lambda: all(threads)))
+        self.assertEqual(threads, [{self.thread}, {self.thread}])
@@ -0,0 +1,74 @@
+import time
+import unittest
+
+from openant.devices.heart_rate import HeartRate
+from openant.easy.profiling import CallbackMonitor
+from openant.tests.emulated import EmulatedNodeTestCase, wait_until
+
+
+def slow_handler(*_):
+    time.sleep(0.01)
+
+
+class CallbackMonitorTest(unittest.TestCase):
+    def test_slow_reported_once_per_interval(self):
+        monitor = CallbackMonitor(threshold=0.005, report_interval=60)
+        with self.assertLogs("openant.easy.profiling", "WARNING") as logs:
+            for _ in range(3):
+                monitor.call("device", "on_update", slow_handler, [1])
+            monitor.call("device", "on_update", lambda _: None, [1])
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("device.on_update", logs.output[0])
+        self.assertIn("slow_handler", logs.output[0])
+        stats = monitor.stats[("device", "on_update")]
+        self.assertEqual((stats.calls, stats.slow), (4, 3))
+        self.assertGreaterEqual(stats.max, 0.01)
+
+    def test_nested_callbacks_exclusive(self):
+        monitor = CallbackMonitor(threshold=0.005, report_interval=60)
+        with self.assertLogs("openant.easy.profiling", "WARNING") as logs:
+            monitor.call(
+                "channel_0",
+                "on_broadcast_data",
+                lambda: monitor.call("device", "on_update", slow_handler),
+            )
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("device.on_update", logs.output[0])
+        outer = monitor.stats[("channel_0", "on_broadcast_data")]
+        self.assertEqual(outer.slow, 0)
+        self.assertLess(outer.max, 0.005)
+        self.assertEqual(monitor.stats[("device", "on_update")].slow, 1)
+
+
+class NodeProfilingTest(EmulatedNodeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hrm = HeartRate(self.node, device_id=1)
+        self.hrm.on_device_data = slow_handler
+
+    def test_callbacks_timed(self):
+        monitor = self.node.enable_callback_monitor(report_interval=60)
+        self.start()
+        key = (str(self.hrm), "on_device_data")
+        self.assertTrue(wait_until(lambda: key in monitor.stats))
+
+        self.assertGreater(monitor.stats[key].slow, 0)
+        self.assertIn("slow_handler", monitor.stats[key].site)
+        # not charged for the slow device callback it calls
+        self.assertLess(monitor.stats[("channel_0", "on_broadcast_data")].max, 0.01)
+        self.assertIn(key, [k for k, _ in monitor.slowest(2)])
+
+    def test_profiling_switched_at_runtime(self):
+        self.start()
+        self.assertTrue(wait_until(lambda: self.hrm._found))
+        profiler = self.node.start_profiling(interval=0.001)
+        self.assertTrue(wait_until(lambda: profiler.samples > 20))
+        self.node.stop_profiling()
+        samples = profiler.samples
+        time.sleep(0.05)
+
+        self.assertFalse(profiler.running)
+        self.assertEqual(profiler.samples, samples)
+        self.assertTrue(any("slow_handler" in s for s in profiler.stacks))
@@ -0,0 +1,52 @@
+"""
+Helpers for tests of nodes and devices on a stick emulated by `EmulatorDriver`
+"""
+
+import threading
+import time
+import unittest
+from typing import List
+
+from openant.base.emulator import EmulatorDriver, SimulatedDevice
+from openant.devices import ANTPLUS_NETWORK_KEY
+from openant.easy.node import Node
+
+
+def wait_until(condition, timeout=5):
+    """Poll `condition` until true or `timeout` seconds pass, returning its last value"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def heart_rate_pages(heart_rate):
+    """Pages of a heart rate monitor at `heart_rate`, beat time and count changing every page"""
+    return lambda n: [0x04, 0xFF, 0x00, 0x00, n & 0xFF, 0x00, n & 0xFF, heart_rate]
+
+
+class EmulatedNodeTestCase(unittest.TestCase):
+    """
+    `node` on an emulated stick with `devices` in range, dispatching on `thread`
+
+    The node is not dispatching until `start`, so devices created in `setUp`
+    see all data. It is stopped after each test.
+    """
+
+    def devices(self) -> List[SimulatedDevice]:
+        """Devices in range of the stick, a heart rate monitor 1 at 60 bpm"""
+        return [SimulatedDevice(1, 120, pages=heart_rate_pages(60))]
+
+    def setUp(self):
+        self.driver = EmulatorDriver(self.devices(), speed=20)
+        self.node = Node(self.driver)
+        self.node.set_network_key(0x00, ANTPLUS_NETWORK_KEY)
+        self.thread = threading.Thread(target=self.node.start)
+
+    def tearDown(self):
+        self.node.stop()
+        if self.thread.ident is not None:
+            self.thread.join()
+
+    def start(self):
+        self.thread.start()